@@ -0,0 +1,387 @@
+"""
+Benchmark suite for detection and the frame processing pipeline.
+
+Measures detection throughput, process_frame latency percentiles and MJPEG
+encode cost, compares them against a JSON baseline and exits non-zero when
+any metric regresses by more than the allowed percentage, when a baseline
+metric is missing from the run, or when there is no baseline at all.
+The committed baseline.json was recorded on a single core; re-record it
+with --update-baseline on the machine that runs the check. Tiled
+detection only runs thread counts the machine has cores for, and baseline
+metrics needing more cores than the machine has are skipped.
+
+Example:
+    python -m benchmarks.run_benchmarks --update-baseline
+    python -m benchmarks.run_benchmarks --max-regression 10
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.vehicle_detection.detector import CarDetector
+from src.vehicle_detection.boxes import iou_matrix, regions_bounding_box, scale_regions
+from src.camera.camera_manager import CameraManager
+from src.camera.replay import ReplaySource
+from src.traffic_monitor import TrafficMonitor
+from config.settings import CAMERA_SETTINGS, LANES
+
+BENCHMARK_DIR = Path(__file__).parent
+IMAGE_PATH = Path(project_root) / 'examples' / 'images' / 'test_cars.jpg'
+VIDEO_PATH = Path(project_root) / 'data' / 'test_traffic.mp4'
+DEFAULT_BASELINE = BENCHMARK_DIR / 'baseline.json'
+
+# Scale of the downscaled detection benchmark
+DETECTION_SCALE = 0.5
+
+# Frame size and tile thread counts of the tiled detection benchmark
+TILING_SIZE = (3840, 2160)
+TILING_WORKERS = (1, 2, 4)
+
+# Extra regression allowed for tail latencies, in percent. With the
+# default 50 iterations p99 is close to the slowest single call, which
+# mostly measures scheduler noise.
+TAIL_TOLERANCE = {95: 30.0, 99: 100.0}
+
+def _metric(
+    value: float,
+    unit: str,
+    higher_is_better: bool,
+    tolerance: Optional[float] = None,
+    min_cores: Optional[int] = None
+) -> Dict:
+    """Build a metric entry, optionally with its own allowed regression in
+    percent and the number of cores it needs to be meaningful."""
+    metric = {'value': round(float(value), 4), 'unit': unit, 'higher_is_better': higher_is_better}
+    if tolerance is not None:
+        metric['tolerance'] = tolerance
+    if min_cores is not None:
+        metric['min_cores'] = min_cores
+    return metric
+
+def _time_calls(func: Callable[[], object], iterations: int, warmup: int = 3) -> np.ndarray:
+    """Time repeated calls of a function in milliseconds."""
+    for _ in range(warmup):
+        func()
+    timings = np.empty(iterations, dtype=np.float64)
+    for index in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings[index] = (time.perf_counter() - start) * 1000.0
+    return timings
+
+def _percentiles(name: str, timings: np.ndarray) -> Dict[str, Dict]:
+    """Build p50, p95 and p99 latency metrics."""
+    return {
+        f'{name}_p{q}_ms': _metric(np.percentile(timings, q), 'ms', False, TAIL_TOLERANCE.get(q))
+        for q in (50, 95, 99)
+    }
+
+def _simulated_monitor() -> TrafficMonitor:
+    """Create a traffic monitor reading from the simulated camera."""
+    monitor = TrafficMonitor()
+    monitor.camera = CameraManager('simulation')
+    monitor.camera.start()
+    return monitor
+
+def bench_detection(iterations: int) -> Dict[str, Dict]:
+    """Measure CarDetector.detect_vehicles throughput on the sample image."""
+    image = cv2.imread(str(IMAGE_PATH))
+    if image is None:
+        logging.warning(f"Sample image not found at {IMAGE_PATH}, skipping detection benchmark")
+        return {}
+    detector = CarDetector()
+    timings = _time_calls(lambda: detector.detect_vehicles(image), iterations)
+    return {'detect_vehicles_fps': _metric(1000.0 / timings.mean(), 'fps', True)}
+
+def detection_agreement(reference: np.ndarray, candidate: np.ndarray, iou_threshold: float = 0.5) -> Dict[str, float]:
+    """
+    Compare candidate detections against reference detections.
+
+    Args:
+        reference: Detections treated as ground truth
+        candidate: Detections to evaluate
+        iou_threshold: Minimum IoU for two boxes to match
+
+    Returns:
+        Dictionary with recall and precision of the candidate detections
+    """
+    if len(reference) == 0 or len(candidate) == 0:
+        recall = 1.0 if len(reference) == 0 else 0.0
+        precision = 1.0 if len(candidate) == 0 else 0.0
+        return {'recall': recall, 'precision': precision}
+    matches = iou_matrix(reference, candidate) >= iou_threshold
+    return {
+        'recall': float(matches.any(axis=1).mean()),
+        'precision': float(matches.any(axis=0).mean())
+    }
+
+def bench_detection_scale(iterations: int) -> Dict[str, Dict]:
+    """Measure the speed and accuracy of downscaled detection on the sample image."""
+    image = cv2.imread(str(IMAGE_PATH))
+    if image is None:
+        logging.warning(f"Sample image not found at {IMAGE_PATH}, skipping detection scale benchmark")
+        return {}
+    reference = CarDetector().detect_vehicles(image)
+    detector = CarDetector(detection_scale=DETECTION_SCALE)
+    timings = _time_calls(lambda: detector.detect_vehicles(image), iterations)
+    agreement = detection_agreement(reference, detector.detect_vehicles(image))
+    return {
+        'detect_scaled_fps': _metric(1000.0 / timings.mean(), 'fps', True),
+        'detect_scaled_recall': _metric(agreement['recall'], 'ratio', True),
+        'detect_scaled_precision': _metric(agreement['precision'], 'ratio', True)
+    }
+
+def bench_lanes(iterations: int) -> Dict[str, Dict]:
+    """Measure lane detection on merged lane crops against one union box pass."""
+    image = cv2.imread(str(IMAGE_PATH))
+    if image is None:
+        logging.warning(f"Sample image not found at {IMAGE_PATH}, skipping lane detection benchmark")
+        return {}
+    frame = cv2.resize(image, (CAMERA_SETTINGS['width'], CAMERA_SETTINGS['height']))
+    detector = CarDetector()
+    prepared = detector.preprocess_frame(frame)
+    x1, y1, x2, y2 = regions_bounding_box(LANES)
+    crops = _time_calls(lambda: detector.detect_vehicles_in_regions(frame, LANES, prepared), iterations)
+    union = _time_calls(lambda: detector.detect_preprocessed(prepared[y1:y2, x1:x2]), iterations)
+    return {
+        'lane_detect_ms': _metric(crops.mean(), 'ms', False),
+        'lane_detect_speedup': _metric(union.mean() / crops.mean(), 'ratio', True)
+    }
+
+def bench_tiling(iterations: int) -> Dict[str, Dict]:
+    """Measure tiled detection of the lanes on a 4K frame per tile thread count."""
+    image = cv2.imread(str(IMAGE_PATH))
+    if image is None:
+        logging.warning(f"Sample image not found at {IMAGE_PATH}, skipping tiling benchmark")
+        return {}
+    frame = cv2.resize(image, TILING_SIZE)
+    lanes = scale_regions(
+        LANES,
+        TILING_SIZE[0] / CAMERA_SETTINGS['width'],
+        TILING_SIZE[1] / CAMERA_SETTINGS['height']
+    )
+
+    # Threads beyond the core count only measure scheduling overhead
+    cores = os.cpu_count() or 1
+    thread_counts = [workers for workers in TILING_WORKERS if workers <= cores]
+    if len(thread_counts) < len(TILING_WORKERS):
+        logging.info(f"Skipping tiled detection with more than {cores} threads on {cores} cores")
+
+    # A 4K detection takes hundreds of milliseconds, so run fewer of them
+    iterations = max(iterations // 10, 3)
+    metrics = {}
+    timings = {}
+    for workers in thread_counts:
+        detector = CarDetector(tile_workers=workers)
+        prepared = detector.preprocess_frame(frame)
+        timings[workers] = _time_calls(
+            lambda: detector.detect_vehicles_tiled(frame, prepared=prepared, regions=lanes),
+            iterations,
+            warmup=1
+        ).mean()
+        detector.close()
+        metrics[f'tiled_detect_{workers}_workers_ms'] = _metric(timings[workers], 'ms', False, min_cores=workers)
+    most = thread_counts[-1]
+    if most > 1:
+        metrics[f'tiled_speedup_{most}_workers'] = _metric(timings[1] / timings[most], 'ratio', True, min_cores=most)
+    return metrics
+
+def bench_process_frame(iterations: int) -> Dict[str, Dict]:
+    """Measure TrafficMonitor.process_frame latency on the simulated camera."""
+    monitor = _simulated_monitor()
+    metrics = _percentiles('process_frame', _time_calls(monitor.process_frame, iterations))
+
+    # Detection on every frame, the worst case of the detection stage
+    monitor.frame_interval = 0.0
+    metrics.update(_percentiles('process_frame_detect', _time_calls(monitor.process_frame, iterations)))
+    monitor.stop()
+    return metrics
+
+def bench_encode(iterations: int) -> Dict[str, Dict]:
+    """Measure the cost of encoding one annotated frame for the MJPEG feed."""
+    monitor = _simulated_monitor()
+    frame, _ = monitor.process_frame()
+    monitor.stop()
+    timings = _time_calls(lambda: cv2.imencode('.jpg', frame), iterations)
+    return {'mjpeg_encode_ms': _metric(timings.mean(), 'ms', False)}
+
+def bench_video(iterations: int) -> Dict[str, Dict]:
+    """Measure decode plus lane detection throughput on the sample video."""
+    try:
+        replay = ReplaySource(str(VIDEO_PATH), speed=0)
+    except ValueError:
+        logging.warning(f"Sample video could not be opened at {VIDEO_PATH}, skipping video benchmark")
+        return {}
+
+    monitor = TrafficMonitor()
+    detector = monitor.car_detector
+    frames = 0
+    start = time.perf_counter()
+    try:
+        while frames < iterations:
+            result = replay.read()
+            if result is None:
+                break
+            detector.detect_vehicles_in_regions(result[0], monitor.lanes)
+            frames += 1
+    finally:
+        replay.release()
+    if frames == 0:
+        return {}
+    return {'video_detect_fps': _metric(frames / (time.perf_counter() - start), 'fps', True)}
+
+BENCHMARKS = {
+    'detection': bench_detection,
+    'detection_scale': bench_detection_scale,
+    'lanes': bench_lanes,
+    'tiling': bench_tiling,
+    'process_frame': bench_process_frame,
+    'encode': bench_encode,
+    'video': bench_video
+}
+
+def run_benchmarks(
+    iterations: int,
+    selected: Optional[List[str]] = None,
+    repeat: int = 1,
+    worst: bool = False
+) -> Dict[str, Dict]:
+    """
+    Run the selected benchmarks.
+
+    Args:
+        iterations: Timed iterations per benchmark
+        selected: Benchmark names to run, all if None
+        repeat: Runs of each benchmark, each metric reports the median
+            over the runs to damp scheduling noise
+        worst: Report each metric's worst run instead of the median, for
+            a baseline that normal run to run noise does not cross
+
+    Returns:
+        Dictionary mapping metric names to metric entries, each tagged
+        with the benchmark that produced it
+    """
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if selected and name not in selected:
+            continue
+        runs = [bench(iterations) for _ in range(max(repeat, 1))]
+        for metric_name, metric in runs[0].items():
+            values = [run[metric_name]['value'] for run in runs if metric_name in run]
+            if not worst:
+                value = np.median(values)
+            elif metric['higher_is_better']:
+                value = min(values)
+            else:
+                value = max(values)
+            metric['value'] = round(float(value), 4)
+            metric['benchmark'] = name
+            results[metric_name] = metric
+    return results
+
+def compare_to_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict], max_regression: float) -> List[str]:
+    """
+    Find metrics that regressed past the allowed percentage.
+
+    Baseline metrics missing from the results count as regressions, since
+    a benchmark that stopped producing a metric cannot be checked, unless
+    they need more cores than this machine has. Metrics new in the results
+    are not checked until the baseline is updated. A metric's own
+    'tolerance' raises the allowed regression for it.
+
+    Args:
+        results: Metrics of the current run
+        baseline: Metrics of the baseline run
+        max_regression: Allowed regression in percent
+
+    Returns:
+        List of human readable regression messages, empty if none
+    """
+    cores = os.cpu_count() or 1
+    regressions = []
+    for name, reference in baseline.items():
+        if name in results:
+            continue
+        if reference.get('min_cores', 1) > cores:
+            logging.info(f"Skipping {name}, it needs {reference['min_cores']} cores")
+            continue
+        regressions.append(f"{name}: missing from this run, baseline {reference['value']} {reference['unit']}")
+    for name, metric in results.items():
+        reference = baseline.get(name)
+        if reference is None or not reference['value']:
+            continue
+        change = (metric['value'] - reference['value']) / reference['value'] * 100.0
+        regression = -change if metric['higher_is_better'] else change
+        if regression > max(max_regression, reference.get('tolerance', 0.0)):
+            regressions.append(
+                f"{name}: {metric['value']} {metric['unit']} vs baseline "
+                f"{reference['value']} {reference['unit']} ({regression:.1f}% worse)"
+            )
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Run performance benchmarks.")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="Baseline JSON file")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Write the results as the new baseline, keeping other benchmarks' metrics with --only")
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help="Allowed regression per metric in percent")
+    parser.add_argument('--iterations', type=int, default=50, help="Timed iterations per benchmark")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Runs per benchmark, metrics report the median, or the worst run for a new baseline")
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Benchmarks to run")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.iterations, args.only, args.repeat, worst=args.update_baseline)
+    print(json.dumps(results, indent=4))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        # Only replace the metrics of the benchmarks that ran
+        baseline = {}
+        if args.only and baseline_path.exists():
+            with open(baseline_path, 'r') as f:
+                baseline = {
+                    name: metric for name, metric in json.load(f).items()
+                    if metric.get('benchmark') not in args.only
+                }
+        baseline.update(results)
+        with open(baseline_path, 'w') as f:
+            json.dump(baseline, f, indent=4)
+        print(f"Baseline written to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}, run with --update-baseline first")
+        return 1
+
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    if args.only:
+        baseline = {name: metric for name, metric in baseline.items() if metric.get('benchmark') in args.only}
+    regressions = compare_to_baseline(results, baseline, args.max_regression)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
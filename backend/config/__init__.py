@@ -6,6 +6,7 @@ from .settings import (
     SIGNAL_SETTINGS,
     DETECTION_SETTINGS,
     WEB_SETTINGS,
+    PIPELINE_SETTINGS,
     EMERGENCY_SETTINGS,
     ANALYTICS_SETTINGS,
     LOGGING_CONFIG,
@@ -23,7 +23,24 @@ CAMERA_SETTINGS = {
     'source': 0,  # Use default camera
     'width': 1280,
     'height': 720,
-    'fps': 30
+    'fps': 30,
+    'native_resolution': True,  # keep the size the device delivers and scale LANES to it
+    'threaded': False,  # decode on a background thread into a ring buffer
+    'buffer_size': 3,  # ring buffer slots for threaded capture
+    'decode_workers': None,  # shared decode threads of a MultiCameraManager, one per CPU if None
+    'replay': {
+        'speed': 1.0,  # playback speed of video file sources, 0 for as fast as possible
+        'frame_step': 1,  # use every n-th frame, skipped frames are not decoded
+        'loop': False,  # restart at the end of the file
+        'start': 0.0  # media time in seconds to start at
+    },
+    'recording': {
+        'segment_frames': 300  # frames per memory-mapped segment file
+    },
+    'simulation': {
+        'vehicles': 3,  # moving vehicles in the simulated feed
+        'lanes': 12  # lanes separated by lane markings
+    }
 }
 
 # Lane configuration
@@ -45,7 +62,44 @@ SIGNAL_SETTINGS = {
 DETECTION_SETTINGS = {
     'model_path': str(PROJECT_ROOT / 'src' / 'vehicle_detection' / 'models' / 'haarcascade_car.xml'),
     'confidence_threshold': 0.5,
-    'frame_interval': 1.0  # seconds between detection updates
+    'detection_scale': 1.0,  # shrink factor for detection, 0.5 runs the cascade at half resolution
+    'backend': 'haar',  # 'haar' for the cascade in model_path, 'onnx' for the cv2.dnn engine
+    'onnx': {
+        'model_path': str(PROJECT_ROOT / 'data' / 'models' / 'yolov8n.onnx'),
+        'input_size': 640,  # square network input size in pixels
+        'nms_threshold': 0.45  # IoU threshold for non-maximum suppression
+    },
+    'frame_interval': 1.0,  # seconds between detection updates
+    'mode': 'interval',  # 'interval' detects every frame_interval, 'tracking' tracks every frame
+    'tracking': {
+        'detect_every': 5,  # frames between detection passes
+        'iou_threshold': 0.3,  # minimum IoU to match a detection to a track
+        'max_misses': 2,  # detection passes a track may go unmatched
+        'min_hits': 2  # matches before a track is counted
+    },
+    'lane_profiles': {
+        'enabled': False,  # search each lane only for the vehicle sizes it can hold
+        'min_size_ratio': 0.25,  # smallest vehicle relative to the lane's short side
+        'max_size_ratio': 1.2,  # largest vehicle relative to the lane's short side
+        'lanes': {}  # per-lane profile overrides, e.g. from calibrate_lane_profiles
+    },
+    'tiling': {
+        'enabled': False,  # detect large frames as overlapping tiles on a thread pool
+        'tile_size': 640,  # tile side length in pixels
+        'overlap': 160,  # overlap between tiles, at least the largest vehicle size
+        'workers': None  # detection threads, one per CPU if None
+    },
+    'workers': {
+        'processes': 0,  # detection processes reading frames from shared memory, 0 detects in process
+        'ring_slots': 8  # shared memory frame slots, more than twice the processes
+    },
+    'motion_gate': {
+        'enabled': False,  # skip detection on lanes without movement
+        'method': 'difference',  # 'difference' or 'mog2'
+        'threshold': 0.01,  # ratio of changed pixels that counts as movement
+        'pixel_delta': 25,  # intensity change that marks a pixel as changed
+        'downscale': 4  # shrink factor applied before comparing frames
+    }
 }
 
 # Web interface settings
@@ -54,7 +108,35 @@ WEB_SETTINGS = {
     'port': 5000,
     'debug': False,
     'secret_key': 'your-secret-key-here',
-    'fps': 30  # frames per second for web streaming
+    'fps': 30,  # frames per second for web streaming
+    'intersection_id': 'main',  # name clients subscribe to for this intersection's updates
+    'updates': {
+        'max_rate': 5.0,  # most state messages per second sent to a client
+        'resync_timeout': 5.0,  # seconds without an acknowledgement before a full resync
+        'stall_timeout': 30.0  # seconds without an acknowledgement before disconnecting
+    },
+    'video': {
+        'jpeg_quality': None,  # default JPEG quality, OpenCV's default if None
+        'queue_depth': 2,  # encoded frames queued per video client, oldest dropped first
+        'stall_timeout': 10.0,  # seconds a video client may take no frame before it is dropped
+        'min_quality': 30,  # lowest quality a client that cannot keep up is lowered to
+        'quality_step': 10,  # quality change per adaptation
+        'recover_frames': 30,  # frames without backlog before quality is raised again
+        'width_step': 32  # requested widths are rounded to this many pixels
+    }
+}
+
+# Processing pipeline settings
+PIPELINE_SETTINGS = {
+    'target_fps': 30,  # rate the capture stage runs at
+    'stages': {
+        # queue_size bounds the items waiting for a stage; drop_policy is
+        # 'block', 'drop_oldest' or 'drop_newest' when the queue is full
+        'detect': {'queue_size': 2, 'drop_policy': 'drop_oldest'},
+        'annotate': {'queue_size': 2, 'drop_policy': 'drop_oldest'},
+        'encode': {'queue_size': 2, 'drop_policy': 'drop_oldest'},
+        'emit': {'queue_size': 1, 'drop_policy': 'drop_oldest'}
+    }
 }
 
 # Emergency vehicle settings
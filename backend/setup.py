@@ -35,6 +35,7 @@ setup(
     entry_points={
         "console_scripts": [
             "smart-traffic=src.main:main",
+            "smart-traffic-analyze=src.offline_analysis:main",
         ],
     },
     include_package_data=True,
@@ -2,10 +2,11 @@
 
 import cv2
 import numpy as np
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 import logging
 import os
 import sys
+import time
 
 # Add the project root to Python path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -13,34 +14,123 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from config.settings import CAMERA_SETTINGS
+from src.camera.frame_grabber import FrameGrabber
+from src.camera.shared_frames import SharedFrameRing
+from src.camera.replay import ReplaySource
+from src.camera.recording import FrameRecorder, RecordingSource, is_recording
+from src.camera.simulation import SimulatedSource
+from src.vehicle_detection.boxes import scale_regions
 
 class CameraManager:
     """Class for managing camera input."""
 
-    def __init__(self, source: str = 'simulation'):
+    def __init__(
+        self,
+        source: str = 'simulation',
+        threaded: Optional[bool] = None,
+        buffer_size: Optional[int] = None,
+        shared_memory_slots: Optional[int] = None
+    ):
         """Initialize the camera manager.
 
         Args:
-            source: Camera source ('simulation' or camera index/path)
+            source: Camera source ('simulation', camera index, video file
+                or FrameRecorder directory)
+            threaded: Capture on a background thread, defaults to CAMERA_SETTINGS['threaded']
+            buffer_size: Ring buffer slots for threaded capture
+            shared_memory_slots: Create a shared memory ring with this many
+                slots on start, for publish_frame()
         """
         self.source = source
         self.frame_width = CAMERA_SETTINGS['width']
         self.frame_height = CAMERA_SETTINGS['height']
+        self.native_resolution = CAMERA_SETTINGS.get('native_resolution', True)
+        self.frame_buffers = 0
+        self._buffers = []
+        self._buffer_index = 0
+        self._direct = True
         self.fps = CAMERA_SETTINGS['fps']
+        self.threaded = CAMERA_SETTINGS.get('threaded', False) if threaded is None else threaded
+        self.buffer_size = buffer_size or CAMERA_SETTINGS.get('buffer_size', 3)
         self.camera = None
+        self.grabber = None
+        self._raw_frame = None
+        self.simulation = None
+        self.replay = None
+        self.recording = None
+        self.recorder = None
+        self.shared_memory_slots = shared_memory_slots
+        self.shared_ring = None
         self.frame_count = 0
         self.logger = logging.getLogger(__name__)
 
+    @property
+    def frame_shape(self) -> Tuple[int, ...]:
+        """Shape of the frames returned, without channels for gray recordings."""
+        if self.recording is not None and self.recording.grayscale:
+            return (self.frame_height, self.frame_width)
+        return (self.frame_height, self.frame_width, 3)
+
     def start(self) -> bool:
         """Start the camera.
 
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            if not self._open_source():
+                return False
+        except Exception as e:
+            self.logger.error(f"Error starting camera: {e}")
+            return False
+
+        if self.shared_memory_slots and self.shared_ring is None:
+            self.shared_ring = SharedFrameRing(self.frame_shape, slots=self.shared_memory_slots)
+
+        if self.threaded and self.source != 'simulation':
+            self.grabber = FrameGrabber(
+                self._read_into,
+                self.frame_shape,
+                self.buffer_size,
+                clock=self._frame_time
+            )
+            self.grabber.start()
+        return True
+
+    def _open_source(self) -> bool:
+        """Open the configured source.
+
         Returns:
             bool: True if successful, False otherwise
         """
         if self.source == 'simulation':
             return True
 
-        try:
+        settings = CAMERA_SETTINGS.get('replay', {})
+        if is_recording(self.source):
+            # Raw recordings replay from memory maps without decoding
+            self.recording = RecordingSource(
+                self.source,
+                speed=settings.get('speed', 1.0),
+                loop=settings.get('loop', False)
+            )
+            self.recording.seek(settings.get('start', 0.0))
+            height, width = self.recording.frame_shape[:2]
+            self._negotiate(width, height)
+        elif isinstance(self.source, str) and os.path.isfile(self.source):
+            # Video files are replayed against their media time
+            self.replay = ReplaySource(
+                self.source,
+                speed=settings.get('speed', 1.0),
+                frame_step=settings.get('frame_step', 1),
+                loop=settings.get('loop', False),
+                start=settings.get('start', 0.0)
+            )
+            self._negotiate(
+                int(self.replay.capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(self.replay.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            )
+        else:
             self.camera = cv2.VideoCapture(self.source)
             if not self.camera.isOpened():
                 self.logger.error("Failed to open camera")
@@ -49,60 +139,286 @@ class CameraManager:
             self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
             self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
             self.camera.set(cv2.CAP_PROP_FPS, self.fps)
-            return True
-        except Exception as e:
-            self.logger.error(f"Error starting camera: {e}")
-            return False
+
+            # Devices often ignore the requested size, so ask what they deliver
+            self._negotiate(
+                int(self.camera.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            )
+        return True
+
+    def _negotiate(self, width: int, height: int):
+        """Settle the frame size once the source reports its native size.
+
+        With native_resolution the native size is kept and frames are never
+        resized; regions are scaled with scale_regions() instead. Otherwise
+        frames are resized into the caller's buffer.
+
+        Args:
+            width: Native frame width, 0 if unknown
+            height: Native frame height, 0 if unknown
+        """
+        if width <= 0 or height <= 0:
+            return
+        if self.native_resolution:
+            if (width, height) != (self.frame_width, self.frame_height):
+                self.logger.info(f"Using native resolution {width}x{height} of camera {self.source}")
+            self.frame_width, self.frame_height = width, height
+        self._direct = (width, height) == (self.frame_width, self.frame_height)
+
+    def scale_regions(self, regions: Dict[str, Tuple[int, int, int, int]]) -> Dict[str, Tuple[int, int, int, int]]:
+        """Map regions defined for the configured size to the actual frame size.
+
+        Args:
+            regions: Dictionary mapping names to (x1, y1, x2, y2) in
+                CAMERA_SETTINGS width and height coordinates
+
+        Returns:
+            Dictionary of regions in frame coordinates
+        """
+        scale_x = self.frame_width / CAMERA_SETTINGS['width']
+        scale_y = self.frame_height / CAMERA_SETTINGS['height']
+        if scale_x == 1 and scale_y == 1:
+            return dict(regions)
+        return scale_regions(regions, scale_x, scale_y)
+
+    def set_frame_buffers(self, count: int):
+        """Hand out frames from a ring of reused buffers.
+
+        get_frame() without ``out`` then allocates nothing, and each frame
+        stays valid until ``count`` further frames have been read. The count
+        must exceed the number of frames a caller holds at once.
+
+        Args:
+            count: Number of buffers, 0 to allocate a new frame every time
+        """
+        self.frame_buffers = max(int(count), 0)
+        self._buffers = []
+
+    def next_buffer(self) -> Optional[np.ndarray]:
+        """Get the next reused frame buffer, or None without a buffer ring."""
+        if not self.frame_buffers:
+            return None
+        shape = self.frame_shape
+        if len(self._buffers) != self.frame_buffers or self._buffers[0].shape != shape:
+            self._buffers = [np.empty(shape, dtype=np.uint8) for _ in range(self.frame_buffers)]
+        buffer = self._buffers[self._buffer_index % self.frame_buffers]
+        self._buffer_index += 1
+        return buffer
 
     def stop(self):
         """Stop the camera."""
+        if self.grabber is not None:
+            self.grabber.stop()
+            self.grabber = None
         if self.camera is not None:
             self.camera.release()
             self.camera = None
+        if self.replay is not None:
+            self.replay.release()
+            self.replay = None
+        if self.recording is not None:
+            self.recording.release()
+            self.recording = None
+        self.stop_recording()
+        if self.shared_ring is not None:
+            self.shared_ring.close()
+            self.shared_ring = None
+
+    def publish_frame(self) -> Optional[Tuple[int, int, float]]:
+        """Read the next frame directly into the shared memory ring.
+
+        Other processes attached to shared_ring can then use the frame
+        without it being copied or pickled.
+
+        Returns:
+            Tuple of ring slot, sequence number and capture timestamp, or
+            None if capture fails
+        """
+        if self.shared_ring is None:
+            raise RuntimeError("Shared memory is not enabled for this camera")
 
-    def get_frame(self) -> Optional[np.ndarray]:
+        slot, seq, view = self.shared_ring.begin_write()
+        result = self.get_frame_with_timestamp(out=view)
+        if result is None:
+            return None
+        self.shared_ring.commit(slot, seq)
+        return slot, seq, result[1]
+
+    def start_recording(self, directory: str, grayscale: bool = False, segment_frames: Optional[int] = None) -> FrameRecorder:
+        """Record every frame returned from now on.
+
+        Args:
+            directory: Output directory for the recording
+            grayscale: Store frames as grayscale
+            segment_frames: Frames per segment file, CAMERA_SETTINGS['recording'] by default
+
+        Returns:
+            The frame recorder
+        """
+        self.stop_recording()
+        settings = CAMERA_SETTINGS.get('recording', {})
+        self.recorder = FrameRecorder(
+            directory,
+            (self.frame_height, self.frame_width),
+            segment_frames=segment_frames or settings.get('segment_frames', 300),
+            grayscale=grayscale
+        )
+        return self.recorder
+
+    def stop_recording(self):
+        """Finish the current recording, if any."""
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def get_frame(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
         """Get a frame from the camera.
 
+        Args:
+            out: Optional preallocated buffer of the configured frame size to
+                read into, avoiding a per-frame allocation
+
         Returns:
             Frame as numpy array, or None if capture fails
         """
+        result = self.get_frame_with_timestamp(out)
+        return None if result is None else result[0]
+
+    def get_frame_with_timestamp(self, out: Optional[np.ndarray] = None) -> Optional[Tuple[np.ndarray, float]]:
+        """Get a frame from the camera together with its capture time.
+
+        With threaded capture this returns the newest frame from the ring
+        buffer instead of decoding on the calling thread.
+
+        Args:
+            out: Optional preallocated buffer of the configured frame size
+
+        Returns:
+            Tuple of frame and capture timestamp, or None if capture fails.
+            Replayed files report the media timestamp instead.
+        """
+        result = self._capture(out)
+        if result is not None and self.recorder is not None:
+            self.recorder.write(*result)
+        return result
+
+    def _capture(self, out: Optional[np.ndarray] = None) -> Optional[Tuple[np.ndarray, float]]:
+        """Read the next frame and its timestamp from the active source."""
+        if out is None:
+            out = self.next_buffer()
+
         if self.source == 'simulation':
-            return self._get_simulated_frame()
+            return self._get_simulated_frame(out), time.time()
+
+        if self.grabber is not None:
+            return self.grabber.read(out=out, timeout=1.0)
 
-        if self.camera is None or not self.camera.isOpened():
+        if self.replay is None and self.recording is None and (self.camera is None or not self.camera.isOpened()):
             return None
 
-        ret, frame = self.camera.read()
-        if not ret:
+        frame = out if out is not None else np.empty(self.frame_shape, dtype=np.uint8)
+        if not self._read_into(frame):
             self.logger.error("Failed to read frame")
             return None
 
-        # Resize frame if needed
-        if frame.shape[1] != self.frame_width or frame.shape[0] != self.frame_height:
-            frame = cv2.resize(frame, (self.frame_width, self.frame_height))
+        return frame, self._frame_time()
 
-        return frame
+    def _frame_time(self) -> float:
+        """Timestamp of the frame just read, media time when replaying."""
+        if self.replay is not None:
+            return self.replay.media_time
+        if self.recording is not None:
+            return self.recording.media_time
+        return time.time()
 
-    def _get_simulated_frame(self) -> np.ndarray:
-        """Generate a simulated frame for testing.
+    def _read_into(self, out: np.ndarray) -> bool:
+        """Read the next frame from the device into a buffer.
+
+        Args:
+            out: Destination buffer of the configured frame size
 
         Returns:
-            Simulated frame as numpy array
+            bool: True if a frame was read, False otherwise
         """
-        # Create a black frame
-        frame = np.zeros((self.frame_height, self.frame_width, 3), dtype=np.uint8)
+        # At the negotiated size frames decode straight into the destination
+        target = out if self._direct else self._raw_frame
+        if self.recording is not None:
+            # A zero-copy view into the memory-mapped recording
+            result = self.recording.read()
+            if result is None:
+                return False
+            frame = result[0]
+        elif self.replay is not None:
+            result = self.replay.read(target)
+            if result is None:
+                return False
+            frame = result[0]
+        elif self.camera is not None:
+            ret, frame = self.camera.read(target)
+            if not ret:
+                return False
+        else:
+            return False
 
-        # Draw some moving "vehicles"
-        self.frame_count += 1
-        y = (self.frame_count % 100) + 200
+        if frame is out:
+            return True
+        if frame.shape[:2] == out.shape[:2]:
+            np.copyto(out, frame)
+            return True
 
-        # Draw rectangles representing vehicles
-        cv2.rectangle(frame, (100, y), (150, y+40), (0, 255, 0), -1)  # Green vehicle
-        cv2.rectangle(frame, (300, 480-y), (350, 520-y), (0, 0, 255), -1)  # Red vehicle
-        cv2.rectangle(frame, (500, y-100), (550, y-60), (255, 0, 0), -1)  # Blue vehicle
+        # The source does not deliver the negotiated size, resize into the
+        # destination and keep decoding into the reused raw buffer
+        if self._direct and self.recording is None:
+            self.logger.warning(f"Camera {self.source} delivers {frame.shape[1]}x{frame.shape[0]}, resizing frames")
+            self._direct = False
+        if self.recording is None:
+            self._raw_frame = frame
+        cv2.resize(frame, (self.frame_width, self.frame_height), dst=out)
+        return True
 
-        # Draw lane markings
-        for x in range(0, self.frame_width, 100):
-            cv2.line(frame, (x, 0), (x, self.frame_height), (255, 255, 255), 2)
+    def get_stats(self) -> dict:
+        """Get capture statistics.
 
-        return frame 
\ No newline at end of file
+        Returns:
+            Dictionary with captured and dropped frame counts for threaded
+            capture and the replay position for video files and recordings
+        """
+        stats = {} if self.grabber is None else self.grabber.get_stats()
+        if self.replay is not None:
+            stats.update({
+                'media_time': self.replay.media_time,
+                'frames_read': self.replay.frames_read,
+                'frames_skipped': self.replay.frames_skipped
+            })
+        if self.recording is not None:
+            stats.update({
+                'media_time': self.recording.media_time,
+                'frames_read': self.recording.frames_read
+            })
+        if self.recorder is not None:
+            stats['recorded'] = self.recorder.frames
+        return stats
+
+    def _get_simulated_frame(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Generate a simulated frame for testing.
+
+        Args:
+            out: Optional buffer to render into
+
+        Returns:
+            Simulated frame as numpy array, owned by the caller
+        """
+        if self.simulation is None:
+            settings = CAMERA_SETTINGS.get('simulation', {})
+            self.simulation = SimulatedSource(
+                self.frame_width,
+                self.frame_height,
+                num_vehicles=settings.get('vehicles', 3),
+                num_lanes=settings.get('lanes', 12)
+            )
+
+        self.frame_count += 1
+        if out is None:
+            return self.simulation.read().copy()
+        return self.simulation.read(out)
@@ -0,0 +1,127 @@
+"""Background frame capture module."""
+
+import numpy as np
+from typing import Callable, Dict, Optional, Tuple
+import logging
+import threading
+import time
+
+class FrameGrabber:
+    """Reads frames continuously into a preallocated ring buffer.
+
+    A single capture thread decodes into the ring while consumers always
+    receive the newest frame. Frames overwritten before anyone read them
+    are counted as dropped.
+    """
+
+    def __init__(
+        self,
+        read_frame: Callable[[np.ndarray], bool],
+        frame_shape: Tuple[int, ...],
+        buffer_size: int = 3,
+        clock: Optional[Callable[[], float]] = None
+    ):
+        """Initialize the frame grabber.
+
+        Args:
+            read_frame: Function filling the given buffer with the next frame,
+                returning False when capture fails
+            frame_shape: Shape of every frame, e.g. (height, width, 3)
+            buffer_size: Number of ring buffer slots, at least 2
+            clock: Function returning the timestamp of the frame just read,
+                the wall clock time by default
+        """
+        self.read_frame = read_frame
+        self.clock = clock or time.time
+        self.buffer_size = max(int(buffer_size), 2)
+        self.frames = np.empty((self.buffer_size,) + tuple(frame_shape), dtype=np.uint8)
+        self.timestamps = np.zeros(self.buffer_size, dtype=np.float64)
+
+        self.latest_slot = -1
+        self.latest_seq = 0
+        self.consumed_seq = 0
+        self.captured = 0
+        self.dropped = 0
+        self.failures = 0
+
+        self.running = False
+        self.capture_thread = None
+        self.condition = threading.Condition()
+        self.logger = logging.getLogger(__name__)
+
+    def start(self):
+        """Start the capture thread."""
+        self.running = True
+        self.capture_thread = threading.Thread(target=self._capture_loop)
+        self.capture_thread.daemon = True
+        self.capture_thread.start()
+
+    def stop(self):
+        """Stop the capture thread."""
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.capture_thread:
+            self.capture_thread.join()
+            self.capture_thread = None
+
+    def _capture_loop(self):
+        """Capture frames until stopped."""
+        while self.running:
+            # Never decode into the slot consumers may be reading
+            slot = (self.latest_slot + 1) % self.buffer_size
+            if not self.read_frame(self.frames[slot]):
+                self.failures += 1
+                time.sleep(0.01)
+                continue
+            timestamp = self.clock()
+
+            with self.condition:
+                self.timestamps[slot] = timestamp
+                self.latest_slot = slot
+                self.latest_seq += 1
+                self.captured += 1
+                self.condition.notify_all()
+
+    def read(self, out: Optional[np.ndarray] = None, timeout: float = 1.0) -> Optional[Tuple[np.ndarray, float]]:
+        """Get the newest frame that has not been handed out yet.
+
+        Args:
+            out: Optional buffer to copy the frame into
+            timeout: Seconds to wait for a new frame
+
+        Returns:
+            Tuple of frame and capture timestamp, or None on timeout
+        """
+        with self.condition:
+            if not self.condition.wait_for(
+                lambda: self.latest_seq > self.consumed_seq or not self.running,
+                timeout
+            ):
+                return None
+            if self.latest_seq <= self.consumed_seq:
+                return None
+
+            self.dropped += self.latest_seq - self.consumed_seq - 1
+            self.consumed_seq = self.latest_seq
+
+            # Copy while holding the lock so the slot cannot be republished
+            source = self.frames[self.latest_slot]
+            if out is None:
+                frame = source.copy()
+            else:
+                np.copyto(out, source)
+                frame = out
+            return frame, float(self.timestamps[self.latest_slot])
+
+    def get_stats(self) -> Dict:
+        """Get capture statistics.
+
+        Returns:
+            Dictionary with captured, dropped and failed frame counts
+        """
+        return {
+            'captured': self.captured,
+            'dropped': self.dropped,
+            'failures': self.failures
+        }
@@ -0,0 +1,321 @@
+"""Multi-source camera management module."""
+
+import heapq
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple, Union
+import logging
+import os
+import threading
+import time
+
+from config.settings import CAMERA_SETTINGS
+from src.camera.camera_manager import CameraManager
+
+class _SourceState:
+    """Buffers and counters of one source."""
+
+    def __init__(self, name: str, camera: CameraManager, fps: float):
+        self.name = name
+        self.camera = camera
+        self.interval = 1.0 / fps if fps else 0.0
+        self.frames = None
+        self.timestamps = np.zeros(2, dtype=np.float64)
+        self.latest_slot = -1
+        self.latest_seq = 0
+        self.consumed_seq = 0
+        self.decoded = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.failures = 0
+
+class MultiCameraManager:
+    """Decodes many camera sources on one bounded worker pool.
+
+    A single scheduler thread submits a decode for every source whose next
+    frame is due, with at most one decode in flight per source. Decoded
+    frames land in a per-source double buffer. Detection pulls them through
+    next_frame(), which serves the sources round-robin and drives a
+    MultiSourceMonitor. A CameraManager compatible handle per source also
+    lets a TrafficMonitor on its own thread read one source.
+    """
+
+    def __init__(self, sources: Dict[str, Union[str, int, Dict]], decode_workers: Optional[int] = None):
+        """Initialize the multi-camera manager.
+
+        Args:
+            sources: Dictionary mapping source names to a camera source
+                ('simulation', a device index or a file path) or to a
+                dictionary with 'source' and an optional 'fps'
+            decode_workers: Decode threads shared by all sources, defaults to
+                CAMERA_SETTINGS['decode_workers'] or one per CPU up to the
+                number of sources
+        """
+        if not sources:
+            raise ValueError("At least one camera source is required")
+
+        self.sources = {}
+        for name, spec in sources.items():
+            if not isinstance(spec, dict):
+                spec = {'source': spec}
+            camera = CameraManager(spec['source'], threaded=False)
+            self.sources[name] = _SourceState(name, camera, spec.get('fps', camera.fps))
+        self.names = list(self.sources)
+
+        self.decode_workers = (
+            decode_workers
+            or CAMERA_SETTINGS.get('decode_workers')
+            or min(os.cpu_count() or 1, len(self.sources))
+        )
+        self.pool = None
+        self.running = False
+        self.started_at = None
+        self.scheduler_thread = None
+        self.condition = threading.Condition()
+        self._due = []
+        self._next_index = 0
+        self.logger = logging.getLogger(__name__)
+
+    def start(self) -> bool:
+        """Open every source and start decoding.
+
+        Returns:
+            bool: True if all sources opened, False otherwise
+        """
+        for state in self.sources.values():
+            if not state.camera.start():
+                self.logger.error(f"Failed to open camera source {state.name}")
+                self.stop()
+                return False
+            state.frames = np.empty((2,) + state.camera.frame_shape, dtype=np.uint8)
+
+        self.pool = ThreadPoolExecutor(max_workers=self.decode_workers, thread_name_prefix='decode')
+        now = time.time()
+        self._due = [(now, index) for index in range(len(self.names))]
+        heapq.heapify(self._due)
+        self.started_at = now
+        self.running = True
+        self.scheduler_thread = threading.Thread(target=self._schedule_loop)
+        self.scheduler_thread.daemon = True
+        self.scheduler_thread.start()
+        return True
+
+    def stop(self):
+        """Stop decoding and release every source."""
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.scheduler_thread is not None:
+            self.scheduler_thread.join()
+            self.scheduler_thread = None
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+        for state in self.sources.values():
+            state.camera.stop()
+
+    def _schedule_loop(self):
+        """Submit decodes as sources become due."""
+        with self.condition:
+            while self.running:
+                now = time.time()
+                while self._due and self._due[0][0] <= now:
+                    _, index = heapq.heappop(self._due)
+                    self.pool.submit(self._decode, index)
+
+                timeout = self._due[0][0] - now if self._due else None
+                self.condition.wait(timeout)
+
+    def _decode(self, index: int):
+        """Decode the next frame of a source into its free buffer slot."""
+        state = self.sources[self.names[index]]
+        slot = 1 if state.latest_slot == 0 else 0
+        try:
+            result = state.camera.get_frame_with_timestamp(out=state.frames[slot])
+        except Exception as e:
+            self.logger.error(f"Error decoding camera source {state.name}: {e}")
+            result = None
+
+        with self.condition:
+            now = time.time()
+            if result is None:
+                state.failures += 1
+                # Back off so a broken source cannot occupy the pool
+                next_due = now + max(state.interval, 0.1)
+            else:
+                state.timestamps[slot] = result[1]
+                state.latest_slot = slot
+                state.latest_seq += 1
+                state.decoded += 1
+                next_due = now + state.interval
+            heapq.heappush(self._due, (next_due, index))
+            self.condition.notify_all()
+
+    def _consume(self, state: _SourceState, out: Optional[np.ndarray]) -> Tuple[np.ndarray, float]:
+        """Hand out the newest frame of a source, holding the lock."""
+        if isinstance(out, dict):
+            out = out.get(state.name)
+        state.dropped += state.latest_seq - state.consumed_seq - 1
+        state.consumed_seq = state.latest_seq
+        state.delivered += 1
+
+        # Copy while holding the lock so the slot cannot be overwritten
+        source = state.frames[state.latest_slot]
+        if out is None:
+            frame = source.copy()
+        else:
+            np.copyto(out, source)
+            frame = out
+        return frame, float(state.timestamps[state.latest_slot])
+
+    def _pick(self) -> Optional[_SourceState]:
+        """Find the next source with a new frame in round-robin order."""
+        count = len(self.names)
+        for offset in range(count):
+            index = (self._next_index + offset) % count
+            state = self.sources[self.names[index]]
+            if state.latest_seq > state.consumed_seq:
+                self._next_index = (index + 1) % count
+                return state
+        return None
+
+    def next_frame(
+        self,
+        out: Optional[Union[np.ndarray, Dict[str, np.ndarray]]] = None,
+        timeout: float = 1.0
+    ) -> Optional[Tuple[str, np.ndarray, float]]:
+        """Get the next new frame of any source.
+
+        Sources are served round-robin, so a fast source cannot starve the
+        others. MultiSourceMonitor feeds its monitors from here.
+
+        Args:
+            out: Optional buffer to copy the frame into, or a dictionary of
+                buffers by source name when the sources differ in size
+            timeout: Seconds to wait for a new frame
+
+        Returns:
+            Tuple of source name, frame and capture timestamp, or None on timeout
+        """
+        with self.condition:
+            state = None
+            deadline = time.time() + timeout
+            while self.running:
+                state = self._pick()
+                remaining = deadline - time.time()
+                if state is not None or remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            if state is None:
+                return None
+            frame, timestamp = self._consume(state, out)
+            return state.name, frame, timestamp
+
+    def get_frame(self, name: str, out: Optional[np.ndarray] = None, timeout: float = 1.0) -> Optional[Tuple[np.ndarray, float]]:
+        """Get the newest frame of one source that has not been handed out yet.
+
+        Args:
+            name: Source name
+            out: Optional buffer to copy the frame into
+            timeout: Seconds to wait for a new frame
+
+        Returns:
+            Tuple of frame and capture timestamp, or None on timeout
+        """
+        state = self.sources[name]
+        with self.condition:
+            if not self.condition.wait_for(
+                lambda: state.latest_seq > state.consumed_seq or not self.running,
+                timeout
+            ):
+                return None
+            if state.latest_seq <= state.consumed_seq:
+                return None
+            return self._consume(state, out)
+
+    def camera(self, name: str) -> 'SourceCamera':
+        """Get a CameraManager compatible handle for one source.
+
+        Args:
+            name: Source name
+
+        Returns:
+            Handle that can be passed to TrafficMonitor
+        """
+        if name not in self.sources:
+            raise KeyError(f"Unknown camera source: {name}")
+        return SourceCamera(self, name)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Get per-source decode statistics.
+
+        Returns:
+            Dictionary mapping source names to decoded, delivered, dropped
+            and failed frame counts and the decode rate in frames per second
+        """
+        elapsed = time.time() - self.started_at if self.started_at else 0.0
+        with self.condition:
+            return {
+                name: {
+                    'decoded': state.decoded,
+                    'delivered': state.delivered,
+                    'dropped': state.dropped,
+                    'failures': state.failures,
+                    'fps': state.decoded / elapsed if elapsed > 0 else 0.0
+                }
+                for name, state in self.sources.items()
+            }
+
+class SourceCamera:
+    """CameraManager compatible view of one source of a MultiCameraManager."""
+
+    def __init__(self, manager: MultiCameraManager, name: str):
+        """Initialize the source handle.
+
+        Args:
+            manager: Manager owning the source
+            name: Source name
+        """
+        self.manager = manager
+        self.name = name
+
+    @property
+    def frame_width(self) -> int:
+        """Frame width negotiated by the source."""
+        return self.manager.sources[self.name].camera.frame_width
+
+    @property
+    def frame_height(self) -> int:
+        """Frame height negotiated by the source."""
+        return self.manager.sources[self.name].camera.frame_height
+
+    def scale_regions(self, regions: Dict[str, Tuple[int, int, int, int]]) -> Dict[str, Tuple[int, int, int, int]]:
+        """Map regions defined for the configured size to the source's frame size."""
+        return self.manager.sources[self.name].camera.scale_regions(regions)
+
+    def start(self) -> bool:
+        """Check that the manager is decoding; its owner starts it."""
+        return self.manager.running
+
+    def stop(self):
+        """Leave the shared manager running; its owner stops it."""
+
+    def get_frame(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Get the newest frame of the source.
+
+        Args:
+            out: Optional buffer to copy the frame into
+
+        Returns:
+            Frame as numpy array, or None if no frame arrived in time
+        """
+        result = self.manager.get_frame(self.name, out)
+        return None if result is None else result[0]
+
+    def get_frame_with_timestamp(self, out: Optional[np.ndarray] = None) -> Optional[Tuple[np.ndarray, float]]:
+        """Get the newest frame of the source together with its capture time."""
+        return self.manager.get_frame(self.name, out)
+
+    def get_stats(self) -> dict:
+        """Get decode statistics of the source."""
+        return self.manager.get_stats()[self.name]
@@ -0,0 +1,234 @@
+"""Raw frame recording and replay module."""
+
+import cv2
+import json
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import logging
+import os
+import time
+
+INDEX_FILE = 'index.json'
+TIMESTAMPS_FILE = 'timestamps.npy'
+
+def is_recording(path) -> bool:
+    """Check whether a path is a directory written by FrameRecorder."""
+    return isinstance(path, str) and os.path.isfile(os.path.join(path, INDEX_FILE))
+
+class FrameRecorder:
+    """Records raw frames into memory-mapped .npy segments.
+
+    Each segment is a preallocated .npy file holding a fixed number of
+    frames, written through a memory map. An index.json file lists the
+    segments and their frame counts, and timestamps.npy holds the timestamp
+    of every frame. Frames can be stored as BGR or converted to grayscale
+    on the way in, which takes a third of the space.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        frame_shape: Tuple[int, int],
+        segment_frames: int = 300,
+        grayscale: bool = False
+    ):
+        """Start a new recording.
+
+        Args:
+            directory: Output directory, created if missing
+            frame_shape: Height and width of the frames
+            segment_frames: Frames per segment file
+            grayscale: Store frames as grayscale
+        """
+        self.directory = directory
+        self.frame_shape = tuple(frame_shape[:2]) + (() if grayscale else (3,))
+        self.segment_frames = max(int(segment_frames), 1)
+        self.grayscale = grayscale
+        self.segments: List[Dict] = []
+        self.timestamps: List[float] = []
+        self._segment = None
+        self._fill = 0
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def frames(self) -> int:
+        """Number of frames recorded so far."""
+        return len(self.timestamps)
+
+    def _open_segment(self):
+        """Preallocate the next segment file."""
+        name = f'segment_{len(self.segments):05d}.npy'
+        self._segment = np.lib.format.open_memmap(
+            os.path.join(self.directory, name),
+            mode='w+',
+            dtype=np.uint8,
+            shape=(self.segment_frames,) + self.frame_shape
+        )
+        self.segments.append({'file': name, 'frames': 0})
+        self._fill = 0
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        """Append a frame to the recording.
+
+        Args:
+            frame: BGR or grayscale frame of the recording's size
+            timestamp: Frame timestamp, the current time if None
+        """
+        if frame.shape[:2] != self.frame_shape[:2]:
+            raise ValueError(f"Frame of shape {frame.shape} does not match recording shape {self.frame_shape}")
+        if self._segment is None or self._fill == self.segment_frames:
+            self._close_segment()
+            self._open_segment()
+
+        slot = self._segment[self._fill]
+        if self.grayscale and frame.ndim == 3:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=slot)
+        elif not self.grayscale and frame.ndim == 2:
+            cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR, dst=slot)
+        else:
+            np.copyto(slot, frame)
+
+        self._fill += 1
+        self.segments[-1]['frames'] = self._fill
+        self.timestamps.append(time.time() if timestamp is None else float(timestamp))
+
+    def _close_segment(self):
+        """Flush the current segment to disk and index it.
+
+        The index is rewritten after every segment, so the finished
+        segments stay readable if the recorder never gets to close().
+        """
+        if self._segment is not None:
+            self._segment.flush()
+            self._segment = None
+            self._write_index()
+
+    def _write_index(self):
+        """Write the timestamps and index of the segments recorded so far."""
+        # Write to temporary files first, a crash never leaves a partial index
+        timestamps_path = os.path.join(self.directory, TIMESTAMPS_FILE)
+        with open(timestamps_path + '.tmp', 'wb') as f:
+            np.save(f, np.asarray(self.timestamps, dtype=np.float64))
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        with open(index_path + '.tmp', 'w') as f:
+            json.dump({
+                'frame_shape': list(self.frame_shape),
+                'segment_frames': self.segment_frames,
+                'segments': self.segments
+            }, f, indent=4)
+        os.replace(timestamps_path + '.tmp', timestamps_path)
+        os.replace(index_path + '.tmp', index_path)
+
+    def close(self):
+        """Finish the recording and write the index."""
+        if self._segment is None:
+            self._write_index()
+        self._close_segment()
+        self.logger.info(f"Recorded {self.frames} frames to {self.directory}")
+
+class RecordingSource:
+    """Replays a FrameRecorder directory without any decoding.
+
+    Segments are memory-mapped, so reading a frame returns a view into the
+    page cache and replay runs at memory bandwidth. Pacing follows the
+    recorded timestamps like ReplaySource does for video files.
+    """
+
+    def __init__(self, directory: str, speed: float = 0.0, loop: bool = False):
+        """Open a recording.
+
+        Args:
+            directory: Directory written by FrameRecorder
+            speed: Playback speed relative to real time, 0 for as fast as possible
+            loop: Restart from the beginning at the end of the recording
+        """
+        if not is_recording(directory):
+            raise ValueError(f"Not a frame recording: {directory}")
+        with open(os.path.join(directory, INDEX_FILE), 'r') as f:
+            index = json.load(f)
+
+        self.directory = directory
+        self.frame_shape = tuple(index['frame_shape'])
+        self.grayscale = len(self.frame_shape) == 2
+        self.segments = [
+            np.load(os.path.join(directory, segment['file']), mmap_mode='r')[:segment['frames']]
+            for segment in index['segments']
+        ]
+        self.offsets = np.cumsum([0] + [len(segment) for segment in self.segments])
+        self.timestamps = np.load(os.path.join(directory, TIMESTAMPS_FILE))
+        self.frame_count = int(self.offsets[-1])
+        self.speed = max(float(speed), 0.0)
+        self.loop = loop
+        self.position = 0
+        self.media_time = 0.0
+        self.frames_read = 0
+        self._clock_start = None
+        self._media_start = 0.0
+
+    def frame(self, index: int) -> np.ndarray:
+        """Get a read-only view of a recorded frame.
+
+        Args:
+            index: Frame index
+
+        Returns:
+            Memory-mapped frame
+        """
+        segment = int(np.searchsorted(self.offsets, index, side='right')) - 1
+        return self.segments[segment][index - self.offsets[segment]]
+
+    def seek(self, seconds: float):
+        """Jump to the first frame at or after a time from the recording start.
+
+        Args:
+            seconds: Seconds from the first frame's timestamp
+        """
+        if self.frame_count:
+            target = self.timestamps[0] + seconds
+            self.position = min(int(np.searchsorted(self.timestamps, target)), self.frame_count)
+        self._clock_start = None
+
+    def read(self, out: Optional[np.ndarray] = None) -> Optional[Tuple[np.ndarray, float]]:
+        """Read the next frame.
+
+        Args:
+            out: Optional buffer to copy the frame into
+
+        Returns:
+            Tuple of frame and seconds since the first recorded frame, or
+            None at the end of the recording. Without ``out`` the frame is a
+            read-only view into the recording.
+        """
+        if self.position >= self.frame_count:
+            if not self.loop or self.frame_count == 0:
+                return None
+            self.seek(0)
+
+        frame = self.frame(self.position)
+        self.media_time = float(self.timestamps[self.position] - self.timestamps[0])
+        self.position += 1
+        self.frames_read += 1
+        self._pace()
+
+        if out is not None:
+            np.copyto(out, frame)
+            frame = out
+        return frame, self.media_time
+
+    def _pace(self):
+        """Sleep until the current frame is due at the playback speed."""
+        if self.speed <= 0:
+            return
+        now = time.monotonic()
+        if self._clock_start is None:
+            self._clock_start = now
+            self._media_start = self.media_time
+            return
+        due = self._clock_start + (self.media_time - self._media_start) / self.speed
+        if due > now:
+            time.sleep(due - now)
+
+    def release(self):
+        """Close the memory maps."""
+        self.segments = []
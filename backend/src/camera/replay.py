@@ -0,0 +1,136 @@
+"""Video file replay source module."""
+
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+import logging
+import time
+
+class ReplaySource:
+    """Replays a video file with media timestamps and controllable pacing.
+
+    Frames are paced against their media time: at speed 1.0 in real time,
+    at speed N N-times faster, and with speed 0 as fast as they decode.
+    Pacing never drops frames, so the same settings always produce the same
+    frames with the same timestamps. Frame skipping happens at the decode
+    level: skipped frames are grabbed but never retrieved.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        speed: float = 1.0,
+        frame_step: int = 1,
+        loop: bool = False,
+        start: float = 0.0
+    ):
+        """Open a video file for replay.
+
+        Args:
+            path: Path to the video file
+            speed: Playback speed relative to real time, 0 for as fast as possible
+            frame_step: Return every frame_step-th frame
+            loop: Restart from the beginning at the end of the file
+            start: Media time in seconds to start at
+        """
+        self.path = path
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise ValueError(f"Could not open video: {path}")
+
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.speed = max(float(speed), 0.0)
+        self.frame_step = max(int(frame_step), 1)
+        self.loop = loop
+        self.position = 0
+        self.media_time = 0.0
+        self.frames_read = 0
+        self.frames_skipped = 0
+        self.logger = logging.getLogger(__name__)
+
+        self._clock_start = None
+        self._media_start = 0.0
+        if start:
+            self.seek(start)
+
+    @property
+    def duration(self) -> float:
+        """Length of the video in seconds."""
+        return self.frame_count / self.fps
+
+    def seek(self, seconds: float):
+        """Jump to a media time.
+
+        Args:
+            seconds: Media time in seconds from the start of the file
+        """
+        frame = max(int(round(seconds * self.fps)), 0)
+        if self.frame_count:
+            frame = min(frame, self.frame_count)
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, frame)
+        self.position = frame
+        self._clock_start = None
+
+    def set_speed(self, speed: float):
+        """Change the playback speed from the current frame on.
+
+        Args:
+            speed: Playback speed relative to real time, 0 for as fast as possible
+        """
+        self.speed = max(float(speed), 0.0)
+        self._clock_start = None
+
+    def _grab(self) -> bool:
+        """Advance to the next frame, restarting the file if looping."""
+        if self.capture.grab():
+            return True
+        if not self.loop or self.position == 0:
+            return False
+        self.seek(0)
+        return self.capture.grab()
+
+    def _pace(self):
+        """Sleep until the current frame is due at the playback speed."""
+        if self.speed <= 0:
+            return
+        now = time.monotonic()
+        if self._clock_start is None:
+            self._clock_start = now
+            self._media_start = self.media_time
+            return
+        due = self._clock_start + (self.media_time - self._media_start) / self.speed
+        if due > now:
+            time.sleep(due - now)
+
+    def read(self, out: Optional[np.ndarray] = None) -> Optional[Tuple[np.ndarray, float]]:
+        """Read the next frame.
+
+        Args:
+            out: Optional buffer of the video's frame size to decode into
+
+        Returns:
+            Tuple of frame and media timestamp in seconds, or None at the end
+            of the file
+        """
+        for _ in range(self.frame_step - 1):
+            if not self._grab():
+                return None
+            self.position += 1
+            self.frames_skipped += 1
+
+        if not self._grab():
+            return None
+        ret, frame = self.capture.retrieve(out)
+        if not ret:
+            return None
+
+        self.media_time = self.position / self.fps
+        self.position += 1
+        self.frames_read += 1
+        self._pace()
+        return frame, self.media_time
+
+    def release(self):
+        """Close the video file."""
+        self.capture.release()
@@ -0,0 +1,204 @@
+"""Shared memory frame transport between processes."""
+
+import logging
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+class SharedFrameRing:
+    """Ring buffer of frames in a multiprocessing shared memory block.
+
+    The capturing process writes frames into the slots in turn. Other
+    processes attach by name and read the slots as NumPy views, so frames
+    never get pickled; only (slot, sequence) references travel over queues.
+
+    Every slot stores the sequence number of the frame it holds, or -1
+    while it is being written. A reader checks the number again after using
+    a view to find out whether the slot was overwritten in the meantime.
+
+    A slot can also be pinned while another process works on its frame.
+    The writer skips pinned slots, so a slow reader keeps its frame instead
+    of having it overwritten; only when every slot is pinned does the
+    writer reuse one anyway.
+    """
+
+    def __init__(
+        self,
+        frame_shape: Tuple[int, ...],
+        slots: int = 8,
+        name: Optional[str] = None,
+        create: bool = True
+    ):
+        """Create or attach to a shared frame ring.
+
+        Args:
+            frame_shape: Shape of every frame, e.g. (height, width, 3)
+            slots: Number of frame slots
+            name: Shared memory block name, generated when creating if None
+            create: Create a new block, otherwise attach to an existing one
+        """
+        self.frame_shape = tuple(frame_shape)
+        self.slots = max(int(slots), 2)
+        header_bytes = 2 * self.slots * np.dtype(np.int64).itemsize
+        frame_bytes = int(np.prod(self.frame_shape))
+        size = header_bytes + self.slots * frame_bytes
+
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.owner = create
+        self._seqs = np.ndarray((self.slots,), dtype=np.int64, buffer=self.shm.buf)
+        self._pins = np.ndarray(
+            (self.slots,),
+            dtype=np.int64,
+            buffer=self.shm.buf,
+            offset=self.slots * np.dtype(np.int64).itemsize
+        )
+        self._frames = np.ndarray(
+            (self.slots,) + self.frame_shape,
+            dtype=np.uint8,
+            buffer=self.shm.buf,
+            offset=header_bytes
+        )
+        if create:
+            self._seqs[:] = -1
+            self._pins[:] = 0
+        self.seq = 0
+        self._cursor = 0
+        self.overwritten_pins = 0
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def name(self) -> str:
+        """Name of the shared memory block."""
+        return self.shm.name
+
+    @property
+    def spec(self) -> Dict:
+        """Arguments another process needs to attach to the ring."""
+        return {'name': self.name, 'frame_shape': self.frame_shape, 'slots': self.slots}
+
+    @classmethod
+    def attach(cls, spec: Dict) -> 'SharedFrameRing':
+        """Attach to a ring created by another process.
+
+        Args:
+            spec: The creating ring's spec
+
+        Returns:
+            Ring backed by the same shared memory
+        """
+        return cls(spec['frame_shape'], spec['slots'], name=spec['name'], create=False)
+
+    def begin_write(self) -> Tuple[int, int, np.ndarray]:
+        """Claim the next unpinned slot for writing.
+
+        Returns:
+            Tuple of slot, sequence number and a writable view of the slot
+        """
+        seq = self.seq + 1
+        for step in range(1, self.slots + 1):
+            slot = (self._cursor + step) % self.slots
+            if not self._pins[slot]:
+                break
+        else:
+            # Every frame is still in use, the oldest one gets torn
+            slot = (self._cursor + 1) % self.slots
+            self.overwritten_pins += 1
+            self.logger.warning(f"All {self.slots} shared frame slots are pinned, overwriting slot {slot}")
+        self._cursor = slot
+        self._seqs[slot] = -1
+        return slot, seq, self._frames[slot]
+
+    def commit(self, slot: int, seq: int):
+        """Publish a slot filled after begin_write().
+
+        Args:
+            slot: Slot returned by begin_write()
+            seq: Sequence number returned by begin_write()
+        """
+        self._seqs[slot] = seq
+        self.seq = seq
+
+    def write(self, frame: np.ndarray) -> Tuple[int, int]:
+        """Copy a frame into the next slot.
+
+        Args:
+            frame: Frame of the ring's frame shape
+
+        Returns:
+            Tuple of slot and sequence number of the frame
+        """
+        slot, seq, view = self.begin_write()
+        np.copyto(view, frame)
+        self.commit(slot, seq)
+        return slot, seq
+
+    def view(self, slot: int) -> np.ndarray:
+        """Get a read-only zero-copy view of a slot.
+
+        Args:
+            slot: Slot index
+
+        Returns:
+            Frame view, valid while is_current() holds for its sequence
+        """
+        frame = self._frames[slot]
+        frame.flags.writeable = False
+        return frame
+
+    def pin(self, slot: int, seq: int) -> bool:
+        """Keep the writer from reusing a slot until it is released.
+
+        Args:
+            slot: Slot index
+            seq: Sequence number of the frame that must stay in the slot
+
+        Returns:
+            True if pinned, False if the slot no longer holds the frame
+        """
+        self._pins[slot] = 1
+        if self.is_current(slot, seq):
+            return True
+        self.release(slot)
+        return False
+
+    def release(self, slot: int):
+        """Let the writer reuse a slot pinned with pin()."""
+        self._pins[slot] = 0
+
+    def is_pinned(self, slot: int) -> bool:
+        """Check whether a slot is pinned."""
+        return bool(self._pins[slot])
+
+    def is_current(self, slot: int, seq: int) -> bool:
+        """Check that a slot still holds the frame with a sequence number."""
+        return int(self._seqs[slot]) == seq
+
+    def read(self, slot: int, seq: int, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Copy a frame out of the ring.
+
+        Args:
+            slot: Slot index
+            seq: Expected sequence number
+            out: Optional buffer to copy into
+
+        Returns:
+            The frame, or None if the slot was overwritten
+        """
+        if not self.is_current(slot, seq):
+            return None
+        if out is None:
+            frame = self._frames[slot].copy()
+        else:
+            np.copyto(out, self._frames[slot])
+            frame = out
+        return frame if self.is_current(slot, seq) else None
+
+    def close(self):
+        """Detach from the shared memory, removing it if this ring created it."""
+        # Views into the buffer must be released before the block can close
+        self._seqs = None
+        self._pins = None
+        self._frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
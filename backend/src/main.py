@@ -7,14 +7,16 @@ import logging
 import os
 from pathlib import Path
 from datetime import datetime
-from flask import Flask, render_template, Response, jsonify
-from flask_socketio import SocketIO
+from flask import Flask, render_template, Response, jsonify, request
+from flask_socketio import SocketIO, join_room, leave_room
 import threading
 import time
 
 from src.traffic_monitor import TrafficMonitor
 from src.traffic_control.signal_controller import SignalController, SignalState
-from config.settings import WEB_SETTINGS, ANALYTICS_SETTINGS, LOGGING_CONFIG
+from src.streaming import FORMATS, FrameBroadcaster, UpdatePublisher
+from src.pipeline import Pipeline, Stage
+from config.settings import WEB_SETTINGS, PIPELINE_SETTINGS, ANALYTICS_SETTINGS, LOGGING_CONFIG
 
 # Configure logging
 log_dir = Path(__file__).parent.parent / 'logs'
@@ -38,43 +40,63 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 # Initialize system components
 traffic_monitor = TrafficMonitor()
 signal_controller = SignalController()
+frame_broadcaster = FrameBroadcaster(**WEB_SETTINGS.get('video', {}))
+
+# One update publisher per intersection; clients subscribe to one of them
+intersection_id = WEB_SETTINGS.get('intersection_id', 'main')
+update_publishers = {
+    intersection_id: UpdatePublisher(
+        lambda event, data, sids: socketio.emit(event, data, to=sids),
+        disconnect=lambda sid: socketio.server.disconnect(sid),
+        **WEB_SETTINGS.get('updates', {})
+    )
+}
+subscriptions = {}  # client id -> (intersection, update format)
 
 # Global variables for system state
 system_running = False
-processing_thread = None
+processing_pipeline = None
+
+def encode_frame(frame: np.ndarray) -> np.ndarray:
+    """Encode stage: publish the annotated frame to video feed clients."""
+    frame_broadcaster.publish(frame)
+    return frame
+
+def emit_system_update(frame: np.ndarray):
+    """Emit stage: send changes of the system data to connected clients."""
+    # Combine data for frontend; the publisher only sends what changed
+    system_data = {
+        'traffic': traffic_monitor.get_traffic_data(),
+        'signals': signal_controller.get_states()
+    }
+    update_publishers[intersection_id].update(system_data)
 
-def process_traffic_data():
-    """Background thread for processing traffic data and updating signals."""
-    global system_running
+def build_pipeline() -> Pipeline:
+    """
+    Build the capture, detect, annotate, encode and emit pipeline.
     
-    while system_running:
-        try:
-            # Process frame and get vehicle counts
-            frame, vehicle_counts = traffic_monitor.process_frame()
-            if frame is None:
-                logging.error("Failed to process frame")
-                continue
-                
-            # Get current system data
-            traffic_data = traffic_monitor.get_traffic_data()
-            signal_data = signal_controller.get_states()
-            
-            # Combine data for frontend
-            system_data = {
-                'traffic': traffic_data,
-                'signals': signal_data,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            # Emit data to connected clients
-            socketio.emit('system_update', system_data)
-            
-            # Control frame rate
-            time.sleep(1.0 / WEB_SETTINGS['fps'])
-            
-        except Exception as e:
-            logging.error(f"Error in processing thread: {e}")
-            time.sleep(1)  # Wait before retrying
+    Every stage runs on its own worker thread with a bounded input queue,
+    and capture is paced to PIPELINE_SETTINGS['target_fps'].
+    
+    Returns:
+        Pipeline ready to be started
+    """
+    stage_settings = PIPELINE_SETTINGS['stages']
+    stages = [
+        Stage(name, func, **stage_settings.get(name, {}))
+        for name, func in [
+            ('detect', traffic_monitor.update_counts),
+            ('annotate', traffic_monitor.annotate_frame),
+            ('encode', encode_frame),
+            ('emit', emit_system_update)
+        ]
+    ]
+    pipeline = Pipeline(traffic_monitor.capture_frame, stages, fps=PIPELINE_SETTINGS['target_fps'])
+
+    # Capture into reused buffers, one more than frames can be in flight
+    if hasattr(traffic_monitor.camera, 'set_frame_buffers'):
+        traffic_monitor.camera.set_frame_buffers(pipeline.max_in_flight() + 1)
+    return pipeline
 
 def store_analytics_data(data: dict):
     """
@@ -87,22 +109,19 @@ def store_analytics_data(data: dict):
     # This could involve writing to a database or file
     pass
 
-def generate_frames():
-    """Generate video frames with traffic data overlay."""
-    while True:
-        frame, vehicle_counts = traffic_monitor.process_frame()
-        if frame is None:
-            continue
-            
-        # Convert frame to JPEG
-        ret, buffer = cv2.imencode('.jpg', frame)
-        if not ret:
-            continue
-            
-        # Yield frame in bytes
-        frame_bytes = buffer.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+def generate_frames(client: str = '', **options):
+    """Generate video frames with traffic data overlay.
+    
+    Frames are produced and encoded by the processing thread, so every
+    client shares the same JPEG buffers instead of running the pipeline.
+    Each client reads from its own bounded queue and a stalled client's
+    stream ends.
+    
+    Args:
+        client: Client description for statistics
+        **options: Stream width, quality, fps and adaptive options
+    """
+    yield from frame_broadcaster.stream(client, **options)
 
 @app.route('/')
 def index():
@@ -111,9 +130,26 @@ def index():
 
 @app.route('/video_feed')
 def video_feed():
-    """Video streaming route."""
+    """Video streaming route.
+    
+    Optional query parameters: ``width`` in pixels, JPEG ``quality`` from
+    1 to 100, ``fps`` and ``adaptive=0`` to keep the quality fixed when
+    the client falls behind, e.g. ``/video_feed?width=320&quality=50&fps=5``
+    for thumbnails.
+    """
+    width = request.args.get('width', type=int)
+    quality = request.args.get('quality', type=int)
+    fps = request.args.get('fps', type=float)
+    if (width is not None and width < 16) or (quality is not None and not 1 <= quality <= 100) or (fps is not None and fps <= 0):
+        return jsonify({'error': 'width must be at least 16, quality 1 to 100 and fps positive'}), 400
     return Response(
-        generate_frames(),
+        generate_frames(
+            request.remote_addr or '',
+            width=width,
+            quality=quality,
+            fps=fps,
+            adaptive=request.args.get('adaptive', '1') != '0'
+        ),
         mimetype='multipart/x-mixed-replace; boundary=frame'
     )
 
@@ -122,27 +158,111 @@ def get_traffic_data():
     """Get current traffic data."""
     return jsonify(traffic_monitor.get_traffic_data())
 
+@app.route('/pipeline_stats')
+def get_pipeline_stats():
+    """Get queue depth and latency of every pipeline stage."""
+    if processing_pipeline is None:
+        return jsonify({})
+    return jsonify(processing_pipeline.get_stats())
+
 @app.route('/signal_states')
 def get_signal_states():
     """Get current signal states."""
     return jsonify(signal_controller.get_states())
 
+@app.route('/update_stats')
+def get_update_stats():
+    """Get state update publisher statistics per intersection."""
+    return jsonify({name: publisher.get_stats() for name, publisher in update_publishers.items()})
+
+@app.route('/client_stats')
+def get_client_stats():
+    """Get send queue statistics of every video and update client."""
+    return jsonify({
+        'video': frame_broadcaster.get_client_stats(),
+        'updates': {name: publisher.get_client_stats() for name, publisher in update_publishers.items()}
+    })
+
+def intersection_room(name: str) -> str:
+    """Socket.IO room of the clients watching an intersection."""
+    return f'intersection:{name}'
+
+def subscribe(sid: str, update_format: str, options: dict) -> bool:
+    """
+    Subscribe a client to the updates of one intersection.
+
+    Args:
+        sid: Client id
+        update_format: 'json' or 'binary'
+        options: Subscription with optional 'intersection' name and
+            'lanes' list, the local intersection and all lanes by default
+
+    Returns:
+        bool: True if subscribed, False for an unknown intersection
+    """
+    name = options.get('intersection') or intersection_id
+    if name not in update_publishers:
+        logging.warning(f"Client {sid} asked for unknown intersection {name}")
+        return False
+
+    unsubscribe(sid)
+    subscriptions[sid] = (name, update_format)
+    join_room(intersection_room(name), sid=sid)
+    # Send the full state; deltas follow as it changes
+    update_publishers[name].add_client(sid, update_format, options.get('lanes'))
+    return True
+
+def unsubscribe(sid: str):
+    """Remove a client from its intersection's updates."""
+    subscription = subscriptions.pop(sid, None)
+    if subscription is not None:
+        update_publishers[subscription[0]].remove_client(sid)
+        leave_room(intersection_room(subscription[0]), sid=sid)
+
 @socketio.on('connect')
-def handle_connect():
-    """Handle client connection."""
-    logging.info("Client connected")
-    # Send initial system state
-    system_data = {
-        'traffic': traffic_monitor.get_traffic_data(),
-        'signals': signal_controller.get_signal_data(),
-        'timestamp': datetime.now().isoformat()
-    }
-    socketio.emit('system_update', system_data)
+def handle_connect(auth=None):
+    """Handle client connection.
+
+    The connection auth data picks the update format with ``format``
+    ('json' by default or 'binary') and the subscription with
+    ``intersection`` and ``lanes``.
+    """
+    auth = auth or {}
+    update_format = auth.get('format', 'json')
+    if update_format not in FORMATS:
+        logging.warning(f"Unknown update format {update_format}, using json")
+        update_format = 'json'
+    if not subscribe(request.sid, update_format, auth):
+        return False
+    logging.info(f"Client connected ({update_format} updates)")
+
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    """Move a client to another intersection or set of lanes."""
+    current = subscriptions.get(request.sid)
+    update_format = current[1] if current else 'json'
+    if not subscribe(request.sid, update_format, data or {}):
+        socketio.emit('subscription_error', {'intersection': (data or {}).get('intersection')}, to=request.sid)
+
+@socketio.on('state_ack')
+def handle_state_ack(data):
+    """Record the state version a client has applied."""
+    subscription = subscriptions.get(request.sid)
+    if subscription is not None:
+        update_publishers[subscription[0]].acknowledge(request.sid, data.get('version'))
+
+@socketio.on('state_resync')
+def handle_state_resync():
+    """Send the full system state to a client that lost track."""
+    subscription = subscriptions.get(request.sid)
+    if subscription is not None:
+        update_publishers[subscription[0]].resync(request.sid)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection."""
     logging.info("Client disconnected")
+    unsubscribe(request.sid)
 
 @socketio.on('emergency_vehicle')
 def handle_emergency(data):
@@ -153,11 +273,11 @@ def handle_emergency(data):
         socketio.emit('system_update', {
             'message': f'Emergency mode activated for {vehicle_type}',
             'type': 'emergency'
-        })
+        }, to=intersection_room(intersection_id))
 
 def start_system():
     """Start the traffic management system."""
-    global system_running, processing_thread
+    global system_running, processing_pipeline
     
     try:
         # Start traffic monitor
@@ -168,11 +288,11 @@ def start_system():
         if not signal_controller.start():
             raise RuntimeError("Failed to start signal controller")
         
-        # Start processing thread
+        # Start processing pipeline and serve video feed clients again
         system_running = True
-        processing_thread = threading.Thread(target=process_traffic_data)
-        processing_thread.daemon = True
-        processing_thread.start()
+        frame_broadcaster.start()
+        processing_pipeline = build_pipeline()
+        processing_pipeline.start()
         
         logging.info("Traffic management system started successfully")
         return True
@@ -183,13 +303,15 @@ def start_system():
 
 def stop_system():
     """Stop the traffic management system."""
-    global system_running, processing_thread
+    global system_running, processing_pipeline
     
     try:
-        # Stop processing thread
+        # Stop processing pipeline and video feed clients
         system_running = False
-        if processing_thread:
-            processing_thread.join()
+        frame_broadcaster.close()
+        if processing_pipeline:
+            processing_pipeline.stop()
+            processing_pipeline = None
             
         # Stop traffic monitor
         traffic_monitor.stop()
@@ -0,0 +1,353 @@
+"""
+Offline video analysis for the Smart Traffic Management System.
+
+Runs the lane counting logic over a recorded video as fast as the CPU
+allows. The video is split into frame ranges that are processed in a
+process pool, and the per-lane counts are merged into time buckets.
+Counting goes through the same LaneCounter as the live TrafficMonitor,
+so the DETECTION_SETTINGS backend, lane profiles, tiling and motion gate
+apply here too.
+
+Example:
+    python -m src.offline_analysis data/test_traffic.mp4 --output counts.csv
+"""
+import argparse
+import csv
+import json
+import logging
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+
+from src.vehicle_detection.boxes import scale_regions
+from src.vehicle_detection.lane_counter import LaneCounter, create_detector
+from config.settings import CAMERA_SETTINGS, LANES, DETECTION_SETTINGS
+
+# Detector and detection settings owned by each worker process
+_detector = None
+_settings = None
+
+def _init_worker(model_path: Optional[str], settings: Optional[Dict] = None):
+    """Create the detector once per worker process."""
+    global _detector, _settings
+    cv2.setNumThreads(1)
+    _settings = settings
+    _detector = create_detector(settings, model_path)
+
+def seek_frame(capture: cv2.VideoCapture, index: int) -> bool:
+    """
+    Position a capture exactly on a frame.
+
+    Seeking compressed video can land next to the requested frame, which
+    would duplicate or skip frames at range boundaries. The position is
+    therefore checked after seeking, and if it is off the capture is
+    rewound and decoded forward to the frame instead.
+
+    Args:
+        capture: Opened video capture
+        index: Frame to read next
+
+    Returns:
+        bool: True if the next grab() returns the frame, False if the video
+        ends before it
+    """
+    if index <= 0:
+        return True
+    capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+    position = int(round(capture.get(cv2.CAP_PROP_POS_FRAMES)))
+    if position == index:
+        return True
+
+    logging.debug(f"Seek to frame {index} landed on {position}, decoding forward")
+    if not 0 <= position < index:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        position = 0
+        if int(round(capture.get(cv2.CAP_PROP_POS_FRAMES))) != 0:
+            return False
+    while position < index:
+        if not capture.grab():
+            return False
+        position += 1
+    return True
+
+def get_video_info(video_path: str) -> Tuple[int, float, int, int]:
+    """
+    Read the frame count, frame rate and frame size of a video.
+
+    Args:
+        video_path: Path to the video file
+
+    Returns:
+        Tuple of frame count, frames per second, width and height
+    """
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+    try:
+        total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    finally:
+        capture.release()
+    return total_frames, fps, width, height
+
+def fit_lanes(lanes: Dict, lanes_size: Tuple[int, int], frame_size: Tuple[int, int]) -> Dict:
+    """
+    Map lanes drawn for one frame size onto the frames of a video.
+
+    Args:
+        lanes: Dictionary mapping lane names to (x1, y1, x2, y2)
+        lanes_size: Width and height the lanes are defined for
+        frame_size: Width and height of the video frames
+
+    Returns:
+        Dictionary of lanes in video frame coordinates
+    """
+    if tuple(lanes_size) == tuple(frame_size) or not all(frame_size):
+        return dict(lanes)
+    logging.info(f"Scaling lanes from {lanes_size[0]}x{lanes_size[1]} to {frame_size[0]}x{frame_size[1]} frames")
+    return scale_regions(lanes, frame_size[0] / lanes_size[0], frame_size[1] / lanes_size[1])
+
+def split_frame_ranges(total_frames: int, chunks: int) -> List[Tuple[int, int]]:
+    """
+    Split a video into contiguous frame ranges.
+
+    Args:
+        total_frames: Number of frames in the video
+        chunks: Number of ranges to produce
+
+    Returns:
+        List of (start, end) frame ranges, end exclusive
+    """
+    if total_frames <= 0:
+        return []
+    chunks = max(min(chunks, total_frames), 1)
+    size = math.ceil(total_frames / chunks)
+    return [(start, min(start + size, total_frames)) for start in range(0, total_frames, size)]
+
+def analyze_range(
+    video_path: str,
+    start: int,
+    end: int,
+    fps: float,
+    lanes: Dict,
+    sample_every: int,
+    bucket_seconds: float
+) -> Dict[int, Dict]:
+    """
+    Count vehicles per lane over a range of frames.
+
+    Only every ``sample_every``-th frame of the video is decoded and
+    detected; the others are skipped with grab() and never retrieved.
+    Sampling is aligned to absolute frame numbers so results do not depend
+    on how the video was split. Each range counts with a fresh LaneCounter
+    on the process' detector, so motion gate state never spans ranges.
+
+    Args:
+        video_path: Path to the video file
+        start: First frame of the range
+        end: Frame after the last frame of the range
+        fps: Frame rate of the video
+        lanes: Dictionary mapping lane names to (x1, y1, x2, y2)
+        sample_every: Frames between detections
+        bucket_seconds: Length of a time bucket in seconds
+
+    Returns:
+        Dictionary mapping bucket index to sample count and per lane sums and maxima
+    """
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+
+    buckets = {}
+    counter = LaneCounter(lanes, settings=_settings, detector=_detector)
+    counts = {lane: 0 for lane in lanes}
+    try:
+        if not seek_frame(capture, start):
+            return buckets
+        for index in range(start, end):
+            if not capture.grab():
+                break
+            if index % sample_every != 0:
+                continue
+            ret, frame = capture.retrieve()
+            if not ret:
+                continue
+
+            # Lanes the motion gate skips keep their previous count
+            counts.update(counter.count(frame))
+            bucket = buckets.setdefault(int(index / fps // bucket_seconds), {
+                'samples': 0,
+                'sum': {lane: 0 for lane in lanes},
+                'max': {lane: 0 for lane in lanes}
+            })
+            bucket['samples'] += 1
+            for lane, count in counts.items():
+                bucket['sum'][lane] += count
+                bucket['max'][lane] = max(bucket['max'][lane], count)
+    finally:
+        capture.release()
+    return buckets
+
+def merge_buckets(partials: List[Dict[int, Dict]]) -> Dict[int, Dict]:
+    """
+    Merge per range bucket results.
+
+    Args:
+        partials: Bucket results from analyze_range
+
+    Returns:
+        Combined bucket results
+    """
+    merged = {}
+    for partial in partials:
+        for index, bucket in partial.items():
+            target = merged.get(index)
+            if target is None:
+                merged[index] = {
+                    'samples': bucket['samples'],
+                    'sum': dict(bucket['sum']),
+                    'max': dict(bucket['max'])
+                }
+                continue
+            target['samples'] += bucket['samples']
+            for lane, value in bucket['sum'].items():
+                target['sum'][lane] += value
+                target['max'][lane] = max(target['max'][lane], bucket['max'][lane])
+    return merged
+
+def build_rows(merged: Dict[int, Dict], lanes: Dict, bucket_seconds: float) -> List[Dict]:
+    """
+    Convert merged buckets into output rows.
+
+    Args:
+        merged: Combined bucket results
+        lanes: Dictionary mapping lane names to regions
+        bucket_seconds: Length of a time bucket in seconds
+
+    Returns:
+        List of rows with the bucket start time, sample count and per lane
+        mean and maximum vehicle counts
+    """
+    rows = []
+    for index in sorted(merged):
+        bucket = merged[index]
+        row = {'bucket_start': index * bucket_seconds, 'samples': bucket['samples']}
+        for lane in lanes:
+            row[f'{lane}_mean'] = round(bucket['sum'][lane] / bucket['samples'], 3)
+            row[f'{lane}_max'] = bucket['max'][lane]
+        rows.append(row)
+    return rows
+
+def write_rows(rows: List[Dict], output, output_format: str):
+    """
+    Write rows as CSV or NDJSON.
+
+    Args:
+        rows: Rows from build_rows
+        output: Writable text stream
+        output_format: 'csv' or 'ndjson'
+    """
+    if output_format == 'ndjson':
+        for row in rows:
+            output.write(json.dumps(row) + '\n')
+        return
+
+    if rows:
+        writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+def analyze_video(
+    video_path: str,
+    lanes: Dict = None,
+    workers: int = None,
+    sample_interval: float = None,
+    bucket_seconds: float = 60.0,
+    model_path: Optional[str] = None,
+    lanes_size: Optional[Tuple[int, int]] = None
+) -> List[Dict]:
+    """
+    Count vehicles per lane and time bucket over a whole video.
+
+    Lanes are scaled to the video's frame size like TrafficMonitor scales
+    them to the camera's, so recordings of any resolution are counted over
+    the same parts of the scene.
+
+    Args:
+        video_path: Path to the video file
+        lanes: Lane regions, LANES by default
+        workers: Number of worker processes, one per CPU by default
+        sample_interval: Seconds of video between detections, the monitor's
+            frame_interval by default
+        bucket_seconds: Length of a time bucket in seconds
+        model_path: Detection model overriding the one in DETECTION_SETTINGS
+        lanes_size: Width and height the lanes are defined for, the
+            CAMERA_SETTINGS size by default
+
+    Returns:
+        List of rows as produced by build_rows
+    """
+    lanes = lanes or LANES
+    workers = workers or os.cpu_count() or 1
+    if sample_interval is None:
+        sample_interval = DETECTION_SETTINGS['frame_interval']
+
+    if lanes_size is None:
+        lanes_size = (CAMERA_SETTINGS['width'], CAMERA_SETTINGS['height'])
+
+    total_frames, fps, width, height = get_video_info(video_path)
+    lanes = fit_lanes(lanes, lanes_size, (width, height))
+    sample_every = max(int(round(sample_interval * fps)), 1)
+    ranges = split_frame_ranges(total_frames, workers * 4)
+    logging.info(f"Analyzing {total_frames} frames in {len(ranges)} ranges on {workers} workers")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path, DETECTION_SETTINGS)) as pool:
+        futures = [
+            pool.submit(analyze_range, video_path, start, end, fps, lanes, sample_every, bucket_seconds)
+            for start, end in ranges
+        ]
+        partials = [future.result() for future in futures]
+
+    return build_rows(merge_buckets(partials), lanes, bucket_seconds)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Count vehicles per lane in a recorded video.")
+    parser.add_argument('video', help="Path to the video file")
+    parser.add_argument('--output', '-o', help="Output file, stdout if omitted")
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv', help="Output format")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes, one per CPU by default")
+    parser.add_argument('--bucket-seconds', type=float, default=60.0, help="Length of a time bucket")
+    parser.add_argument('--sample-interval', type=float, default=None,
+                        help="Seconds of video between detections")
+    parser.add_argument('--model', default=None, help="Detection model path")
+    args = parser.parse_args(argv)
+
+    try:
+        rows = analyze_video(
+            args.video,
+            workers=args.workers,
+            sample_interval=args.sample_interval,
+            bucket_seconds=args.bucket_seconds,
+            model_path=args.model
+        )
+    except ValueError as e:
+        logging.error(str(e))
+        return 1
+
+    if args.output:
+        with open(args.output, 'w', newline='') as output:
+            write_rows(rows, output, args.format)
+    else:
+        write_rows(rows, sys.stdout, args.format)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
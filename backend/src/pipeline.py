@@ -0,0 +1,270 @@
+"""
+Staged frame processing pipeline for the Smart Traffic Management System.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+DROP_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+def _latency_summary(latencies) -> Dict[str, float]:
+    """Summarize recent latencies in seconds as milliseconds."""
+    ordered = sorted(latencies)
+    if not ordered:
+        return {'mean': 0.0, 'p95': 0.0}
+    return {
+        'mean': 1000.0 * sum(ordered) / len(ordered),
+        'p95': 1000.0 * ordered[int(0.95 * (len(ordered) - 1))]
+    }
+
+class FramePacer:
+    """Paces a loop to a target rate using absolute deadlines.
+
+    Unlike sleeping a fixed amount after each iteration, the time spent
+    doing work counts towards the period. A loop that falls more than one
+    period behind resynchronizes instead of bursting to catch up.
+    """
+
+    def __init__(self, fps: float):
+        """
+        Initialize the pacer.
+
+        Args:
+            fps: Target iterations per second, 0 or None for no pacing
+        """
+        self.period = 1.0 / fps if fps else 0.0
+        self.next_deadline = None
+        self.late = 0
+
+    def wait(self):
+        """Sleep until the next deadline."""
+        if not self.period:
+            return
+        now = time.monotonic()
+        if self.next_deadline is None:
+            self.next_deadline = now
+        delay = self.next_deadline - now
+        if delay > 0:
+            time.sleep(delay)
+        elif delay < -self.period:
+            self.late += 1
+            self.next_deadline = now
+        self.next_deadline += self.period
+
+class Stage:
+    """A pipeline stage running a function on its own worker thread."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        queue_size: int = 2,
+        drop_policy: str = 'drop_oldest'
+    ):
+        """
+        Initialize the stage.
+
+        Args:
+            name: Stage name used in statistics and logs
+            func: Function applied to every item, returning the item for the
+                next stage or None to stop it here
+            queue_size: Maximum number of items waiting in the input queue
+            drop_policy: What to do when the queue is full: 'block' waits for
+                room, 'drop_oldest' discards the oldest waiting item and
+                'drop_newest' discards the incoming item
+        """
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+
+        self.name = name
+        self.func = func
+        self.queue_size = max(int(queue_size), 1)
+        self.drop_policy = drop_policy
+        self.next_stage = None
+
+        self.queue: Deque[Any] = deque()
+        self.condition = threading.Condition()
+        self.running = False
+        self.worker = None
+
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.latencies: Deque[float] = deque(maxlen=100)
+
+    def put(self, item: Any) -> bool:
+        """
+        Queue an item for this stage.
+
+        Args:
+            item: Item to process
+
+        Returns:
+            bool: True if the item was queued, False if it was dropped
+        """
+        with self.condition:
+            if len(self.queue) >= self.queue_size:
+                if self.drop_policy == 'drop_newest':
+                    self.dropped += 1
+                    return False
+                if self.drop_policy == 'drop_oldest':
+                    self.queue.popleft()
+                    self.dropped += 1
+                else:
+                    self.condition.wait_for(
+                        lambda: len(self.queue) < self.queue_size or not self.running
+                    )
+                    if not self.running:
+                        return False
+            self.queue.append(item)
+            self.condition.notify_all()
+            return True
+
+    def start(self):
+        """Start the worker thread."""
+        self.running = True
+        self.worker = threading.Thread(target=self._run, name=f"stage-{self.name}")
+        self.worker.daemon = True
+        self.worker.start()
+
+    def stop(self):
+        """Stop the worker thread."""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.worker:
+            self.worker.join()
+            self.worker = None
+
+    def _run(self):
+        """Process items until stopped."""
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.queue or not self.running)
+                if not self.running:
+                    break
+                item = self.queue.popleft()
+                self.condition.notify_all()
+
+            start_time = time.perf_counter()
+            try:
+                result = self.func(item)
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"Error in pipeline stage {self.name}: {e}")
+                continue
+            self.latencies.append(time.perf_counter() - start_time)
+            self.processed += 1
+
+            if result is not None and self.next_stage is not None:
+                self.next_stage.put(result)
+
+    def get_stats(self) -> Dict:
+        """
+        Get stage statistics.
+
+        Returns:
+            Dictionary with queue depth, counters and latency in milliseconds
+        """
+        return {
+            'queue_depth': len(self.queue),
+            'queue_size': self.queue_size,
+            'drop_policy': self.drop_policy,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'latency_ms': _latency_summary(self.latencies)
+        }
+
+class Pipeline:
+    """Feeds items from a paced source through a chain of stages."""
+
+    def __init__(self, source: Callable[[], Any], stages: List[Stage], fps: Optional[float] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            source: Function producing the next item, or None if none is available
+            stages: Stages in processing order
+            fps: Target rate for the source, unpaced if None
+        """
+        self.source = source
+        self.stages = stages
+        self.pacer = FramePacer(fps)
+        self.running = False
+        self.source_thread = None
+        self.produced = 0
+        self.missed = 0
+        self.latencies: Deque[float] = deque(maxlen=100)
+
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.next_stage = next_stage
+
+    def start(self):
+        """Start the stages and the source thread."""
+        for stage in self.stages:
+            stage.start()
+        self.running = True
+        self.source_thread = threading.Thread(target=self._run_source, name="stage-source")
+        self.source_thread.daemon = True
+        self.source_thread.start()
+
+    def stop(self):
+        """Stop the source thread and all stages."""
+        self.running = False
+        if self.source_thread:
+            self.source_thread.join()
+            self.source_thread = None
+        for stage in self.stages:
+            stage.stop()
+
+    def _run_source(self):
+        """Produce items at the target rate until stopped."""
+        while self.running:
+            self.pacer.wait()
+            start_time = time.perf_counter()
+            try:
+                item = self.source()
+            except Exception as e:
+                logging.error(f"Error in pipeline source: {e}")
+                item = None
+            self.latencies.append(time.perf_counter() - start_time)
+
+            if item is None:
+                self.missed += 1
+                continue
+            self.produced += 1
+            if self.stages:
+                self.stages[0].put(item)
+
+    def max_in_flight(self) -> int:
+        """
+        Get the most items that can be alive in the pipeline at once.
+
+        Every stage holds up to its queue size plus the item it is working
+        on, and the source holds the item it is producing. A source reusing
+        buffers needs more than this many so none is overwritten in use.
+
+        Returns:
+            Upper bound of items in flight
+        """
+        return 1 + sum(stage.queue_size + 1 for stage in self.stages)
+
+    def get_stats(self) -> Dict:
+        """
+        Get pipeline statistics.
+
+        Returns:
+            Dictionary with source counters and per stage statistics
+        """
+        return {
+            'source': {
+                'produced': self.produced,
+                'missed': self.missed,
+                'late': self.pacer.late,
+                'latency_ms': _latency_summary(self.latencies)
+            },
+            'stages': {stage.name: stage.get_stats() for stage in self.stages}
+        }
@@ -0,0 +1,16 @@
+"""
+Streaming package for delivering frames and updates to dashboard clients.
+"""
+from .broadcaster import FrameBroadcaster
+from .updates import UpdatePublisher, apply_delta, diff_state
+from .wire import FORMATS, decode_state_message, encode_state_message
+
+__all__ = [
+    'FrameBroadcaster',
+    'UpdatePublisher',
+    'apply_delta',
+    'diff_state',
+    'FORMATS',
+    'decode_state_message',
+    'encode_state_message'
+]
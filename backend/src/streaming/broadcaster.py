@@ -0,0 +1,360 @@
+"""
+Frame broadcasting module for MJPEG video streaming.
+"""
+import cv2
+import numpy as np
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+import itertools
+import logging
+import threading
+import time
+
+OPENCV_DEFAULT_QUALITY = 95
+
+class _StreamClient:
+    """Send queue, stream parameters and counters of one MJPEG client."""
+
+    def __init__(
+        self,
+        client_id: int,
+        name: str,
+        queue_depth: int,
+        now: float,
+        width: Optional[int],
+        quality: int,
+        fps: Optional[float],
+        adaptive: bool
+    ):
+        self.id = client_id
+        self.name = name
+        self.queue: Deque[bytes] = deque()
+        self.queue_depth = queue_depth
+        self.queued_bytes = 0
+        self.sent_frames = 0
+        self.sent_bytes = 0
+        self.dropped = 0
+        self.connected_at = now
+        self.last_progress = now
+        self.stalled = False
+        self.width = width
+        self.max_quality = quality
+        self.quality = quality
+        self.quality_changed_at = now
+        self.clean_frames = 0
+        self.fps = fps
+        self.last_slot = None
+        self.adaptive = adaptive
+
+    def due(self, now: float) -> bool:
+        """Check whether the client wants a frame at its frame rate.
+
+        Time is cut into 1 / fps slots shared by all clients, so clients
+        with the same rate take the same frames and share their encoding.
+        """
+        if not self.fps:
+            return True
+        slot = int(now * self.fps)
+        if slot == self.last_slot:
+            return False
+        self.last_slot = slot
+        return True
+
+    def stats(self, now: float) -> Dict:
+        """Get the client's counters."""
+        elapsed = now - self.connected_at
+        return {
+            'name': self.name,
+            'width': self.width,
+            'quality': self.quality,
+            'fps': self.fps,
+            'queued_frames': len(self.queue),
+            'queued_bytes': self.queued_bytes,
+            'sent_frames': self.sent_frames,
+            'sent_bytes': self.sent_bytes,
+            'dropped_frames': self.dropped,
+            'throughput_kbps': 8.0 * self.sent_bytes / elapsed / 1000.0 if elapsed > 0 else 0.0,
+            'idle_seconds': now - self.last_progress,
+            'stalled': self.stalled
+        }
+
+class FrameBroadcaster:
+    """Encodes each produced frame once and shares it with every client.
+
+    The processing pipeline publishes annotated frames, and any number of
+    MJPEG clients read the encoded parts from their own send queues. Queues
+    hold at most queue_depth frames; a client that falls behind loses its
+    oldest queued frames, so it always continues with the newest one. A
+    client that takes no frame for stall_timeout seconds while frames are
+    waiting is dropped. Frames are only encoded while at least one client
+    is connected. close() ends every stream, and start() serves new
+    streams again after a close().
+
+    Clients may ask for a smaller width, a JPEG quality and a frame rate.
+    Every frame is encoded once per (width, quality) variant that a client
+    due for it needs. Widths are rounded to width_step to keep the number
+    of variants small. With adaptive quality, a client that drops frames
+    because it cannot keep up gets a lower quality, at most once a second
+    down to min_quality, and recovers quality_step after recover_frames
+    frames in a row without a backlog.
+    """
+
+    def __init__(
+        self,
+        jpeg_quality: Optional[int] = None,
+        queue_depth: int = 2,
+        stall_timeout: float = 10.0,
+        min_quality: int = 30,
+        quality_step: int = 10,
+        recover_frames: int = 30,
+        width_step: int = 32,
+        clock=time.monotonic
+    ):
+        """
+        Initialize the frame broadcaster.
+
+        Args:
+            jpeg_quality: Default JPEG quality from 0 to 100, OpenCV's default
+                if None
+            queue_depth: Frames queued per client before the oldest is dropped
+            stall_timeout: Seconds a client may take no frames before it is
+                disconnected
+            min_quality: Lowest quality adaptive clients are lowered to
+            quality_step: Quality change per adaptation
+            recover_frames: Frames without backlog before quality is raised
+            width_step: Granularity of requested widths
+            clock: Monotonic time source
+        """
+        self.jpeg_quality = OPENCV_DEFAULT_QUALITY if jpeg_quality is None else int(jpeg_quality)
+        self.min_quality = int(min_quality)
+        self.quality_step = max(int(quality_step), 1)
+        self.recover_frames = max(int(recover_frames), 1)
+        self.width_step = max(int(width_step), 1)
+        self.queue_depth = max(int(queue_depth), 1)
+        self.stall_timeout = stall_timeout
+        self.clock = clock
+        self.condition = threading.Condition()
+        self.sequence = 0
+        self.part = None
+        self.clients: Dict[int, _StreamClient] = {}
+        self._client_ids = itertools.count(1)
+        self.encoded = 0
+        self.encoded_variants = 0
+        self.stalled = 0
+        self.closed = False
+        # Streams end once close() moves past the generation they started in
+        self.generation = 0
+        self.logger = logging.getLogger(__name__)
+
+    def publish(self, frame: np.ndarray) -> bool:
+        """
+        Encode a frame and make it available to all clients.
+
+        Args:
+            frame: Annotated frame to broadcast
+
+        Returns:
+            bool: True if the frame was encoded, False if skipped or failed
+        """
+        if not self.clients:
+            return False
+
+        # Pick the clients due for this frame and the variants they need
+        now = self.clock()
+        frame_width = frame.shape[1]
+        with self.condition:
+            targets = [
+                (client, (min(client.width or frame_width, frame_width), client.quality))
+                for client in self.clients.values()
+                if not client.stalled and client.due(now)
+            ]
+        if not targets:
+            return False
+
+        # Encode every variant once, resizing once per width
+        parts: Dict[Tuple[int, int], Optional[bytes]] = {}
+        resized: Dict[int, np.ndarray] = {frame_width: frame}
+        for _, variant in targets:
+            if variant not in parts:
+                parts[variant] = self._encode(frame, variant, resized)
+        if not any(parts.values()):
+            return False
+
+        with self.condition:
+            self.sequence += 1
+            self.encoded += 1
+            self.encoded_variants += sum(part is not None for part in parts.values())
+            self.part = parts.get((frame_width, self.jpeg_quality)) or self.part
+            for client, variant in targets:
+                if parts[variant] is not None:
+                    self._enqueue(client, parts[variant], now)
+            self.condition.notify_all()
+        return True
+
+    def _encode(self, frame: np.ndarray, variant: Tuple[int, int], resized: Dict[int, np.ndarray]) -> Optional[bytes]:
+        """Encode one (width, quality) variant of a frame as a multipart chunk."""
+        width, quality = variant
+        if width not in resized:
+            height = max(int(round(frame.shape[0] * width / frame.shape[1])), 1)
+            resized[width] = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+        ret, buffer = cv2.imencode('.jpg', resized[width], [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ret:
+            self.logger.error("Failed to encode frame")
+            return None
+
+        # Build the multipart chunk once so clients only yield shared bytes
+        return (b'--frame\r\n'
+                b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+
+    def _enqueue(self, client: _StreamClient, part: bytes, now: float):
+        """Queue a part for a client, dropping its oldest frame when full."""
+        if client.stalled:
+            return
+        if client.queue and now - client.last_progress >= self.stall_timeout:
+            # The client has not taken a frame for too long, give up on it
+            client.stalled = True
+            client.dropped += len(client.queue)
+            client.queue.clear()
+            client.queued_bytes = 0
+            self.stalled += 1
+            self.logger.warning(f"Dropping stalled video client {client.name}")
+            return
+        if len(client.queue) >= client.queue_depth:
+            client.queued_bytes -= len(client.queue.popleft())
+            client.dropped += 1
+            client.clean_frames = 0
+            if client.adaptive and now - client.quality_changed_at >= 1.0:
+                client.quality = max(client.quality - self.quality_step, min(self.min_quality, client.max_quality))
+                client.quality_changed_at = now
+        elif not client.queue and client.quality < client.max_quality:
+            client.clean_frames += 1
+            if client.clean_frames >= self.recover_frames:
+                client.quality = min(client.quality + self.quality_step, client.max_quality)
+                client.quality_changed_at = now
+                client.clean_frames = 0
+        if not client.queue:
+            # The client was waiting, it only stalls if it leaves this frame
+            client.last_progress = now
+        client.queue.append(part)
+        client.queued_bytes += len(part)
+
+    def wait_for_frame(self, last_sequence: int, timeout: float = 1.0) -> Optional[Tuple[int, bytes]]:
+        """
+        Wait for a frame newer than the one a client already has.
+
+        Args:
+            last_sequence: Sequence number of the client's last frame
+            timeout: Seconds to wait
+
+        Returns:
+            Tuple of sequence number and multipart chunk, or None on timeout
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.sequence > last_sequence or self.closed,
+                timeout
+            )
+            if self.sequence <= last_sequence or self.part is None:
+                return None
+            return self.sequence, self.part
+
+    def stream(
+        self,
+        name: str = '',
+        width: Optional[int] = None,
+        quality: Optional[int] = None,
+        fps: Optional[float] = None,
+        adaptive: bool = True
+    ) -> Iterator[bytes]:
+        """
+        Generate multipart MJPEG chunks for one client.
+
+        Args:
+            name: Client description for statistics, e.g. its address
+            width: Frame width, rounded to width_step; full size if None
+                or larger than the frames
+            quality: Highest JPEG quality, the default quality if None
+            fps: Most frames per second, every frame if None
+            adaptive: Lower the quality while the client cannot keep up
+
+        Yields:
+            Multipart chunks, skipping frames the client was too slow for.
+            The stream ends when the client stalls.
+        """
+        with self.condition:
+            if width:
+                width = max(int(round(width / self.width_step)) * self.width_step, self.width_step)
+            quality = self.jpeg_quality if quality is None else min(max(int(quality), 1), 100)
+            client = _StreamClient(
+                next(self._client_ids),
+                name,
+                self.queue_depth,
+                self.clock(),
+                width or None,
+                quality,
+                fps if fps and fps > 0 else None,
+                adaptive
+            )
+            self.clients[client.id] = client
+            generation = self.generation
+        try:
+            while True:
+                with self.condition:
+                    self.condition.wait_for(
+                        lambda: client.queue or client.stalled or self.closed or self.generation != generation,
+                        1.0
+                    )
+                    if client.stalled or self.closed or self.generation != generation:
+                        break
+                    if not client.queue:
+                        continue
+                    part = client.queue.popleft()
+                    client.queued_bytes -= len(part)
+                    client.last_progress = self.clock()
+                yield part
+                client.sent_frames += 1
+                client.sent_bytes += len(part)
+        finally:
+            with self.condition:
+                self.clients.pop(client.id, None)
+
+    def start(self):
+        """Serve streams again after close(), starting a new frame sequence."""
+        with self.condition:
+            self.closed = False
+            self.sequence = 0
+            self.part = None
+
+    def close(self):
+        """Stop all client streams."""
+        with self.condition:
+            self.closed = True
+            self.generation += 1
+            self.condition.notify_all()
+
+    def get_stats(self) -> Dict:
+        """
+        Get broadcast statistics.
+
+        Returns:
+            Dictionary with client and encoded frame counts
+        """
+        return {
+            'clients': len(self.clients),
+            'encoded_frames': self.encoded,
+            'encoded_variants': self.encoded_variants,
+            'stalled_clients': self.stalled
+        }
+
+    def get_client_stats(self) -> List[Dict]:
+        """
+        Get per-client send queue statistics.
+
+        Returns:
+            List of dictionaries with queued frames and bytes, sent and
+            dropped frames and idle time of every connected client
+        """
+        with self.condition:
+            now = self.clock()
+            return [client.stats(now) for client in self.clients.values()]
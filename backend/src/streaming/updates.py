@@ -0,0 +1,422 @@
+"""
+Change-driven system state updates for dashboard clients.
+"""
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .wire import FORMATS, encode_state_message
+
+def snapshot_state(value: Any, ignore_keys: Iterable[str] = ()) -> Any:
+    """
+    Copy a state into plain dicts and lists, leaving out volatile keys.
+
+    Tuples become lists so a snapshot compares equal to its JSON form.
+
+    Args:
+        value: State made of dicts, lists, tuples and scalars
+        ignore_keys: Dictionary keys to leave out at any depth
+
+    Returns:
+        Independent copy of the state
+    """
+    if isinstance(value, dict):
+        return {
+            key: snapshot_state(item, ignore_keys)
+            for key, item in value.items()
+            if key not in ignore_keys
+        }
+    if isinstance(value, (list, tuple)):
+        return [snapshot_state(item, ignore_keys) for item in value]
+    return value
+
+# Traffic data keyed by lane name, narrowed to a client's lanes
+LANE_KEYS = ('vehicle_counts', 'lanes', 'tracks')
+
+def filter_lanes(state: Dict, lanes: Optional[FrozenSet[str]]) -> Dict:
+    """
+    Narrow the per-lane traffic data of a state to some lanes.
+
+    Args:
+        state: State snapshot
+        lanes: Lane names to keep, None for all
+
+    Returns:
+        The state itself if lanes is None, otherwise a shallow copy holding
+        only those lanes
+    """
+    if lanes is None or 'traffic' not in state:
+        return state
+    traffic = dict(state['traffic'])
+    for key in LANE_KEYS:
+        if isinstance(traffic.get(key), dict):
+            traffic[key] = {lane: value for lane, value in traffic[key].items() if lane in lanes}
+    return dict(state, traffic=traffic)
+
+def diff_state(old: Dict, new: Dict) -> Tuple[Dict, List[List[str]]]:
+    """
+    Compute the changes turning one state snapshot into another.
+
+    Dictionaries are compared key by key at any depth; any other value is
+    replaced as a whole when it differs.
+
+    Args:
+        old: Previous snapshot
+        new: Current snapshot
+
+    Returns:
+        Tuple of a partial state holding every changed value and the key
+        paths that were removed
+    """
+    changed = {}
+    removed = [[key] for key in old if key not in new]
+    for key, value in new.items():
+        if key not in old:
+            changed[key] = value
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            nested_changed, nested_removed = diff_state(old[key], value)
+            if nested_changed:
+                changed[key] = nested_changed
+            removed.extend([key] + path for path in nested_removed)
+        elif value != old[key]:
+            changed[key] = value
+    return changed, removed
+
+def apply_delta(state: Dict, changed: Dict, removed: List[List[str]] = ()) -> Dict:
+    """
+    Apply the output of diff_state() to a state in place.
+
+    Args:
+        state: State to update
+        changed: Partial state of changed values
+        removed: Key paths to delete
+
+    Returns:
+        The updated state
+    """
+    for path in removed:
+        target = state
+        for key in path[:-1]:
+            target = target.get(key, {})
+        target.pop(path[-1], None)
+    for key, value in changed.items():
+        if isinstance(value, dict) and isinstance(state.get(key), dict):
+            apply_delta(state[key], value)
+        else:
+            state[key] = value
+    return state
+
+def _payload_size(payload: Any) -> int:
+    """Size of a message on the wire, for statistics."""
+    if isinstance(payload, bytes):
+        return len(payload)
+    return len(json.dumps(payload, separators=(',', ':')))
+
+class UpdatePublisher:
+    """Sends system state to clients only when it changes.
+
+    Every change of the state, ignoring volatile keys such as timestamps,
+    gets a new version number. A client first receives the full state and
+    afterwards deltas against the last version it acknowledged. Only one
+    message per client is unacknowledged at a time, so a slow client simply
+    gets a larger delta later, and bursts of changes are coalesced to at
+    most max_rate messages per second. A client whose acknowledgement of a
+    delta does not arrive within resync_timeout gets the full state again,
+    and a client that acknowledges nothing for stall_timeout is
+    disconnected.
+
+    Clients choose JSON messages or the compact binary format of the wire
+    module when they connect, and may subscribe to some lanes only. Clients
+    with the same version, format and lanes form a group that gets one
+    message, encoded once and sent to all of its members in a single emit.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, Any, List[str]], None],
+        max_rate: float = 5.0,
+        resync_timeout: float = 5.0,
+        stall_timeout: float = 30.0,
+        disconnect: Optional[Callable[[str], None]] = None,
+        ignore_keys: Iterable[str] = ('timestamp',),
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the publisher.
+
+        Args:
+            send: Function sending an event with a JSON payload or bytes
+                to a list of client ids
+            max_rate: Maximum messages per second, 0 for no limit
+            resync_timeout: Seconds to wait for an acknowledgement before
+                sending the full state again
+            stall_timeout: Seconds a client may leave a message
+                unacknowledged before it is disconnected
+            disconnect: Function disconnecting a client id, stalled clients
+                are only forgotten if None
+            ignore_keys: Keys whose changes alone do not make a new version
+            clock: Monotonic time source
+        """
+        self.send = send
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.resync_timeout = resync_timeout
+        self.stall_timeout = stall_timeout
+        self.disconnect = disconnect
+        self.ignore_keys = frozenset(ignore_keys)
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.version = 0
+        self.state: Dict = {}
+        self.snapshots: Dict[int, Dict] = {0: self.state}
+        self.clients: Dict[str, Dict] = {}
+        self.last_send = None
+        self.changes = 0
+        self.full_sent = 0
+        self.deltas_sent = 0
+        self.emits = 0
+        self.stalled = 0
+        self.logger = logging.getLogger(__name__)
+
+    def update(self, state: Dict) -> int:
+        """
+        Offer the current state, sending changes if the rate allows.
+
+        Call this whenever the state may have changed; pending changes are
+        sent by the first call after the rate limit has passed.
+
+        Args:
+            state: Current system state
+
+        Returns:
+            Number of messages sent
+        """
+        snapshot = snapshot_state(state, self.ignore_keys)
+        with self.lock:
+            if snapshot != self.state:
+                self.version += 1
+                self.state = snapshot
+                self.snapshots[self.version] = snapshot
+                self.changes += 1
+                self._prune()
+
+            now = self.clock()
+            if self.last_send is not None and now - self.last_send < self.min_interval:
+                return 0
+            stalled = self._drop_stalled(now)
+            sent = self._send_pending(now)
+            if sent:
+                self.last_send = now
+
+        # Disconnecting calls back into remove_client, so not under the lock
+        if self.disconnect is not None:
+            for sid in stalled:
+                self.disconnect(sid)
+        return sent
+
+    def _drop_stalled(self, now: float) -> List[str]:
+        """Forget clients that acknowledged nothing for stall_timeout."""
+        stalled = [
+            sid for sid, client in self.clients.items()
+            if client['waiting_since'] is not None and now - client['waiting_since'] >= self.stall_timeout
+        ]
+        for sid in stalled:
+            del self.clients[sid]
+            self.stalled += 1
+            self.logger.warning(f"Disconnecting stalled update client {sid}")
+        if stalled:
+            self._prune()
+        return stalled
+
+    def _send_pending(self, now: float) -> int:
+        """Send deltas to idle clients and resyncs to unresponsive ones."""
+        groups: Dict[Tuple[int, str, Optional[FrozenSet[str]]], List[str]] = {}
+        sent = 0
+        for sid, client in self.clients.items():
+            if client['waiting_since'] is not None:
+                # A lost delta ack is recovered with the full state; a client
+                # still busy with a full state gets nothing more to buffer
+                if client['acked'] is not None and now - client['sent_at'] >= self.resync_timeout:
+                    self._send_full(sid, client, now)
+                    sent += 1
+                continue
+            if client['acked'] != self.version:
+                groups.setdefault((client['acked'], client['format'], client['lanes']), []).append(sid)
+
+        # Each group shares one encoded delta and one emit
+        for (base, format, lanes), sids in groups.items():
+            encoded = self._encode_delta(base, format, lanes)
+            if encoded is None:
+                # Nothing the group subscribed to changed; a later delta
+                # from the same base will carry whatever does
+                continue
+            size = _payload_size(encoded[1])
+            for sid in sids:
+                client = self.clients[sid]
+                client['sent'] = self.version
+                client['sent_at'] = now
+                client['waiting_since'] = now
+                client['queued_bytes'] = size
+                client['skipped_versions'] += self.version - base - 1
+            self.send(*encoded, sids)
+            self.emits += 1
+            self.deltas_sent += len(sids)
+            sent += len(sids)
+        return sent
+
+    def _encode_delta(self, base: int, format: str, lanes: Optional[FrozenSet[str]]) -> Optional[Tuple[str, Any]]:
+        """Build the delta from a base version to the current state, None if empty."""
+        base_state = filter_lanes(self.snapshots[base], lanes)
+        state = filter_lanes(self.state, lanes)
+        changed, removed = diff_state(base_state, state)
+        if not changed and not removed:
+            return None
+        message = {
+            'base': base,
+            'version': self.version,
+            'changed': changed,
+            'removed': removed,
+            'timestamp': datetime.now().isoformat()
+        }
+        if format == 'binary':
+            return 'state_binary', encode_state_message(message, state, base_state)
+        return 'state_delta', message
+
+    def _send_full(self, sid: str, client: Dict, now: float):
+        """Send the complete current state to a client."""
+        state = filter_lanes(self.state, client['lanes'])
+        message = {
+            'version': self.version,
+            'state': state,
+            'timestamp': datetime.now().isoformat()
+        }
+        if client['format'] == 'binary':
+            event, payload = 'state_binary', encode_state_message(message, state)
+        else:
+            event, payload = 'state_sync', message
+        self.send(event, payload, [sid])
+        self.emits += 1
+        if client['waiting_since'] is None:
+            client['waiting_since'] = now
+        client['queued_bytes'] = _payload_size(payload)
+        client['sent'] = self.version
+        client['acked'] = None
+        client['sent_at'] = now
+        self.full_sent += 1
+
+    def add_client(self, sid: str, format: str = 'json', lanes: Optional[Iterable[str]] = None):
+        """
+        Register a client and send it the full state.
+
+        Args:
+            sid: Client id
+            format: Message format, 'json' or 'binary'
+            lanes: Lane names the client receives traffic data for, None for all
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Unknown update format: {format}")
+        client = {
+            'sent': None,
+            'acked': None,
+            'sent_at': 0.0,
+            'waiting_since': None,
+            'queued_bytes': 0,
+            'skipped_versions': 0,
+            'format': format,
+            'lanes': None if lanes is None else frozenset(lanes)
+        }
+        with self.lock:
+            self.clients[sid] = client
+            self._send_full(sid, client, self.clock())
+
+    def resync(self, sid: str):
+        """
+        Send the full state again, e.g. after a client lost track.
+
+        Args:
+            sid: Client id
+        """
+        with self.lock:
+            client = self.clients.get(sid)
+            if client is not None:
+                self._send_full(sid, client, self.clock())
+
+    def acknowledge(self, sid: str, version: int):
+        """
+        Record that a client applied a version.
+
+        Args:
+            sid: Client id
+            version: Version number the client now holds
+        """
+        with self.lock:
+            client = self.clients.get(sid)
+            if client is None or version != client['sent']:
+                return
+            client['acked'] = version
+            client['waiting_since'] = None
+            client['queued_bytes'] = 0
+            self._prune()
+
+    def remove_client(self, sid: str):
+        """
+        Forget a disconnected client.
+
+        Args:
+            sid: Client id
+        """
+        with self.lock:
+            self.clients.pop(sid, None)
+            self._prune()
+
+    def _prune(self):
+        """Drop snapshots that no client can need as a delta base anymore."""
+        keep = {self.version}
+        for client in self.clients.values():
+            keep.update((client['sent'], client['acked']))
+        for version in [version for version in self.snapshots if version not in keep]:
+            del self.snapshots[version]
+
+    def get_stats(self) -> Dict:
+        """
+        Get publisher statistics.
+
+        Returns:
+            Dictionary with client counts, current version and message counters
+        """
+        return {
+            'clients': len(self.clients),
+            'binary_clients': sum(client['format'] == 'binary' for client in self.clients.values()),
+            'version': self.version,
+            'changes': self.changes,
+            'full_sent': self.full_sent,
+            'deltas_sent': self.deltas_sent,
+            'emits': self.emits,
+            'stalled_clients': self.stalled
+        }
+
+    def get_client_stats(self) -> Dict[str, Dict]:
+        """
+        Get per-client delivery statistics.
+
+        Returns:
+            Dictionary mapping client ids to their format, acknowledged
+            version, versions behind, bytes of the unacknowledged message,
+            versions skipped by coalescing and seconds waiting for an ack
+        """
+        with self.lock:
+            now = self.clock()
+            return {
+                sid: {
+                    'format': client['format'],
+                    'lanes': None if client['lanes'] is None else sorted(client['lanes']),
+                    'acked_version': client['acked'],
+                    'lag': None if client['acked'] is None else self.version - client['acked'],
+                    'queued_bytes': client['queued_bytes'],
+                    'skipped_versions': client['skipped_versions'],
+                    'waiting_seconds': 0.0 if client['waiting_since'] is None else now - client['waiting_since']
+                }
+                for sid, client in self.clients.items()
+            }
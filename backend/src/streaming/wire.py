@@ -0,0 +1,260 @@
+"""
+Compact binary wire format for dashboard updates.
+
+Numbers that change every update, the per-lane vehicle counts and the
+signal states, are packed with fixed struct layouts and the names they
+belong to are only sent when they change. Everything else, which changes
+rarely, follows as a JSON tail that is left out when empty.
+
+State messages (UpdatePublisher, event ``state_binary``)::
+
+    header   <BIid   kind (1 sync, 2 delta), version, base (-1 for sync),
+                     unix timestamp
+    counts   <H      lane count n, then n x <H vehicle counts
+    signals  <H      signal count m, then m x <B state codes
+    flags    <B      bit 0: emergency mode
+    tail             UTF-8 JSON, possibly empty: 'schema' with the lane and
+                     signal names, 'state' for a sync, 'changed' and
+                     'removed' for a delta
+
+Traffic updates (web_interface demo, event ``traffic_update_binary``)::
+
+    header   <dBff   unix timestamp (0 if none), signal state code, elapsed
+                     and total signal time
+    lanes    <H      lane count n, then n x <II cars and wait time
+    tail             UTF-8 JSON with the lane names and recommendations
+"""
+import json
+import struct
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+FORMATS = ('json', 'binary')
+
+SIGNAL_STATES = ('red', 'yellow', 'green', 'flashing_yellow')
+UNKNOWN_SIGNAL = 255
+_SIGNAL_CODES = {name: code for code, name in enumerate(SIGNAL_STATES)}
+
+KIND_SYNC = 1
+KIND_DELTA = 2
+
+_HEADER = struct.Struct('<BIid')
+_COUNT = struct.Struct('<H')
+_FLAGS = struct.Struct('<B')
+_TRAFFIC_HEADER = struct.Struct('<dBff')
+
+# State paths carried in the fixed layout instead of the JSON tail
+_HOT_PATHS = (('traffic', 'vehicle_counts'), ('signals', 'signals'), ('signals', 'emergency_mode'))
+
+def _signal_code(state) -> int:
+    """Map a signal state name to its code."""
+    code = _SIGNAL_CODES.get(state)
+    if code is None:
+        code = _SIGNAL_CODES.get(str(state).lower(), UNKNOWN_SIGNAL)
+    return code
+
+def _signal_name(code: int) -> Optional[str]:
+    """Map a signal state code back to its name."""
+    return SIGNAL_STATES[code] if code < len(SIGNAL_STATES) else None
+
+def _timestamp(message: Dict) -> float:
+    """Get a message's ISO timestamp as unix time."""
+    return datetime.fromisoformat(message['timestamp']).timestamp()
+
+def _schema(state: Dict) -> Dict[str, List[str]]:
+    """Names of the lanes and signals, in packing order."""
+    return {
+        'lanes': list(state.get('traffic', {}).get('vehicle_counts', {})),
+        'signals': list(state.get('signals', {}).get('signals', {}))
+    }
+
+def _same_schema(state: Dict, other: Dict) -> bool:
+    """Check that two states pack the same names in the same order."""
+    for key, field in _HOT_PATHS[:2]:
+        names = state.get(key, {}).get(field, {})
+        other_names = other.get(key, {}).get(field, {})
+        if names.keys() != other_names.keys() or list(names) != list(other_names):
+            return False
+    return True
+
+def _without_hot(state: Dict) -> Dict:
+    """Copy the top two levels of a state without the packed fields."""
+    result = {}
+    for key, value in state.items():
+        if isinstance(value, dict):
+            value = {k: v for k, v in value.items() if (key, k) not in _HOT_PATHS}
+            if not value:
+                continue
+        result[key] = value
+    return result
+
+@lru_cache(maxsize=64)
+def _array_layout(fmt: str, length: int) -> struct.Struct:
+    """Get the struct of a length prefixed array."""
+    return struct.Struct(f'<H{length}{fmt}')
+
+def _pack_array(fmt: str, values: List[int]) -> bytes:
+    """Pack a length prefixed array of unsigned integers."""
+    return _array_layout(fmt, len(values)).pack(len(values), *values)
+
+def _unpack_array(fmt: str, data: bytes, offset: int) -> Tuple[List[int], int]:
+    """Unpack a length prefixed array, returning it and the new offset."""
+    (length,) = _COUNT.unpack_from(data, offset)
+    layout = _array_layout(fmt, length)
+    return list(layout.unpack_from(data, offset)[1:]), offset + layout.size
+
+def _tail(values: Dict) -> bytes:
+    """Encode the JSON tail, empty when there is nothing to send."""
+    return json.dumps(values, separators=(',', ':')).encode('utf-8') if values else b''
+
+def encode_state_message(message: Dict, state: Dict, base_state: Optional[Dict] = None) -> bytes:
+    """
+    Encode an UpdatePublisher message in the compact binary format.
+
+    Args:
+        message: state_sync or state_delta message
+        state: Full state at the message's version
+        base_state: State at the delta's base version, None for a sync
+
+    Returns:
+        Encoded message
+    """
+    traffic = state.get('traffic', {})
+    signals = state.get('signals', {})
+
+    if base_state is None:
+        header = _HEADER.pack(KIND_SYNC, message['version'], -1, _timestamp(message))
+        tail = {'schema': _schema(state), 'state': _without_hot(state)}
+    else:
+        header = _HEADER.pack(KIND_DELTA, message['version'], message['base'], _timestamp(message))
+        tail = {}
+        if not _same_schema(state, base_state):
+            tail['schema'] = _schema(state)
+        changed = _without_hot(message['changed'])
+        if changed:
+            tail['changed'] = changed
+        if message['removed']:
+            tail['removed'] = message['removed']
+
+    counts = [min(max(count, 0), 0xFFFF) for count in traffic.get('vehicle_counts', {}).values()]
+    codes = [_signal_code(value) for value in signals.get('signals', {}).values()]
+    flags = 1 if signals.get('emergency_mode') else 0
+    return b''.join((
+        header,
+        _pack_array('H', counts),
+        _pack_array('B', codes),
+        _FLAGS.pack(flags),
+        _tail(tail)
+    ))
+
+def decode_state_message(data: bytes, schema: Optional[Dict] = None) -> Tuple[str, Dict, Dict]:
+    """
+    Decode a compact state message back into its JSON form.
+
+    The packed fields are returned in full, so a decoded delta is applied
+    with apply_delta() like a JSON delta.
+
+    Args:
+        data: Encoded message
+        schema: Schema of the previous message, needed for deltas that
+            do not carry one
+
+    Returns:
+        Tuple of event name, message and the schema to keep for the next
+        message
+    """
+    kind, version, base, timestamp = _HEADER.unpack_from(data)
+    counts, offset = _unpack_array('H', data, _HEADER.size)
+    codes, offset = _unpack_array('B', data, offset)
+    (flags,) = _FLAGS.unpack_from(data, offset)
+    offset += _FLAGS.size
+    tail = json.loads(data[offset:].decode('utf-8')) if len(data) > offset else {}
+    schema = tail.get('schema', schema)
+    if schema is None:
+        raise ValueError("Delta without schema")
+
+    hot = {
+        'traffic': {'vehicle_counts': dict(zip(schema['lanes'], counts))},
+        'signals': {
+            'signals': dict(zip(schema['signals'], (_signal_name(code) for code in codes))),
+            'emergency_mode': bool(flags & 1)
+        }
+    }
+    iso_timestamp = datetime.fromtimestamp(timestamp).isoformat()
+
+    if kind == KIND_SYNC:
+        state = tail.get('state', {})
+        for key, values in hot.items():
+            state.setdefault(key, {}).update(values)
+        return 'state_sync', {'version': version, 'state': state, 'timestamp': iso_timestamp}, schema
+
+    changed = tail.get('changed', {})
+    for key, values in hot.items():
+        changed.setdefault(key, {}).update(values)
+    message = {
+        'base': base,
+        'version': version,
+        'changed': changed,
+        'removed': tail.get('removed', []),
+        'timestamp': iso_timestamp
+    }
+    return 'state_delta', message, schema
+
+def encode_traffic_update(data: Dict) -> bytes:
+    """
+    Encode a web interface traffic_update payload.
+
+    Args:
+        data: Payload with 'lanes', 'signal_state', 'recommendations' and
+            an ISO 'timestamp'
+
+    Returns:
+        Encoded payload
+    """
+    signal = data.get('signal_state', {})
+    lanes = data.get('lanes', {})
+    timestamp = _timestamp(data) if 'timestamp' in data else 0.0
+    values = []
+    for lane in lanes.values():
+        values.extend((max(int(lane['cars']), 0), max(int(lane['wait_time']), 0)))
+    return b''.join((
+        _TRAFFIC_HEADER.pack(
+            timestamp,
+            _signal_code(signal.get('state')),
+            float(signal.get('elapsed_time', 0)),
+            float(signal.get('total_duration', 0))
+        ),
+        _COUNT.pack(len(lanes)),
+        struct.pack(f'<{2 * len(lanes)}I', *values),
+        _tail({'lanes': list(lanes), 'recommendations': data.get('recommendations', [])})
+    ))
+
+def decode_traffic_update(data: bytes) -> Dict:
+    """
+    Decode a payload written by encode_traffic_update().
+
+    Args:
+        data: Encoded payload
+
+    Returns:
+        traffic_update payload
+    """
+    timestamp, code, elapsed, total = _TRAFFIC_HEADER.unpack_from(data)
+    offset = _TRAFFIC_HEADER.size
+    (length,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    layout = struct.Struct(f'<{2 * length}I')
+    values = layout.unpack_from(data, offset)
+    tail = json.loads(data[offset + layout.size:].decode('utf-8'))
+    update = {
+        'lanes': {
+            name: {'cars': values[2 * index], 'wait_time': values[2 * index + 1]}
+            for index, name in enumerate(tail['lanes'])
+        },
+        'signal_state': {'state': _signal_name(code), 'elapsed_time': elapsed, 'total_duration': total},
+        'recommendations': tail['recommendations']
+    }
+    if timestamp:
+        update['timestamp'] = datetime.fromtimestamp(timestamp).isoformat()
+    return update
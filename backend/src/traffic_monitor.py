@@ -3,11 +3,14 @@ Traffic monitoring module for the Smart Traffic Management System.
 """
 import cv2
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
 from datetime import datetime
-from src.vehicle_detection.detector import CarDetector
+from src.vehicle_detection.lane_counter import LaneCounter
+from src.vehicle_detection.workers import DetectionWorkerPool
+from src.vehicle_detection.tracking import DetectionTracker, VehicleTracker
 from src.camera.camera_manager import CameraManager
+from src.overlay import LaneOverlay
 from config.settings import (
     CAMERA_SETTINGS,
     LANES,
@@ -15,25 +18,80 @@ from config.settings import (
 )
 
 class TrafficMonitor:
-    def __init__(self):
-        """Initialize the traffic monitoring system."""
-        self.camera = CameraManager(CAMERA_SETTINGS['source'])
-        self.car_detector = CarDetector(
-            model_path=DETECTION_SETTINGS['model_path'],
-            conf_threshold=DETECTION_SETTINGS['confidence_threshold']
-        )
-        self.lanes = LANES
+    def __init__(self, camera=None, lanes: Optional[Dict] = None):
+        """
+        Initialize the traffic monitoring system.
+        
+        Args:
+            camera: Camera to read from, e.g. a MultiCameraManager source
+                handle, a CameraManager for CAMERA_SETTINGS['source'] if None
+            lanes: Lane regions of this camera, LANES if None
+        """
+        # Detection in worker processes needs frames in shared memory
+        self.worker_settings = DETECTION_SETTINGS.get('workers', {})
+        self.detection_workers = None
+        self._result_seq = 0
+        if camera is None:
+            slots = self.worker_settings.get('ring_slots', 8) if self.worker_settings.get('processes', 0) else None
+            camera = CameraManager(CAMERA_SETTINGS['source'], shared_memory_slots=slots)
+        self.camera = camera
+        self.configured_lanes = lanes if lanes is not None else LANES
+        self.lanes = self.configured_lanes
         self.vehicle_counts = {lane: 0 for lane in self.lanes}
         self.last_update = datetime.now()
         self.frame_interval = DETECTION_SETTINGS['frame_interval']
+        self.overlay = LaneOverlay()
+        
+        # Lane counting with the configured backend, profiles, tiling and
+        # motion gate, shared with the offline analysis and worker processes
+        self.counter = LaneCounter(self.lanes)
+        self.car_detector = self.counter.detector
+        
+        # Optional detect-then-track mode with per-vehicle IDs
+        self.mode = DETECTION_SETTINGS.get('mode', 'interval')
+        self.tracking = None
+        self.lane_tracks = {lane: [] for lane in self.lanes}
+        if self.mode == 'tracking':
+            tracking_settings = DETECTION_SETTINGS.get('tracking', {})
+            self.tracking = DetectionTracker(
+                self.counter,
+                detect_every=tracking_settings.get('detect_every', 5),
+                tracker=VehicleTracker(
+                    iou_threshold=tracking_settings.get('iou_threshold', 0.3),
+                    max_misses=tracking_settings.get('max_misses', 2),
+                    min_hits=tracking_settings.get('min_hits', 2)
+                )
+            )
         logging.info("Traffic monitor initialized successfully")
 
+    def _fit_lanes(self):
+        """Scale the configured lanes to the resolution the camera negotiated.
+
+        Cameras keep their native resolution instead of resizing every
+        frame, so lanes drawn for CAMERA_SETTINGS' size are mapped once here.
+        """
+        if not hasattr(self.camera, 'scale_regions'):
+            return
+        lanes = self.camera.scale_regions(self.configured_lanes)
+        if lanes == self.lanes:
+            return
+        logging.info(f"Scaled lanes to {self.camera.frame_width}x{self.camera.frame_height} frames")
+        self.lanes = lanes
+        self.counter.set_lanes(lanes)
+
     def start(self) -> bool:
         """Start the traffic monitoring system."""
         try:
             if not self.camera.start():
                 logging.error("Failed to start camera")
                 return False
+            # Capture into reused buffers instead of a new frame each time.
+            # process_frame() holds one frame at a time, and a pipeline
+            # resizes the ring to the frames it keeps in flight.
+            if getattr(self.camera, 'frame_buffers', None) == 0:
+                self.camera.set_frame_buffers(2)
+            self._fit_lanes()
+            self._start_workers()
             logging.info("Traffic monitoring started successfully")
             return True
         except Exception as e:
@@ -42,80 +100,144 @@ class TrafficMonitor:
 
     def stop(self):
         """Stop the traffic monitoring system."""
+        if self.detection_workers is not None:
+            self.detection_workers.close()
+            self.detection_workers = None
         self.camera.stop()
+        self.counter.close()
         logging.info("Traffic monitoring stopped")
 
-    def count_vehicles_in_lane(self, frame: np.ndarray, lane_name: str) -> int:
+    def _start_workers(self):
+        """Start detection processes if enabled and the camera shares its frames."""
+        processes = self.worker_settings.get('processes', 0)
+        ring = getattr(self.camera, 'shared_ring', None)
+        if not processes or self.detection_workers is not None:
+            return
+        if ring is None:
+            logging.warning("Camera has no shared memory ring, detecting in process")
+            return
+        self.detection_workers = DetectionWorkerPool(
+            ring.spec,
+            self.lanes,
+            processes=processes,
+            settings=DETECTION_SETTINGS
+        )
+        self.detection_workers.start()
+
+    def process_frame(self):
         """
-        Count vehicles in a specific lane.
+        Process a frame from the camera.
+        
+        Runs the capture, detection and annotation stages in sequence on the
+        calling thread.
+        
+        Returns:
+            Tuple of processed frame and vehicle counts, or None if processing fails
+        """
+        frame = self.capture_frame()
+        if frame is None:
+            return None, self.vehicle_counts
+        return self.analyze_frame(frame)
+
+    def analyze_frame(self, frame: np.ndarray) -> Tuple[np.ndarray, Dict[str, int]]:
+        """
+        Run the detection and annotation stages on a frame captured elsewhere.
         
         Args:
-            frame: Input frame
-            lane_name: Name of the lane to count vehicles in
+            frame: Frame of this monitor's camera, drawn on in place
             
         Returns:
-            Number of vehicles detected in the lane
+            Tuple of annotated frame and vehicle counts
         """
-        # Get lane region
-        lane_region = self.lanes[lane_name]
-        
-        # Crop frame to lane region
-        lane_frame = frame[lane_region[1]:lane_region[3], lane_region[0]:lane_region[2]]
-        
-        # Detect vehicles in lane
-        detections = self.car_detector.detect_vehicles(lane_frame)
-        
-        return len(detections)
+        frame = self.annotate_frame(self.update_counts(frame))
+        return frame, self.vehicle_counts
 
-    def process_frame(self):
+    def capture_frame(self) -> Optional[np.ndarray]:
         """
-        Process a frame from the camera.
+        Capture stage: read the next frame from the camera.
+        
+        With detection workers the frame is read into shared memory and,
+        once per frame interval, handed to a worker by reference. The
+        returned frame is a private copy that later stages may draw on,
+        made into one of the camera's reused buffers when it has them.
         
         Returns:
-            Tuple of processed frame and vehicle counts, or None if processing fails
+            Frame, or None if capture fails
         """
-        frame = self.camera.get_frame()
-        if frame is None:
-            return None, self.vehicle_counts
+        if self.detection_workers is None:
+            return self.camera.get_frame()
             
-        # Update vehicle counts if enough time has passed
+        published = self.camera.publish_frame()
+        if published is None:
+            return None
+        slot, seq, timestamp = published
         current_time = datetime.now()
         if (current_time - self.last_update).total_seconds() >= self.frame_interval:
+            if self.detection_workers.submit(slot, seq, timestamp):
+                self.last_update = current_time
+        frame = self.camera.next_buffer()
+        if frame is None:
+            return self.camera.shared_ring.view(slot).copy()
+        np.copyto(frame, self.camera.shared_ring.view(slot))
+        return frame
+
+    def update_counts(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Detection stage: update vehicle counts from a frame.
+        
+        Args:
+            frame: Captured frame
+            
+        Returns:
+            The same frame, for the next stage
+        """
+        # Update vehicle counts from tracks on every frame in tracking mode,
+        # otherwise only if enough time has passed
+        current_time = datetime.now()
+        if self.detection_workers is not None:
+            # Counts come from the worker processes, newest frame wins
+            for seq, _, counts in self.detection_workers.poll():
+                if seq > self._result_seq:
+                    self._result_seq = seq
+                    self.vehicle_counts.update(counts)
+        elif self.tracking is not None:
+            tracks = self.tracking.process(frame, self.lanes)
             for lane in self.lanes:
-                self.vehicle_counts[lane] = self.count_vehicles_in_lane(frame, lane)
+                self.lane_tracks[lane] = tracks[lane].tolist()
+                self.vehicle_counts[lane] = len(tracks[lane])
+            self.last_update = current_time
+        elif (current_time - self.last_update).total_seconds() >= self.frame_interval:
+            self.vehicle_counts.update(self.counter.count(frame))
             self.last_update = current_time
             
-        # Draw lane regions and vehicle counts
-        for lane in self.lanes:
-            x1, y1, x2, y2 = self.lanes[lane]
-            
-            # Draw lane region
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            
-            # Draw lane name
-            cv2.putText(
-                frame,
-                lane,
-                (x1, y1 - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                (0, 255, 0),
-                2
-            )
-            
-            # Draw vehicle count
-            count = self.vehicle_counts[lane]
-            cv2.putText(
-                frame,
-                f"Count: {count}",
-                (x1, y2 + 20),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                (0, 255, 0),
-                2
-            )
+        return frame
+
+    def annotate_frame(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Annotation stage: draw lane regions and vehicle counts.
+        
+        Args:
+            frame: Frame to draw on, modified in place
             
-        return frame, self.vehicle_counts
+        Returns:
+            The annotated frame
+        """
+        # Composite the cached lane overlay, rebuilt only when counts change
+        return self.overlay.apply(frame, self.lanes, self.vehicle_counts)
+
+    def get_detection_stats(self) -> Dict:
+        """
+        Get statistics about skipped detections.
+        
+        Returns:
+            Dictionary with motion gate statistics, empty if the gate is
+            disabled, and worker statistics under 'workers' if detection
+            runs in worker processes
+        """
+        stats = self.counter.get_stats()
+        if self.detection_workers is not None:
+            stats['workers'] = self.detection_workers.get_stats()
+        return stats
 
     def get_traffic_data(self) -> Dict:
         """
@@ -124,8 +246,81 @@ class TrafficMonitor:
         Returns:
             Dictionary containing traffic data
         """
-        return {
+        data = {
             'vehicle_counts': self.vehicle_counts,
             'timestamp': datetime.now().isoformat(),
             'lanes': self.lanes
-        } 
\ No newline at end of file
+        }
+        if self.tracking is not None:
+            data['tracks'] = self.lane_tracks
+        return data 
+
+class MultiSourceMonitor:
+    """Runs one TrafficMonitor per source of a MultiCameraManager.
+
+    Frames reach detection through the manager's round-robin next_frame(),
+    so one detection thread serves every intersection and a fast source
+    cannot starve the others. Each source's frames are copied into its own
+    reused buffer.
+    """
+
+    def __init__(self, manager, lanes: Optional[Dict[str, Dict]] = None):
+        """
+        Initialize the monitors.
+
+        Args:
+            manager: MultiCameraManager providing the frames, started by its owner
+            lanes: Dictionary mapping source names to their lane regions,
+                LANES for sources without an entry
+        """
+        lanes = lanes or {}
+        self.manager = manager
+        self.monitors = {
+            name: TrafficMonitor(camera=manager.camera(name), lanes=lanes.get(name))
+            for name in manager.names
+        }
+        self.buffers = {}
+        self.processed = {name: 0 for name in manager.names}
+
+    def start(self) -> bool:
+        """Start every monitor once the manager is decoding."""
+        if not all(monitor.start() for monitor in self.monitors.values()):
+            return False
+        self.buffers = {
+            name: np.empty(self.manager.sources[name].camera.frame_shape, dtype=np.uint8)
+            for name in self.monitors
+        }
+        return True
+
+    def stop(self):
+        """Stop every monitor, leaving the shared manager to its owner."""
+        for monitor in self.monitors.values():
+            monitor.stop()
+
+    def process_next(self, timeout: float = 1.0) -> Optional[Tuple[str, np.ndarray, Dict[str, int]]]:
+        """
+        Detect and annotate the next frame the manager hands out.
+
+        Args:
+            timeout: Seconds to wait for a new frame of any source
+
+        Returns:
+            Tuple of source name, annotated frame and the source's vehicle
+            counts, or None on timeout
+        """
+        result = self.manager.next_frame(out=self.buffers or None, timeout=timeout)
+        if result is None:
+            return None
+        name, frame, _ = result
+        frame, counts = self.monitors[name].analyze_frame(frame)
+        self.processed[name] += 1
+        return name, frame, counts
+
+    def get_traffic_data(self) -> Dict[str, Dict]:
+        """
+        Get current traffic data of every source.
+
+        Returns:
+            Dictionary mapping source names to TrafficMonitor.get_traffic_data()
+        """
+        return {name: monitor.get_traffic_data() for name, monitor in self.monitors.items()}
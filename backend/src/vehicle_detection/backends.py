@@ -0,0 +1,221 @@
+"""
+Detection backends used by the car detector.
+"""
+import cv2
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+import os
+from src.vehicle_detection.boxes import filter_by_size, non_max_suppression
+
+# COCO class IDs for car, motorcycle, bus and truck
+VEHICLE_CLASS_IDS = (2, 3, 5, 7)
+
+class DetectorBackend(ABC):
+    """Interface for the models behind CarDetector."""
+
+    # Whether the backend expects preprocessed grayscale input
+    grayscale = True
+
+    @abstractmethod
+    def detect(self, image: np.ndarray, profile: Optional[Dict] = None) -> np.ndarray:
+        """
+        Detect vehicles in a single image.
+
+        Args:
+            image: Input image, grayscale if the backend requests it
+            profile: Optional detection profile with 'min_size', 'max_size'
+                and 'scale_factor' limiting the searched vehicle sizes
+
+        Returns:
+            Array of detections [[x, y, w, h], ...] of shape (N, 4)
+        """
+
+    def clone(self) -> 'DetectorBackend':
+        """
+        Get a backend that can run concurrently with this one.
+
+        Backends that are safe to share between threads return themselves.
+
+        Returns:
+            Backend for use on another thread
+        """
+        return self
+
+    def detect_batch(self, images: Sequence[np.ndarray]) -> List[np.ndarray]:
+        """
+        Detect vehicles in several images.
+
+        Args:
+            images: Input images
+
+        Returns:
+            List of detection arrays, one per image
+        """
+        return [self.detect(image) for image in images]
+
+class HaarCascadeBackend(DetectorBackend):
+    """Backend running an OpenCV Haar cascade."""
+
+    def __init__(
+        self,
+        model_path: str,
+        scale_factor: float = 1.1,
+        min_neighbors: int = 5,
+        min_size: Tuple[int, int] = (30, 30)
+    ):
+        """
+        Initialize the Haar cascade backend.
+
+        Args:
+            model_path: Path to the cascade XML file
+            scale_factor: Scale step between detection pyramid levels
+            min_neighbors: Neighbors required to keep a candidate
+            min_size: Minimum vehicle size in pixels
+        """
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model not found at {model_path}")
+        self.model_path = model_path
+        self.cascade = cv2.CascadeClassifier(model_path)
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = tuple(min_size)
+
+    def clone(self) -> 'HaarCascadeBackend':
+        # A cascade keeps per-image state while detecting, so every thread
+        # needs its own copy
+        return HaarCascadeBackend(self.model_path, self.scale_factor, self.min_neighbors, self.min_size)
+
+    def detect(self, image: np.ndarray, profile: Optional[Dict] = None) -> np.ndarray:
+        if not profile:
+            cars = self.cascade.detectMultiScale(
+                image,
+                scaleFactor=self.scale_factor,
+                minNeighbors=self.min_neighbors,
+                minSize=self.min_size
+            )
+            return np.asarray(cars, dtype=np.int32).reshape(-1, 4)
+
+        # Only search the pyramid levels the profile allows
+        min_size = tuple(profile.get('min_size', self.min_size))
+        max_size = tuple(profile.get('max_size', (0, 0)))
+        height, width = image.shape[:2]
+        if min_size[0] > width or min_size[1] > height:
+            return np.empty((0, 4), dtype=np.int32)
+        cars = self.cascade.detectMultiScale(
+            image,
+            scaleFactor=profile.get('scale_factor', self.scale_factor),
+            minNeighbors=self.min_neighbors,
+            minSize=min_size,
+            maxSize=max_size
+        )
+        return np.asarray(cars, dtype=np.int32).reshape(-1, 4)
+
+class OnnxDnnBackend(DetectorBackend):
+    """Backend running a YOLOv8 style ONNX model through cv2.dnn on the CPU.
+
+    Several images are packed into one blob and run in a single forward
+    pass. Batches larger than one require a model exported with a dynamic
+    batch dimension, e.g. ``yolo export model=yolov8n.pt format=onnx dynamic=True``.
+    """
+
+    grayscale = False
+
+    def __init__(
+        self,
+        model_path: str,
+        input_size: int = 640,
+        conf_threshold: float = 0.5,
+        nms_threshold: float = 0.45,
+        class_ids: Sequence[int] = VEHICLE_CLASS_IDS
+    ):
+        """
+        Initialize the ONNX backend.
+
+        Args:
+            model_path: Path to the ONNX model file
+            input_size: Square network input size in pixels
+            conf_threshold: Minimum class score for a detection
+            nms_threshold: IoU threshold for non-maximum suppression
+            class_ids: Model class IDs counted as vehicles
+        """
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model not found at {model_path}")
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.input_size = int(input_size)
+        self.conf_threshold = conf_threshold
+        self.nms_threshold = nms_threshold
+        self.class_ids = np.array(class_ids, dtype=np.int64)
+        self.batching = True
+        self.logger = logging.getLogger(__name__)
+
+    def detect(self, image: np.ndarray, profile: Optional[Dict] = None) -> np.ndarray:
+        cars = self.detect_batch([image])[0]
+        if profile:
+            # The network has no scale search to prune, so only filter sizes
+            cars = filter_by_size(cars, profile.get('min_size'), profile.get('max_size'))
+        return cars
+
+    def detect_batch(self, images: Sequence[np.ndarray]) -> List[np.ndarray]:
+        if not images:
+            return []
+
+        if self.batching and len(images) > 1:
+            try:
+                return self._forward(images)
+            except cv2.error as e:
+                self.logger.warning(f"Batched inference failed, falling back to single images: {e}")
+                self.batching = False
+
+        results = []
+        for image in images:
+            results.extend(self._forward([image]))
+        return results
+
+    def _forward(self, images: Sequence[np.ndarray]) -> List[np.ndarray]:
+        """Run one forward pass over a batch of images."""
+        blob = cv2.dnn.blobFromImages(
+            list(images),
+            scalefactor=1.0 / 255.0,
+            size=(self.input_size, self.input_size),
+            swapRB=True,
+            crop=False
+        )
+        self.net.setInput(blob)
+        outputs = self.net.forward()
+        return [
+            self.parse_output(output, image.shape[:2])
+            for output, image in zip(outputs, images)
+        ]
+
+    def parse_output(self, output: np.ndarray, image_shape: Tuple[int, int]) -> np.ndarray:
+        """
+        Convert raw YOLOv8 output for one image to vehicle boxes.
+
+        Args:
+            output: Array of shape (4 + classes, anchors) with center boxes
+                followed by class scores
+            image_shape: Height and width of the original image
+
+        Returns:
+            Array of detections [[x, y, w, h], ...] in image coordinates
+        """
+        predictions = np.asarray(output, dtype=np.float32).T
+        class_scores = predictions[:, 4:]
+        classes = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(classes)), classes]
+
+        mask = (scores >= self.conf_threshold) & np.isin(classes, self.class_ids)
+        if not mask.any():
+            return np.empty((0, 4), dtype=np.int32)
+
+        height, width = image_shape
+        scale = np.array([width, height, width, height], dtype=np.float32) / self.input_size
+        centers = predictions[mask, :4] * scale
+        boxes = np.concatenate([centers[:, :2] - centers[:, 2:] / 2.0, centers[:, 2:]], axis=1)
+
+        keep = non_max_suppression(boxes, scores[mask], self.nms_threshold)
+        return np.round(boxes[keep]).astype(np.int32).reshape(-1, 4)
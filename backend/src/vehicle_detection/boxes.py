@@ -0,0 +1,277 @@
+"""
+Vectorized bounding box utilities for vehicle detection.
+"""
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Regions are (x1, y1, x2, y2) rectangles, detections are [x, y, w, h] boxes
+Region = Tuple[int, int, int, int]
+
+
+def as_boxes(detections: np.ndarray) -> np.ndarray:
+    """
+    Normalize a detection array to shape (N, 4).
+
+    Args:
+        detections: Array of detections [[x, y, w, h], ...], possibly empty
+
+    Returns:
+        Integer array of shape (N, 4)
+    """
+    return np.asarray(detections, dtype=np.int32).reshape(-1, 4)
+
+
+def regions_bounding_box(regions: Dict[str, Region]) -> Region:
+    """
+    Compute the union bounding box of a set of regions.
+
+    Args:
+        regions: Dictionary mapping region names to (x1, y1, x2, y2)
+
+    Returns:
+        Union bounding box as (x1, y1, x2, y2)
+    """
+    rects = np.array(list(regions.values()), dtype=np.int32).reshape(-1, 4)
+    return (
+        int(rects[:, 0].min()),
+        int(rects[:, 1].min()),
+        int(rects[:, 2].max()),
+        int(rects[:, 3].max())
+    )
+
+
+def merge_regions(regions: Dict[str, Region]) -> List[Region]:
+    """
+    Group regions into the crops that cover them with the fewest pixels.
+
+    Two crops are replaced by their bounding box while it is no larger than
+    the two crops searched separately, as for touching lanes of the same
+    width or lanes that mostly overlap. Lanes that only share a corner, like
+    the arms of a crossing, stay separate crops.
+
+    Args:
+        regions: Dictionary mapping region names to (x1, y1, x2, y2)
+
+    Returns:
+        List of crops (x1, y1, x2, y2) covering every region
+    """
+    def area(rect: Region) -> int:
+        return max(rect[2] - rect[0], 0) * max(rect[3] - rect[1], 0)
+
+    crops = [tuple(int(value) for value in region) for region in regions.values()]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(crops)):
+            for j in range(i + 1, len(crops)):
+                a, b = crops[i], crops[j]
+                union = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                if area(union) <= area(a) + area(b):
+                    crops[i] = union
+                    del crops[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return crops
+
+
+def scale_regions(regions: Dict[str, Region], scale_x: float, scale_y: float) -> Dict[str, Region]:
+    """
+    Scale region coordinates to another frame size.
+
+    Args:
+        regions: Dictionary mapping region names to (x1, y1, x2, y2)
+        scale_x: Horizontal scale factor
+        scale_y: Vertical scale factor
+
+    Returns:
+        Dictionary of scaled integer regions
+    """
+    return {
+        name: (
+            int(round(x1 * scale_x)),
+            int(round(y1 * scale_y)),
+            int(round(x2 * scale_x)),
+            int(round(y2 * scale_y))
+        )
+        for name, (x1, y1, x2, y2) in regions.items()
+    }
+
+
+def tile_regions(width: int, height: int, tile_size: int, overlap: int) -> List[Region]:
+    """
+    Split an image into overlapping square tiles.
+
+    Tiles step by tile_size - overlap and the last tile of each row and
+    column is aligned to the image border, so every pixel is covered.
+    Vehicles no larger than the overlap lie whole inside at least one tile.
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        tile_size: Tile side length in pixels
+        overlap: Overlap between neighboring tiles in pixels
+
+    Returns:
+        List of tile regions (x1, y1, x2, y2)
+    """
+    if not 0 <= overlap < tile_size:
+        raise ValueError(f"Tile overlap must be in [0, {tile_size}), got {overlap}")
+
+    def starts(length: int) -> List[int]:
+        last = max(length - tile_size, 0)
+        positions = list(range(0, last + 1, tile_size - overlap))
+        if positions[-1] != last:
+            positions.append(last)
+        return positions
+
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in starts(height)
+        for x in starts(width)
+    ]
+
+
+def box_centroids(detections: np.ndarray) -> np.ndarray:
+    """
+    Compute the centroids of a set of boxes.
+
+    Args:
+        detections: Array of detections [[x, y, w, h], ...]
+
+    Returns:
+        Float array of shape (N, 2) with (cx, cy) per box
+    """
+    boxes = np.asarray(detections, dtype=np.float32).reshape(-1, 4)
+    return boxes[:, :2] + boxes[:, 2:] / 2.0
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Compute the pairwise intersection over union of two sets of boxes.
+
+    Args:
+        boxes_a: Array of boxes [[x, y, w, h], ...] of length N
+        boxes_b: Array of boxes [[x, y, w, h], ...] of length M
+
+    Returns:
+        Float array of shape (N, M) with the IoU of every pair
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 0] + a[:, None, 2], b[None, :, 0] + b[None, :, 2])
+    y2 = np.minimum(a[:, None, 1] + a[:, None, 3], b[None, :, 1] + b[None, :, 3])
+
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-6), 0.0)
+
+
+def non_max_suppression(detections: np.ndarray, scores: np.ndarray, iou_threshold: float = 0.45) -> np.ndarray:
+    """
+    Select the highest scoring boxes, suppressing overlapping ones.
+
+    The IoU of every pair is computed in one vectorized step, so only the
+    greedy selection itself loops over the boxes.
+
+    Args:
+        detections: Array of boxes [[x, y, w, h], ...]
+        scores: Score per box, higher is better
+        iou_threshold: Boxes overlapping a kept box by more than this are removed
+
+    Returns:
+        Indices of the kept boxes, highest score first
+    """
+    scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+    if scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+
+    order = np.argsort(-scores, kind='stable')
+    overlaps = iou_matrix(detections, detections)[np.ix_(order, order)] > iou_threshold
+
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for index in range(len(order)):
+        if suppressed[index]:
+            continue
+        keep.append(order[index])
+        suppressed |= overlaps[index]
+    return np.array(keep, dtype=np.int64)
+
+
+def filter_by_size(
+    detections: np.ndarray,
+    min_size: Optional[Tuple[int, int]] = None,
+    max_size: Optional[Tuple[int, int]] = None
+) -> np.ndarray:
+    """
+    Keep the boxes whose size lies within a range.
+
+    Args:
+        detections: Array of boxes [[x, y, w, h], ...]
+        min_size: Smallest allowed (width, height), unlimited if None
+        max_size: Largest allowed (width, height), unlimited if None
+
+    Returns:
+        Array of the boxes within the range, shape (M, 4)
+    """
+    boxes = as_boxes(detections)
+    keep = np.ones(len(boxes), dtype=bool)
+    if min_size is not None:
+        keep &= (boxes[:, 2] >= min_size[0]) & (boxes[:, 3] >= min_size[1])
+    if max_size is not None:
+        keep &= (boxes[:, 2] <= max_size[0]) & (boxes[:, 3] <= max_size[1])
+    return boxes[keep]
+
+
+def region_owners(detections: np.ndarray, regions: Dict[str, Region]) -> np.ndarray:
+    """
+    Find the index of the region containing each detection's centroid.
+
+    When regions overlap, the first matching region in iteration order wins.
+
+    Args:
+        detections: Array of detections [[x, y, w, h], ...] in frame coordinates
+        regions: Dictionary mapping region names to (x1, y1, x2, y2)
+
+    Returns:
+        Integer array of shape (N,) with region indices, -1 for no region
+    """
+    centers = box_centroids(detections)
+    if not regions:
+        return np.full(len(centers), -1, dtype=np.int64)
+
+    rects = np.array(list(regions.values()), dtype=np.float32)
+
+    # (N, R) matrix of centroid-in-region tests
+    cx = centers[:, 0:1]
+    cy = centers[:, 1:2]
+    inside = (
+        (cx >= rects[:, 0]) & (cx < rects[:, 2]) &
+        (cy >= rects[:, 1]) & (cy < rects[:, 3])
+    )
+    return np.where(inside.any(axis=1), inside.argmax(axis=1), -1)
+
+
+def assign_to_regions(detections: np.ndarray, regions: Dict[str, Region]) -> Dict[str, np.ndarray]:
+    """
+    Assign each detection to the region containing its centroid.
+
+    Every box is assigned to at most one region, so a vehicle straddling
+    two regions is only counted once. When regions overlap, the first
+    matching region in iteration order wins.
+
+    Args:
+        detections: Array of detections [[x, y, w, h], ...] in frame coordinates
+        regions: Dictionary mapping region names to (x1, y1, x2, y2)
+
+    Returns:
+        Dictionary mapping region names to their (N, 4) detection arrays
+    """
+    boxes = as_boxes(detections)
+    owner = region_owners(boxes, regions)
+    return {name: boxes[owner == index] for index, name in enumerate(regions)}
@@ -3,38 +3,88 @@ Vehicle detection module using OpenCV.
 """
 import cv2
 import numpy as np
-from typing import Dict, List, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from src.vehicle_detection.boxes import (
+    Region,
+    assign_to_regions,
+    merge_regions,
+    non_max_suppression,
+    tile_regions
+)
+from src.vehicle_detection.backends import DetectorBackend, HaarCascadeBackend, OnnxDnnBackend
+from src.vehicle_detection.preprocessing import FramePreprocessor
+from src.vehicle_detection.profiles import scale_profile
+from config.settings import DETECTION_SETTINGS
 
 class CarDetector:
-    def __init__(self, model_path: str = None, conf_threshold: float = 0.5):
+    def __init__(
+        self,
+        model_path: str = None,
+        conf_threshold: float = 0.5,
+        backend: Union[str, DetectorBackend] = None,
+        detection_scale: float = 1.0,
+        tile_workers: int = None,
+        **backend_options
+    ):
         """
         Initialize the car detector.
         
         Args:
             model_path: Path to the detection model file
             conf_threshold: Confidence threshold for detections
+            backend: Detection backend instance, or 'haar' / 'onnx' to pick one.
+                By default the backend is chosen from the model file extension.
+            detection_scale: Factor images are shrunk by before detection,
+                e.g. 0.5 to run the cascade at half resolution. Boxes are
+                mapped back to input coordinates. The backend's minimum
+                vehicle size applies to the shrunk image.
+            tile_workers: Threads for tiled detection, one per CPU by default
+            **backend_options: Extra arguments for the backend constructor
         """
         self.conf_threshold = conf_threshold
+        if not 0 < detection_scale <= 1:
+            raise ValueError(f"Detection scale must be in (0, 1], got {detection_scale}")
+        self.detection_scale = detection_scale
+        self._scaled = {}
+        self.tile_workers = tile_workers or os.cpu_count() or 1
+        self._tile_pool = None
+        self._tile_local = threading.local()
         
-        # If no model path provided, use default Haar cascade
-        if model_path is None:
-            cascade_path = os.path.join(
-                Path(__file__).parent,
-                'models',
-                'haarcascade_car.xml'
-            )
-            if not os.path.exists(cascade_path):
-                raise FileNotFoundError(
-                    f"Car detection model not found at {cascade_path}. "
-                    "Please download haarcascade_car.xml and place it in the models directory."
-                )
-            self.car_cascade = cv2.CascadeClassifier(cascade_path)
+        if isinstance(backend, DetectorBackend):
+            self.backend = backend
         else:
-            if not os.path.exists(model_path):
-                raise FileNotFoundError(f"Model not found at {model_path}")
-            self.car_cascade = cv2.CascadeClassifier(model_path)
+            # If no model path provided, use default Haar cascade
+            if model_path is None:
+                model_path = os.path.join(
+                    Path(__file__).parent,
+                    'models',
+                    'haarcascade_car.xml'
+                )
+                if not os.path.exists(model_path):
+                    raise FileNotFoundError(
+                        f"Car detection model not found at {model_path}. "
+                        "Please download haarcascade_car.xml and place it in the models directory."
+                    )
+            if backend is None:
+                backend = 'onnx' if str(model_path).endswith('.onnx') else 'haar'
+                
+            if backend == 'haar':
+                self.backend = HaarCascadeBackend(model_path, **backend_options)
+            elif backend == 'onnx':
+                self.backend = OnnxDnnBackend(
+                    model_path,
+                    conf_threshold=conf_threshold,
+                    **backend_options
+                )
+            else:
+                raise ValueError(f"Unknown detection backend: {backend}")
+                
+        self.car_cascade = getattr(self.backend, 'cascade', None)
+        self.preprocessor = FramePreprocessor()
 
     def preprocess_image(self, image: np.ndarray) -> np.ndarray:
         """
@@ -73,16 +123,50 @@ class CarDetector:
         if image is None:
             raise ValueError("Input image is None")
             
-        # Preprocess the image
-        gray = self.preprocess_image(image)
+        return self.detect_preprocessed(self._prepare(image))
+
+    def preprocess_frame(self, image: np.ndarray) -> np.ndarray:
+        """
+        Preprocess a full frame once for several detections.
         
-        # Detect cars
-        cars = self.car_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
+        For grayscale backends the result lives in buffers reused across
+        frames, and lane crops of it are zero-copy views. Grayscale input,
+        such as the Y plane from the capture, skips the color conversion.
+        
+        Args:
+            image: Input frame
+            
+        Returns:
+            Frame in the input format the backend expects, valid until the
+            next call
+        """
+        if image is None:
+            raise ValueError("Input image is None")
+        if self.backend.grayscale:
+            return self.preprocessor.process(image)
+        return self._prepare(image)
+
+    def detect_preprocessed(self, prepared: np.ndarray, profile: Optional[Dict] = None) -> np.ndarray:
+        """
+        Detect vehicles in an already preprocessed image or view.
+        
+        Runs at detection_scale of the input size and maps the boxes back
+        to input coordinates.
+        
+        Args:
+            prepared: Output of preprocess_frame or a crop of it
+            profile: Optional detection profile limiting the searched
+                vehicle sizes, in input pixels
+            
+        Returns:
+            Array of detections in format [[x, y, w, h], ...]
+        """
+        if self.detection_scale != 1:
+            cars = self._detect_scaled(prepared, profile)
+        elif profile:
+            cars = self.backend.detect(prepared, profile)
+        else:
+            cars = self.backend.detect(prepared)
         
         # Convert to numpy array if no cars detected
         if len(cars) == 0:
@@ -90,6 +174,303 @@ class CarDetector:
             
         return cars
 
+    def _downscale(self, prepared: np.ndarray) -> np.ndarray:
+        """Shrink an image by the detection scale into a buffer reused per size."""
+        height, width = prepared.shape[:2]
+        size = (
+            max(int(round(width * self.detection_scale)), 1),
+            max(int(round(height * self.detection_scale)), 1)
+        )
+        shape = (size[1], size[0]) + prepared.shape[2:]
+        scaled = self._scaled.get(shape)
+        if scaled is None or scaled.dtype != prepared.dtype:
+            scaled = self._scaled[shape] = np.empty(shape, dtype=prepared.dtype)
+        cv2.resize(prepared, size, dst=scaled, interpolation=cv2.INTER_AREA)
+        return scaled
+
+    @staticmethod
+    def _upscale_boxes(cars: np.ndarray, scaled_shape: Tuple[int, ...], shape: Tuple[int, ...]) -> np.ndarray:
+        """Map boxes from a downscaled image back to the original size."""
+        if len(cars) == 0:
+            return cars
+        scale = np.array([shape[1] / scaled_shape[1], shape[0] / scaled_shape[0]] * 2)
+        return np.rint(cars * scale).astype(np.int32)
+
+    def _detect_scaled(self, prepared: np.ndarray, profile: Optional[Dict] = None) -> np.ndarray:
+        """Detect on a downscaled copy and map boxes back to full size."""
+        scaled = self._downscale(prepared)
+        if profile:
+            cars = self.backend.detect(scaled, scale_profile(profile, self.detection_scale))
+        else:
+            cars = self.backend.detect(scaled)
+        return self._upscale_boxes(cars, scaled.shape, prepared.shape)
+
+    def detect_vehicles_tiled(
+        self,
+        image: np.ndarray,
+        tile_size: Optional[int] = None,
+        overlap: Optional[int] = None,
+        prepared: np.ndarray = None,
+        iou_threshold: float = 0.5,
+        regions: Optional[Dict[str, Region]] = None
+    ) -> np.ndarray:
+        """
+        Detect vehicles in a large image split into overlapping tiles.
+        
+        Cascade tiles are detected in parallel on a thread pool, since
+        OpenCV releases the GIL while detecting, with one cascade copy per
+        thread. Batching backends run all tiles in one forward pass instead.
+        Duplicates in the overlap areas are merged with non-maximum
+        suppression.
+        
+        Args:
+            image: Input image
+            tile_size: Tile side length in input pixels,
+                DETECTION_SETTINGS['tiling'] if None
+            overlap: Overlap between neighboring tiles in input pixels,
+                at least the largest expected vehicle size,
+                DETECTION_SETTINGS['tiling'] if None
+            prepared: Output of preprocess_frame for this image, computed
+                here if None
+            iou_threshold: IoU above which boxes from different tiles are
+                treated as the same vehicle
+            regions: Only tile the crops from merge_regions covering these
+                regions, the whole image if None
+            
+        Returns:
+            Array of detections in format [[x, y, w, h], ...]
+        """
+        if image is None:
+            raise ValueError("Input image is None")
+        if prepared is None:
+            prepared = self.preprocess_frame(image)
+        tiling = DETECTION_SETTINGS.get('tiling', {})
+        if tile_size is None:
+            tile_size = tiling.get('tile_size', 640)
+        if overlap is None:
+            overlap = tiling.get('overlap', 160)
+            
+        # Shrink once up front so tiles never share the resize buffer
+        scaled = prepared
+        if self.detection_scale != 1:
+            scaled = self._downscale(prepared)
+        height, width = scaled.shape[:2]
+        scale_x = width / prepared.shape[1]
+        scale_y = height / prepared.shape[0]
+        crops = [(0, 0, width, height)]
+        if regions is not None:
+            crops = [
+                (
+                    max(int(x1 * scale_x), 0),
+                    max(int(y1 * scale_y), 0),
+                    min(int(np.ceil(x2 * scale_x)), width),
+                    min(int(np.ceil(y2 * scale_y)), height)
+                )
+                for x1, y1, x2, y2 in merge_regions(regions)
+            ]
+        size = max(int(round(tile_size * self.detection_scale)), 1)
+        tiles = [
+            (cx1 + x1, cy1 + y1, cx1 + x2, cy1 + y2)
+            for cx1, cy1, cx2, cy2 in crops
+            if cx2 > cx1 and cy2 > cy1
+            for x1, y1, x2, y2 in tile_regions(cx2 - cx1, cy2 - cy1, size, int(round(overlap * self.detection_scale)))
+        ]
+        if not tiles:
+            return np.array([])
+        views = [scaled[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+        
+        if self.backend.grayscale and len(views) > 1:
+            results = list(self._tile_executor().map(self._detect_tile, views))
+        else:
+            results = self.backend.detect_batch(views)
+            
+        found = [
+            cars + np.array([x1, y1, 0, 0], dtype=cars.dtype)
+            for cars, (x1, y1, _, _) in zip(results, tiles)
+            if len(cars) > 0
+        ]
+        if not found:
+            return np.array([])
+            
+        detections = np.concatenate(found)
+        if len(found) > 1:
+            areas = detections[:, 2].astype(np.float64) * detections[:, 3]
+            detections = detections[non_max_suppression(detections, areas, iou_threshold)]
+        return self._upscale_boxes(detections, scaled.shape, prepared.shape)
+
+    def _tile_executor(self) -> ThreadPoolExecutor:
+        """Create the tile thread pool on first use."""
+        if self._tile_pool is None:
+            self._tile_pool = ThreadPoolExecutor(
+                max_workers=self.tile_workers,
+                thread_name_prefix='tile-detect'
+            )
+        return self._tile_pool
+
+    def _detect_tile(self, tile: np.ndarray) -> np.ndarray:
+        """Detect vehicles in one tile with this thread's backend copy."""
+        backend = getattr(self._tile_local, 'backend', None)
+        if backend is None:
+            backend = self.backend.clone()
+            self._tile_local.backend = backend
+        return backend.detect(tile)
+
+    def close(self):
+        """Shut down the tile thread pool."""
+        if self._tile_pool is not None:
+            self._tile_pool.shutdown(wait=True)
+            self._tile_pool = None
+
+    def detect_vehicles_batch(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Detect vehicles in several images at once.
+        
+        Backends that support batching, such as the ONNX backend, run all
+        images in a single forward pass. Images can be frames from different
+        cameras or lane crops.
+        
+        Args:
+            images: Input images
+            
+        Returns:
+            List of detection arrays in format [[x, y, w, h], ...], one per image
+        """
+        if any(image is None for image in images):
+            raise ValueError("Input image is None")
+            
+        results = self.backend.detect_batch([self._prepare(image) for image in images])
+        return [cars if len(cars) > 0 else np.array([]) for cars in results]
+
+    def _prepare(self, image: np.ndarray) -> np.ndarray:
+        """Convert an image to the input format the backend expects."""
+        if self.backend.grayscale:
+            return self.preprocess_image(image)
+        if image.ndim == 2:
+            return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        return image
+
+    def _detect_in_crops(
+        self,
+        prepared: np.ndarray,
+        crops: List[Region],
+        profiles: List[Optional[Dict]],
+        iou_threshold: float
+    ) -> np.ndarray:
+        """
+        Detect vehicles in views of a preprocessed frame.
+        
+        Crops are clipped to the frame and boxes are mapped back to frame
+        coordinates. Vehicles found by overlapping crops are suppressed,
+        keeping the larger box.
+        
+        Args:
+            prepared: Output of preprocess_frame
+            crops: Crops (x1, y1, x2, y2) to search
+            profiles: Detection profile per crop, None for the backend defaults
+            iou_threshold: IoU above which boxes from different crops are
+                treated as the same vehicle
+            
+        Returns:
+            Array of detections in format [[x, y, w, h], ...]
+        """
+        height, width = prepared.shape[:2]
+        found = []
+        for (x1, y1, x2, y2), profile in zip(crops, profiles):
+            x1, y1 = max(x1, 0), max(y1, 0)
+            x2, y2 = min(x2, width), min(y2, height)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            cars = self.detect_preprocessed(prepared[y1:y2, x1:x2], profile)
+            if len(cars) > 0:
+                found.append(cars + np.array([x1, y1, 0, 0], dtype=cars.dtype))
+                
+        if not found:
+            return np.array([])
+        detections = np.concatenate(found)
+        if len(found) > 1:
+            areas = detections[:, 2].astype(np.float64) * detections[:, 3]
+            detections = detections[non_max_suppression(detections, areas, iou_threshold)]
+        return detections
+
+    def detect_vehicles_in_regions(
+        self,
+        image: np.ndarray,
+        regions: Dict[str, Region],
+        prepared: np.ndarray = None,
+        iou_threshold: float = 0.5
+    ) -> Dict[str, np.ndarray]:
+        """
+        Detect vehicles in several regions of one preprocessed frame.
+        
+        The frame is preprocessed once and the detector runs on a view per
+        crop from merge_regions, so touching or overlapping lanes are
+        searched together and no pixel outside the lanes is searched. Each
+        detection is then assigned to the region containing its centroid,
+        so a vehicle straddling two lanes is counted once.
+        
+        Args:
+            image: Input image
+            regions: Dictionary mapping region names to (x1, y1, x2, y2)
+            prepared: Output of preprocess_frame for this image, computed
+                here if None
+            iou_threshold: IoU above which detections from different crops
+                are treated as the same vehicle
+            
+        Returns:
+            Dictionary mapping region names to detections [[x, y, w, h], ...]
+            in image coordinates
+        """
+        if image is None:
+            raise ValueError("Input image is None")
+        if prepared is None:
+            prepared = self.preprocess_frame(image)
+            
+        crops = merge_regions(regions)
+        detections = self._detect_in_crops(prepared, crops, [None] * len(crops), iou_threshold)
+        return assign_to_regions(detections, regions)
+
+    def detect_vehicles_in_lanes(
+        self,
+        image: np.ndarray,
+        lanes: Dict[str, Region],
+        profiles: Dict[str, Dict],
+        prepared: np.ndarray = None,
+        iou_threshold: float = 0.5
+    ) -> Dict[str, np.ndarray]:
+        """
+        Detect vehicles lane by lane, searching only each lane's size range.
+        
+        Every lane is searched on a view of the preprocessed frame with its
+        own profile. Duplicates found by overlapping lanes are suppressed and
+        each detection is assigned to the lane containing its centroid.
+        
+        Args:
+            image: Input image
+            lanes: Dictionary mapping lane names to (x1, y1, x2, y2)
+            profiles: Dictionary mapping lane names to detection profiles,
+                lanes without a profile use the backend defaults
+            prepared: Output of preprocess_frame for this image, computed
+                here if None
+            iou_threshold: IoU above which detections from different lanes
+                are treated as the same vehicle
+            
+        Returns:
+            Dictionary mapping lane names to detections [[x, y, w, h], ...]
+            in image coordinates
+        """
+        if image is None:
+            raise ValueError("Input image is None")
+        if prepared is None:
+            prepared = self.preprocess_frame(image)
+            
+        detections = self._detect_in_crops(
+            prepared,
+            list(lanes.values()),
+            [profiles.get(lane) for lane in lanes],
+            iou_threshold
+        )
+        return assign_to_regions(detections, lanes)
+
     def draw_detections(self, image: np.ndarray, detections: np.ndarray) -> np.ndarray:
         """
         Draw detection boxes on the image.
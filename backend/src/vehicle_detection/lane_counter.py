@@ -0,0 +1,175 @@
+"""
+Per-lane vehicle counting with the configured detection options.
+
+TrafficMonitor, the offline analysis workers and the detection worker
+processes all count through LaneCounter, so the backend, lane profiles,
+tiling and motion gate in DETECTION_SETTINGS apply the same way wherever
+frames are detected.
+"""
+import numpy as np
+from typing import Dict, Optional
+from src.vehicle_detection.boxes import Region, assign_to_regions
+from src.vehicle_detection.detector import CarDetector
+from src.vehicle_detection.motion import MotionGate
+from src.vehicle_detection.profiles import derive_lane_profiles
+from config.settings import DETECTION_SETTINGS
+
+def create_detector(settings: Optional[Dict] = None, model_path: Optional[str] = None) -> CarDetector:
+    """
+    Create the car detector described by the detection settings.
+
+    Args:
+        settings: Detection settings, DETECTION_SETTINGS if None
+        model_path: Model overriding the configured one, the backend is then
+            chosen from its file extension
+
+    Returns:
+        Configured car detector
+    """
+    settings = DETECTION_SETTINGS if settings is None else settings
+    options = {
+        'conf_threshold': settings['confidence_threshold'],
+        'detection_scale': settings.get('detection_scale', 1.0),
+        'tile_workers': settings.get('tiling', {}).get('workers')
+    }
+    if model_path is None:
+        onnx = settings.get('backend', 'haar') == 'onnx'
+    else:
+        onnx = str(model_path).endswith('.onnx')
+
+    if onnx:
+        onnx_settings = settings.get('onnx', {})
+        return CarDetector(
+            model_path=model_path or onnx_settings['model_path'],
+            backend='onnx',
+            input_size=onnx_settings.get('input_size', 640),
+            nms_threshold=onnx_settings.get('nms_threshold', 0.45),
+            **options
+        )
+    return CarDetector(model_path=model_path or settings['model_path'], **options)
+
+class LaneCounter:
+    """Counts vehicles per lane, one detection pass per frame."""
+
+    def __init__(
+        self,
+        lanes: Dict[str, Region],
+        settings: Optional[Dict] = None,
+        detector: Optional[CarDetector] = None
+    ):
+        """
+        Initialize the lane counter.
+
+        Args:
+            lanes: Dictionary mapping lane names to (x1, y1, x2, y2)
+            settings: Detection settings, DETECTION_SETTINGS if None
+            detector: Detector to use, created from the settings if None
+        """
+        self.settings = DETECTION_SETTINGS if settings is None else settings
+        self.detector = detector if detector is not None else create_detector(self.settings)
+
+        # Optional tiled detection for high resolution cameras
+        self.tiling = None
+        if self.settings.get('tiling', {}).get('enabled', False):
+            self.tiling = self.settings['tiling']
+
+        # Optional motion gate that keeps the previous count for static lanes
+        gate_settings = self.settings.get('motion_gate', {})
+        self.motion_gate = None
+        if gate_settings.get('enabled', False):
+            self.motion_gate = MotionGate(
+                threshold=gate_settings.get('threshold', 0.01),
+                pixel_delta=gate_settings.get('pixel_delta', 25),
+                method=gate_settings.get('method', 'difference'),
+                downscale=gate_settings.get('downscale', 4)
+            )
+
+        # Optional per-lane profiles limiting the searched vehicle sizes
+        self.lane_profiles = None
+        self.set_lanes(lanes)
+
+    def set_lanes(self, lanes: Dict[str, Region]):
+        """
+        Change the counted lanes and derive their profiles, if enabled.
+
+        Args:
+            lanes: Dictionary mapping lane names to (x1, y1, x2, y2)
+        """
+        self.lanes = dict(lanes)
+        profile_settings = self.settings.get('lane_profiles', {})
+        if profile_settings.get('enabled', False):
+            backend = self.detector.backend
+            self.lane_profiles = derive_lane_profiles(
+                self.lanes,
+                overrides=profile_settings.get('lanes'),
+                min_size=getattr(backend, 'min_size', (30, 30)),
+                scale_factor=getattr(backend, 'scale_factor', 1.1),
+                min_size_ratio=profile_settings.get('min_size_ratio', 0.25),
+                max_size_ratio=profile_settings.get('max_size_ratio', 1.2)
+            )
+
+    def detect(self, frame: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Detect vehicles in the lanes of a frame.
+
+        Args:
+            frame: Frame to detect in
+
+        Returns:
+            Dictionary mapping lane names to detections [[x, y, w, h], ...].
+            Lanes the motion gate found static are left out, their previous
+            counts still hold.
+        """
+        # Gate on the plain grayscale frame, and only blur it for detection
+        # once some lane moved. Grayscale backends convert the frame once
+        # for both.
+        source = frame
+        if self.detector.backend.grayscale:
+            source = self.detector.preprocessor.grayscale(frame)
+        lanes = self.lanes
+        if self.motion_gate is not None:
+            moving = self.motion_gate.update(source, self.lanes)
+            lanes = {lane: region for lane, region in self.lanes.items() if lane in moving}
+        if not lanes:
+            return {}
+        prepared = self.detector.preprocess_frame(source)
+
+        # Detect on the lane crops, or lane by lane when each lane has its
+        # own size range, or tile by tile in parallel on large frames
+        if self.lane_profiles is not None:
+            return self.detector.detect_vehicles_in_lanes(frame, lanes, self.lane_profiles, prepared)
+        if self.tiling is not None:
+            return assign_to_regions(self.detector.detect_vehicles_tiled(
+                frame,
+                tile_size=self.tiling.get('tile_size'),
+                overlap=self.tiling.get('overlap'),
+                prepared=prepared,
+                regions=lanes
+            ), lanes)
+        return self.detector.detect_vehicles_in_regions(frame, lanes, prepared)
+
+    def count(self, frame: np.ndarray) -> Dict[str, int]:
+        """
+        Count vehicles in the lanes of a frame.
+
+        Args:
+            frame: Frame to detect in
+
+        Returns:
+            Dictionary mapping lane names to vehicle counts, without the
+            lanes the motion gate found static
+        """
+        return {lane: len(boxes) for lane, boxes in self.detect(frame).items()}
+
+    def get_stats(self) -> Dict:
+        """
+        Get statistics about skipped detections.
+
+        Returns:
+            Dictionary with motion gate statistics, empty if the gate is disabled
+        """
+        return {} if self.motion_gate is None else self.motion_gate.get_stats()
+
+    def close(self):
+        """Release the detector's thread pool."""
+        self.detector.close()
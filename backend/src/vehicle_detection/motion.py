@@ -0,0 +1,128 @@
+"""
+Motion gating module for skipping detection on static regions.
+"""
+import cv2
+import numpy as np
+from typing import Dict, Set
+import logging
+from src.vehicle_detection.boxes import Region
+
+class MotionGate:
+    """Decides per region whether anything moved since the last detection."""
+
+    def __init__(
+        self,
+        threshold: float = 0.01,
+        pixel_delta: int = 25,
+        method: str = 'difference',
+        downscale: int = 4
+    ):
+        """
+        Initialize the motion gate.
+
+        Args:
+            threshold: Minimum ratio of changed pixels for a region to count as moving
+            pixel_delta: Minimum intensity change for a pixel to count as changed
+            method: 'difference' for frame differencing or 'mog2' for a
+                background subtractor per region
+            downscale: Factor the frame is shrunk by before comparing
+        """
+        if method not in ('difference', 'mog2'):
+            raise ValueError(f"Unknown motion gate method: {method}")
+
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.method = method
+        self.downscale = max(int(downscale), 1)
+        self.logger = logging.getLogger(__name__)
+
+        self._small = None
+        self._reference = None
+        self._subtractors = {}
+        self.checks = 0
+        self.skipped = 0
+        self.region_skips = {}
+
+    def _shrink(self, frame: np.ndarray) -> np.ndarray:
+        """Convert a frame to a small grayscale image for comparison."""
+        height, width = frame.shape[:2]
+        size = (max(width // self.downscale, 1), max(height // self.downscale, 1))
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        self._small = cv2.resize(gray, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        return self._small
+
+    def _scaled(self, region: Region):
+        """Map a region to the coordinates of the shrunk frame."""
+        x1, y1, x2, y2 = region
+        d = self.downscale
+        return slice(y1 // d, -(-y2 // d)), slice(x1 // d, -(-x2 // d))
+
+    def _changed_ratio(self, name: str, small: np.ndarray, region: Region) -> float:
+        """Compute the ratio of changed pixels inside a region."""
+        rows, cols = self._scaled(region)
+        current = small[rows, cols]
+        if current.size == 0:
+            return 0.0
+
+        if self.method == 'mog2':
+            subtractor = self._subtractors.get(name)
+            if subtractor is None:
+                subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+                self._subtractors[name] = subtractor
+            mask = subtractor.apply(current)
+            return float(np.count_nonzero(mask)) / mask.size
+
+        diff = cv2.absdiff(current, self._reference[rows, cols])
+        return float(np.count_nonzero(diff > self.pixel_delta)) / diff.size
+
+    def update(self, frame: np.ndarray, regions: Dict[str, Region]) -> Set[str]:
+        """
+        Find the regions that need a new detection pass.
+
+        Regions reported as moving are assumed to be detected by the caller,
+        so their reference image is refreshed. Static regions keep their old
+        reference, which lets slow changes accumulate until they cross the
+        threshold.
+
+        Args:
+            frame: Current frame
+            regions: Dictionary mapping region names to (x1, y1, x2, y2)
+
+        Returns:
+            Set of region names whose content changed
+        """
+        small = self._shrink(frame)
+        if self._reference is None or self._reference.shape != small.shape:
+            # Nothing to compare against yet, so every region is detected
+            self._reference = small.copy()
+            if self.method == 'mog2':
+                for name, region in regions.items():
+                    self._changed_ratio(name, small, region)
+            return set(regions)
+
+        moving = set()
+        for name, region in regions.items():
+            self.checks += 1
+            if self._changed_ratio(name, small, region) >= self.threshold:
+                moving.add(name)
+                rows, cols = self._scaled(region)
+                self._reference[rows, cols] = small[rows, cols]
+            else:
+                self.skipped += 1
+                self.region_skips[name] = self.region_skips.get(name, 0) + 1
+
+        return moving
+
+    def get_stats(self) -> Dict:
+        """
+        Get detection skip statistics.
+
+        Returns:
+            Dictionary with checks, skipped detections and the skip ratio
+        """
+        return {
+            'checks': self.checks,
+            'skipped': self.skipped,
+            'skip_ratio': self.skipped / self.checks if self.checks else 0.0,
+            'region_skips': dict(self.region_skips)
+        }
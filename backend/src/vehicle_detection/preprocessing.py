@@ -0,0 +1,81 @@
+"""
+Per-frame preprocessing shared by detection and motion gating.
+"""
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+
+class FramePreprocessor:
+    """Converts a frame to blurred grayscale once, into reused buffers.
+
+    Lane detections run on zero-copy views of the preprocessed frame, so
+    overlapping lane regions are never converted or blurred twice. The
+    returned arrays are owned by the preprocessor and overwritten by the
+    next call to process().
+    """
+
+    def __init__(self, blur_kernel: Tuple[int, int] = (3, 3)):
+        """
+        Initialize the frame preprocessor.
+
+        Args:
+            blur_kernel: Gaussian blur kernel size
+        """
+        self.blur_kernel = tuple(blur_kernel)
+        self.gray: Optional[np.ndarray] = None
+        self.blurred: Optional[np.ndarray] = None
+        self.frames = 0
+
+    def _buffers(self, shape: Tuple[int, int]):
+        """Allocate the output buffers when the frame size changes."""
+        if self.blurred is None or self.blurred.shape != shape:
+            self.gray = np.empty(shape, dtype=np.uint8)
+            self.blurred = np.empty(shape, dtype=np.uint8)
+
+    def process(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Preprocess a full frame.
+
+        Args:
+            frame: BGR frame, or an already grayscale frame such as the Y
+                plane from the capture, which skips the color conversion
+
+        Returns:
+            Blurred grayscale frame
+        """
+        if frame is None:
+            raise ValueError("Input image is None")
+
+        self._buffers(frame.shape[:2])
+        if frame.ndim == 3:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray)
+            gray = self.gray
+        else:
+            gray = frame
+
+        cv2.GaussianBlur(gray, self.blur_kernel, 0, dst=self.blurred)
+        self.frames += 1
+        return self.blurred
+
+    def grayscale(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Convert a frame to grayscale without blurring it.
+
+        This is the cheap first step of process(): a motion gate can look at
+        the result before deciding whether the frame is worth blurring, and
+        passing it on to process() then only blurs it.
+
+        Args:
+            frame: BGR or grayscale frame
+
+        Returns:
+            Grayscale frame in the reused buffer, the frame itself if it was
+            already grayscale
+        """
+        if frame is None:
+            raise ValueError("Input image is None")
+        if frame.ndim == 2:
+            return frame
+        self._buffers(frame.shape[:2])
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        return self.gray
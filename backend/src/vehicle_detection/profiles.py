@@ -0,0 +1,131 @@
+"""
+Per-lane detection profiles limiting the scales the detector searches.
+
+A profile is a dictionary with the keys 'min_size' and 'max_size', each a
+(width, height) tuple in frame pixels, and 'scale_factor', the step between
+pyramid levels. Profiles are derived from lane geometry or calibrated from
+detections on sample footage.
+"""
+import math
+import numpy as np
+from typing import Dict, Iterable, Tuple
+from src.vehicle_detection.boxes import Region
+
+Profile = Dict
+
+def lane_profile(
+    region: Region,
+    min_size: Tuple[int, int] = (30, 30),
+    scale_factor: float = 1.1,
+    min_size_ratio: float = 0.25,
+    max_size_ratio: float = 1.2
+) -> Profile:
+    """
+    Derive a detection profile from the geometry of a lane.
+
+    Vehicles cannot be much wider than the short side of their lane, so
+    the largest searched size is the short side times max_size_ratio. The
+    ratio is above one to keep vehicles straddling the lane edge.
+
+    Args:
+        region: Lane region (x1, y1, x2, y2)
+        min_size: Smallest vehicle size searched in any lane
+        scale_factor: Step between pyramid levels
+        min_size_ratio: Smallest vehicle size relative to the short side
+        max_size_ratio: Largest vehicle size relative to the short side
+
+    Returns:
+        Detection profile for the lane
+    """
+    x1, y1, x2, y2 = region
+    short_side = min(x2 - x1, y2 - y1)
+    smallest = max(int(short_side * min_size_ratio), 1)
+    low = (max(min_size[0], smallest), max(min_size[1], smallest))
+    largest = int(math.ceil(short_side * max_size_ratio))
+    return {
+        'min_size': low,
+        'max_size': (max(largest, low[0]), max(largest, low[1])),
+        'scale_factor': scale_factor
+    }
+
+def derive_lane_profiles(lanes: Dict[str, Region], overrides: Dict[str, Profile] = None, **options) -> Dict[str, Profile]:
+    """
+    Derive detection profiles for a set of lanes.
+
+    Args:
+        lanes: Dictionary mapping lane names to (x1, y1, x2, y2)
+        overrides: Profile values per lane replacing the derived ones,
+            e.g. from calibrate_lane_profiles
+        **options: Arguments for lane_profile
+
+    Returns:
+        Dictionary mapping lane names to profiles
+    """
+    overrides = overrides or {}
+    profiles = {}
+    for lane, region in lanes.items():
+        profile = lane_profile(region, **options)
+        profile.update({key: tuple(value) if isinstance(value, list) else value
+                        for key, value in overrides.get(lane, {}).items()})
+        profiles[lane] = profile
+    return profiles
+
+def calibrate_lane_profiles(
+    detector,
+    frames: Iterable[np.ndarray],
+    lanes: Dict[str, Region],
+    margin: float = 0.25,
+    **options
+) -> Dict[str, Profile]:
+    """
+    Calibrate detection profiles from the vehicles found in sample footage.
+
+    Every frame is searched over the full scale range. The sizes seen in
+    each lane, widened by the margin, become the lane's search range. Lanes
+    without any detection keep the profile derived from their geometry.
+
+    Args:
+        detector: CarDetector used for the full range search
+        frames: Sample frames
+        lanes: Dictionary mapping lane names to (x1, y1, x2, y2)
+        margin: Relative widening of the observed size range
+        **options: Arguments for lane_profile
+
+    Returns:
+        Dictionary mapping lane names to profiles
+    """
+    sizes = {lane: [] for lane in lanes}
+    for frame in frames:
+        detections = detector.detect_vehicles_in_regions(frame, lanes)
+        for lane, boxes in detections.items():
+            if len(boxes) > 0:
+                sizes[lane].append(boxes[:, 2:4])
+
+    profiles = derive_lane_profiles(lanes, **options)
+    for lane, observed in sizes.items():
+        if not observed:
+            continue
+        observed = np.concatenate(observed)
+        low = np.floor(observed.min(axis=0) * (1.0 - margin)).astype(int)
+        high = np.ceil(observed.max(axis=0) * (1.0 + margin)).astype(int)
+        profiles[lane]['min_size'] = (max(int(low[0]), 1), max(int(low[1]), 1))
+        profiles[lane]['max_size'] = (int(high[0]), int(high[1]))
+    return profiles
+
+def scale_profile(profile: Profile, scale: float) -> Profile:
+    """
+    Map a profile to an image resized by a factor.
+
+    Args:
+        profile: Detection profile in frame pixels
+        scale: Resize factor of the image
+
+    Returns:
+        Profile in pixels of the resized image
+    """
+    scaled = dict(profile)
+    for key in ('min_size', 'max_size'):
+        if key in profile:
+            width, height = profile[key]
+            scaled[key] = (max(int(round(width * scale)), 1), max(int(round(height * scale)), 1))
+    return scaled
@@ -0,0 +1,207 @@
+"""
+Vehicle tracking module for carrying detections between detection frames.
+"""
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import logging
+from src.vehicle_detection.boxes import Region, box_centroids, iou_matrix, region_owners
+
+class VehicleTracker:
+    """Multi-object tracker matching boxes by IoU with a centroid fallback.
+
+    Track state is kept in parallel NumPy arrays so prediction and matching
+    are vectorized over all tracks.
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        max_distance: float = 1.0,
+        max_misses: int = 2,
+        min_hits: int = 2,
+        smoothing: float = 0.5
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            iou_threshold: Minimum IoU for a detection to match a track
+            max_distance: Maximum centroid distance, relative to the track
+                diagonal, for a non-overlapping match
+            max_misses: Number of detection passes a track may go unmatched
+                before it is dropped
+            min_hits: Number of matches before a track is confirmed
+            smoothing: Weight of the newest velocity estimate
+        """
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_misses = max_misses
+        self.min_hits = min_hits
+        self.smoothing = smoothing
+        self.logger = logging.getLogger(__name__)
+
+        self.ids = np.empty(0, dtype=np.int64)
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.velocities = np.empty((0, 2), dtype=np.float32)
+        self.hits = np.empty(0, dtype=np.int32)
+        self.misses = np.empty(0, dtype=np.int32)
+        self._anchors = np.empty((0, 2), dtype=np.float32)
+        self._frames_since_match = np.empty(0, dtype=np.int32)
+        self._next_id = 1
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def predict(self):
+        """Advance every track by one frame using its estimated velocity."""
+        self.boxes[:, :2] += self.velocities
+        self._frames_since_match += 1
+
+    def _cost_matrix(self, detections: np.ndarray) -> np.ndarray:
+        """
+        Build the track to detection matching cost matrix.
+
+        IoU matches cost 1 - IoU, centroid fallback matches cost 1 plus the
+        relative distance, and impossible pairs cost infinity.
+        """
+        iou = iou_matrix(self.boxes, detections)
+
+        track_centers = box_centroids(self.boxes)
+        detection_centers = box_centroids(detections)
+        distance = np.linalg.norm(track_centers[:, None, :] - detection_centers[None, :, :], axis=2)
+        diagonal = np.hypot(self.boxes[:, 2], self.boxes[:, 3])[:, None]
+        relative = distance / np.maximum(diagonal, 1.0)
+
+        cost = np.where(relative <= self.max_distance, 1.0 + relative, np.inf)
+        return np.where(iou >= self.iou_threshold, 1.0 - iou, cost)
+
+    def _match(self, cost: np.ndarray) -> List[Tuple[int, int]]:
+        """Greedily match the cheapest track and detection pairs."""
+        rows, cols = np.nonzero(np.isfinite(cost))
+        order = np.argsort(cost[rows, cols], kind='stable')
+
+        used_rows, used_cols = set(), set()
+        matches = []
+        for row, col in zip(rows[order], cols[order]):
+            if row in used_rows or col in used_cols:
+                continue
+            used_rows.add(row)
+            used_cols.add(col)
+            matches.append((int(row), int(col)))
+        return matches
+
+    def update(self, detections: np.ndarray):
+        """
+        Correct tracks with a new set of detections.
+
+        Call after predict() on detection frames.
+
+        Args:
+            detections: Array of detections [[x, y, w, h], ...]
+        """
+        detections = np.asarray(detections, dtype=np.float32).reshape(-1, 4)
+        matches = self._match(self._cost_matrix(detections)) if len(self) and len(detections) else []
+
+        matched_tracks = np.array([m[0] for m in matches], dtype=np.int64)
+        matched_detections = np.array([m[1] for m in matches], dtype=np.int64)
+
+        if len(matches):
+            # Velocity in pixels per frame since the last matched position
+            centers = box_centroids(detections[matched_detections])
+            elapsed = np.maximum(self._frames_since_match[matched_tracks], 1)[:, None]
+            measured = (centers - self._anchors[matched_tracks]) / elapsed
+            self.velocities[matched_tracks] = (
+                self.smoothing * measured +
+                (1.0 - self.smoothing) * self.velocities[matched_tracks]
+            )
+            self.boxes[matched_tracks] = detections[matched_detections]
+            self._anchors[matched_tracks] = centers
+            self._frames_since_match[matched_tracks] = 0
+            self.hits[matched_tracks] += 1
+            self.misses[matched_tracks] = 0
+
+        unmatched = np.ones(len(self), dtype=bool)
+        unmatched[matched_tracks] = False
+        self.misses[unmatched] += 1
+
+        # Drop tracks that went unmatched for too long
+        keep = self.misses <= self.max_misses
+        self.ids = self.ids[keep]
+        self.boxes = self.boxes[keep]
+        self.velocities = self.velocities[keep]
+        self.hits = self.hits[keep]
+        self.misses = self.misses[keep]
+        self._anchors = self._anchors[keep]
+        self._frames_since_match = self._frames_since_match[keep]
+
+        # Start new tracks for unmatched detections
+        new = np.ones(len(detections), dtype=bool)
+        new[matched_detections] = False
+        count = int(new.sum())
+        if count:
+            self.ids = np.concatenate([self.ids, np.arange(self._next_id, self._next_id + count)])
+            self._next_id += count
+            self.boxes = np.concatenate([self.boxes, detections[new]])
+            self.velocities = np.concatenate([self.velocities, np.zeros((count, 2), dtype=np.float32)])
+            self.hits = np.concatenate([self.hits, np.ones(count, dtype=np.int32)])
+            self.misses = np.concatenate([self.misses, np.zeros(count, dtype=np.int32)])
+            self._anchors = np.concatenate([self._anchors, box_centroids(detections[new])])
+            self._frames_since_match = np.concatenate([self._frames_since_match, np.zeros(count, dtype=np.int32)])
+
+    def confirmed(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the confirmed tracks.
+
+        Returns:
+            Tuple of track IDs and their boxes [[x, y, w, h], ...]
+        """
+        mask = self.hits >= self.min_hits
+        return self.ids[mask], self.boxes[mask]
+
+class DetectionTracker:
+    """Runs the detector every N frames and tracks vehicles in between."""
+
+    def __init__(self, counter, detect_every: int = 5, tracker: Optional[VehicleTracker] = None):
+        """
+        Initialize the detect-then-track pipeline.
+
+        Args:
+            counter: LaneCounter whose detect() finds the vehicles on
+                detection frames, so the configured motion gate, lane
+                profiles and tiling apply as in interval mode
+            detect_every: Number of frames between detection passes
+            tracker: Tracker carrying boxes between detections
+        """
+        self.counter = counter
+        self.detect_every = max(int(detect_every), 1)
+        self.tracker = tracker if tracker is not None else VehicleTracker()
+        self.frame_index = 0
+
+    def process(self, frame: np.ndarray, regions: Dict[str, Region]) -> Dict[str, np.ndarray]:
+        """
+        Process one frame and return the tracked vehicles per region.
+
+        Args:
+            frame: Input frame
+            regions: Dictionary mapping region names to (x1, y1, x2, y2),
+                the lanes of the counter
+
+        Returns:
+            Dictionary mapping region names to arrays of track IDs
+        """
+        self.tracker.predict()
+        if self.frame_index % self.detect_every == 0:
+            detections = self.counter.detect(frame)
+            boxes = [boxes for boxes in detections.values() if len(boxes)]
+
+            # Lanes the motion gate found static keep their tracks
+            static = [index for index, name in enumerate(regions) if name not in detections]
+            if static and len(self.tracker):
+                owners = region_owners(self.tracker.boxes, regions)
+                boxes.append(self.tracker.boxes[np.isin(owners, static)])
+            self.tracker.update(np.concatenate(boxes) if boxes else np.empty((0, 4)))
+        self.frame_index += 1
+
+        ids, boxes = self.tracker.confirmed()
+        owners = region_owners(boxes, regions)
+        return {name: ids[owners == index] for index, name in enumerate(regions)}
@@ -0,0 +1,201 @@
+"""
+Detection worker processes reading frames from shared memory.
+"""
+import logging
+import multiprocessing
+import queue
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+
+from src.camera.shared_frames import SharedFrameRing
+from src.vehicle_detection.boxes import Region
+from src.vehicle_detection.lane_counter import LaneCounter, create_detector
+
+def _worker_main(
+    ring_spec: Dict,
+    lanes: Dict[str, Region],
+    tasks,
+    results,
+    settings: Optional[Dict],
+    model_path: Optional[str]
+):
+    """Count vehicles in the frames referenced by incoming tasks."""
+    cv2.setNumThreads(1)
+    ring = SharedFrameRing.attach(ring_spec)
+    counter = LaneCounter(lanes, settings=settings, detector=create_detector(settings, model_path))
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, seq, timestamp = task
+            try:
+                if not ring.is_current(slot, seq):
+                    results.put((seq, timestamp, None))
+                    continue
+
+                counts = counter.count(ring.view(slot))
+
+                # Discard the result if the frame was overwritten anyway,
+                # which happens only once every slot of the ring is pinned
+                if not ring.is_current(slot, seq):
+                    counts = None
+            finally:
+                ring.release(slot)
+            results.put((seq, timestamp, counts))
+    finally:
+        counter.close()
+        ring.close()
+
+class DetectionWorkerPool:
+    """Runs lane detection in separate processes on shared memory frames.
+
+    Only (slot, sequence, timestamp) references are sent to the workers and
+    per-lane counts come back, so frames are never pickled. The task queue
+    holds one frame per worker; frames submitted while it is full are dropped
+    rather than queued behind stale ones.
+
+    Submitted slots stay pinned until their worker is done with them, so the
+    camera writes around frames that are queued or being detected, however
+    long detection takes. A ring needs more than twice as many slots as
+    workers for that.
+    """
+
+    def __init__(
+        self,
+        ring_spec: Dict,
+        lanes: Dict[str, Region],
+        processes: int = 2,
+        settings: Optional[Dict] = None,
+        model_path: Optional[str] = None
+    ):
+        """
+        Initialize the worker pool.
+
+        Args:
+            ring_spec: Spec of the SharedFrameRing the frames are written to
+            lanes: Dictionary mapping lane names to (x1, y1, x2, y2)
+            processes: Number of worker processes
+            settings: Detection settings the workers count with, including
+                lane profiles, tiling and the motion gate, DETECTION_SETTINGS
+                if None
+            model_path: Model overriding the configured one
+        """
+        self.ring_spec = ring_spec
+        self.lanes = dict(lanes)
+        self.processes = max(int(processes), 1)
+        self.settings = settings
+        self.model_path = model_path
+
+        # Spawned workers do not inherit the capture and server threads
+        self.context = multiprocessing.get_context('spawn')
+        self.tasks = self.context.Queue(maxsize=self.processes)
+        self.results = self.context.Queue()
+        self.workers = []
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.torn = 0
+        self.logger = logging.getLogger(__name__)
+
+        # Queued and running frames are pinned, the camera needs one more slot
+        if ring_spec['slots'] <= 2 * self.processes:
+            self.logger.warning(
+                f"Shared frame ring has {ring_spec['slots']} slots for {self.processes} workers, "
+                f"frames will be overwritten during detection"
+            )
+        self.ring = SharedFrameRing.attach(ring_spec)
+
+    def start(self):
+        """Start the worker processes."""
+        for _ in range(self.processes):
+            worker = self.context.Process(
+                target=_worker_main,
+                args=(self.ring_spec, self.lanes, self.tasks, self.results, self.settings, self.model_path),
+                daemon=True
+            )
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(self, slot: int, seq: int, timestamp: float) -> bool:
+        """
+        Hand a frame in the ring to the next free worker.
+
+        Args:
+            slot: Ring slot holding the frame
+            seq: Sequence number of the frame
+            timestamp: Capture timestamp of the frame
+
+        Returns:
+            bool: True if queued, False if all workers are busy or the
+            frame was already overwritten
+        """
+        if not self.ring.pin(slot, seq):
+            self.dropped += 1
+            return False
+        try:
+            self.tasks.put_nowait((slot, seq, timestamp))
+        except queue.Full:
+            self.ring.release(slot)
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def poll(self, timeout: float = 0.0) -> List[Tuple[int, float, Dict[str, int]]]:
+        """
+        Collect finished detections.
+
+        Args:
+            timeout: Seconds to wait for the first result
+
+        Returns:
+            List of (sequence, timestamp, lane counts) tuples of frames that
+            were detected intact, in completion order
+        """
+        finished = []
+        try:
+            result = self.results.get(timeout=timeout) if timeout > 0 else self.results.get_nowait()
+            while True:
+                self.completed += 1
+                if result[2] is None:
+                    self.torn += 1
+                    self.logger.warning(f"Discarded detection of frame {result[0]}, it was overwritten")
+                else:
+                    finished.append(result)
+                result = self.results.get_nowait()
+        except queue.Empty:
+            pass
+        return finished
+
+    def close(self):
+        """Stop the worker processes."""
+        for _ in self.workers:
+            try:
+                self.tasks.put(None, timeout=1.0)
+            except queue.Full:
+                break
+        for worker in self.workers:
+            worker.join(timeout=5.0)
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = []
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def get_stats(self) -> Dict:
+        """
+        Get worker statistics.
+
+        Returns:
+            Dictionary with submitted, completed, dropped and torn frame counts
+        """
+        return {
+            'processes': self.processes,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'dropped': self.dropped,
+            'torn': self.torn
+        }
@@ -1,11 +1,12 @@
-from flask import Flask, render_template
-from flask_socketio import SocketIO, emit
+from flask import Flask, render_template, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import json
 import time
 from datetime import datetime
 import threading
 import random
 from src.traffic_control import SignalController, SignalState
+from src.streaming.wire import encode_traffic_update
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key'
@@ -33,6 +34,54 @@ traffic_data = {
     ]
 }
 
+# Subscription rooms: room name -> (format, lanes or None), and client -> room.
+# Socket.IO handlers and the update thread share them under rooms_lock.
+rooms = {}
+client_rooms = {}
+rooms_lock = threading.Lock()
+
+def valid_lanes(lanes):
+    """Check that a subscription names a list of known lanes, or none."""
+    if lanes is None:
+        return True
+    return isinstance(lanes, list) and all(
+        isinstance(lane, str) and lane in traffic_data['lanes'] for lane in lanes
+    )
+
+def room_for(update_format, lanes):
+    """Get the room shared by all clients with the same subscription."""
+    lanes = None if not lanes else tuple(sorted(set(lanes)))
+    name = f"{update_format}:{','.join(lanes) if lanes else '*'}"
+    rooms[name] = (update_format, lanes)
+    return name
+
+def leave_subscription(sid):
+    """Remove a client from its room, dropping the room once it is empty.
+
+    Must be called with rooms_lock held.
+    """
+    room = client_rooms.pop(sid, None)
+    if room is not None and room not in client_rooms.values():
+        rooms.pop(room, None)
+    return room
+
+def room_payload(room, subscription=None):
+    """Build the event and payload of a room's traffic update."""
+    update_format, lanes = subscription or rooms[room]
+    data = traffic_data
+    if lanes is not None:
+        data = dict(traffic_data, lanes={lane: traffic_data['lanes'][lane] for lane in lanes if lane in traffic_data['lanes']})
+    if update_format == 'binary':
+        return 'traffic_update_binary', encode_traffic_update(data)
+    return 'traffic_update', data
+
+def broadcast_traffic_data():
+    """Emit the traffic data once per subscription room with clients in it."""
+    with rooms_lock:
+        active = {room: rooms[room] for room in set(client_rooms.values())}
+    for room, subscription in active.items():
+        socketio.emit(*room_payload(room, subscription), to=room)
+
 def update_traffic_data():
     """Simulate real-time traffic data updates"""
     while True:
@@ -101,8 +150,7 @@ def update_traffic_data():
         # Add timestamp
         traffic_data['timestamp'] = datetime.now().isoformat()
         
-        # Emit updated data to all connected clients
-        socketio.emit('traffic_update', traffic_data)
+        broadcast_traffic_data()
         time.sleep(2)  # Update every 2 seconds
 
 @app.route('/')
@@ -110,12 +158,48 @@ def index():
     return render_template('index.html')
 
 @socketio.on('connect')
-def handle_connect():
+def handle_connect(auth=None):
+    # Clients connecting with {format: 'binary'} get compact updates, and
+    # with {lanes: [...]} only those lanes
+    auth = auth or {}
+    if not subscribe(auth.get('format', 'json'), auth.get('lanes')):
+        return False
     print('Client connected')
-    emit('traffic_update', traffic_data)
+
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    data = data or {}
+    with rooms_lock:
+        current = rooms[client_rooms[request.sid]][0] if request.sid in client_rooms else 'json'
+    if not subscribe(data.get('format', current), data.get('lanes')):
+        emit('subscription_error', {'lanes': data.get('lanes')})
+
+def subscribe(update_format, lanes):
+    """Move the requesting client to the room of its subscription.
+
+    Returns:
+        bool: True if subscribed, False if the lanes are not a list of
+        known lane names
+    """
+    if not valid_lanes(lanes):
+        print(f'Rejected subscription to unknown lanes {lanes!r}')
+        return False
+    update_format = 'binary' if update_format == 'binary' else 'json'
+    with rooms_lock:
+        previous = leave_subscription(request.sid)
+        room = room_for(update_format, lanes)
+        client_rooms[request.sid] = room
+        subscription = rooms[room]
+    if previous is not None and previous != room:
+        leave_room(previous)
+    join_room(room)
+    emit(*room_payload(room, subscription))
+    return True
 
 @socketio.on('disconnect')
 def handle_disconnect():
+    with rooms_lock:
+        leave_subscription(request.sid)
     print('Client disconnected')
 
 if __name__ == '__main__':
@@ -6,8 +6,17 @@ let signalChart = null;
 
 // Initialize the application
 document.addEventListener('DOMContentLoaded', function() {
-    // Initialize Socket.IO connection
-    socket = io();
+    // Initialize Socket.IO connection with compact binary updates, for the
+    // intersection and lanes named in the page URL if any
+    const params = new URLSearchParams(window.location.search);
+    const auth = { format: 'binary' };
+    if (params.get('intersection')) {
+        auth.intersection = params.get('intersection');
+    }
+    if (params.get('lanes')) {
+        auth.lanes = params.get('lanes').split(',');
+    }
+    socket = io({ auth: auth });
     
     // Get DOM elements
     cameraFeed = document.getElementById('cameraFeed');
@@ -107,9 +116,7 @@ function setupSocketHandlers() {
         showAlert('Disconnected from traffic management system', 'danger');
     });
     
-    socket.on('system_update', function(data) {
-        updateDashboard(data);
-    });
+    subscribeSystemState(socket, updateDashboard);
     
     socket.on('error', function(error) {
         console.error('Socket error:', error);
@@ -117,6 +124,110 @@ function setupSocketHandlers() {
     });
 }
 
+// Keep a copy of the system state from full syncs and versioned deltas,
+// acknowledging every version so the server can send the next delta
+function subscribeSystemState(socket, onState) {
+    let state = null;
+    let version = null;
+    let schema = null;
+
+    function applyDelta(target, changed, removed) {
+        (removed || []).forEach(function(path) {
+            let parent = target;
+            path.slice(0, -1).forEach(function(key) { parent = parent[key] || {}; });
+            delete parent[path[path.length - 1]];
+        });
+        Object.entries(changed).forEach(function([key, value]) {
+            const current = target[key];
+            if (value && typeof value === 'object' && !Array.isArray(value) &&
+                current && typeof current === 'object' && !Array.isArray(current)) {
+                applyDelta(current, value);
+            } else {
+                target[key] = value;
+            }
+        });
+    }
+
+    function accept(message) {
+        version = message.version;
+        state.timestamp = message.timestamp;
+        socket.emit('state_ack', { version: version });
+        onState(state);
+    }
+
+    socket.on('state_sync', function(message) {
+        state = message.state;
+        accept(message);
+    });
+
+    function onDelta(message) {
+        if (state === null || message.base !== version) {
+            socket.emit('state_resync');
+            return;
+        }
+        applyDelta(state, message.changed, message.removed);
+        accept(message);
+    }
+
+    socket.on('state_delta', onDelta);
+
+    // Compact format, see src/streaming/wire.py for the layout
+    const SIGNAL_STATES = ['red', 'yellow', 'green', 'flashing_yellow'];
+    socket.on('state_binary', function(buffer) {
+        const view = new DataView(buffer);
+        const kind = view.getUint8(0);
+        const messageVersion = view.getUint32(1, true);
+        const base = view.getInt32(5, true);
+        const timestamp = new Date(view.getFloat64(9, true) * 1000).toISOString();
+        let offset = 17;
+        const counts = [];
+        for (let i = view.getUint16(offset, true); i > 0; i--) {
+            offset += 2;
+            counts.push(view.getUint16(offset, true));
+        }
+        offset += 2;
+        const codes = [];
+        for (let i = view.getUint16(offset, true); i > 0; i--) {
+            codes.push(view.getUint8(offset + 2 + codes.length));
+        }
+        offset += 2 + codes.length;
+        const emergency = (view.getUint8(offset) & 1) === 1;
+        offset += 1;
+        const tail = offset < buffer.byteLength
+            ? JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, offset)))
+            : {};
+        if (tail.schema) {
+            schema = tail.schema;
+        }
+        if (schema === null) {
+            socket.emit('state_resync');
+            return;
+        }
+
+        const target = kind === 1 ? (tail.state || {}) : (tail.changed || {});
+        target.traffic = target.traffic || {};
+        target.signals = target.signals || {};
+        target.traffic.vehicle_counts = {};
+        schema.lanes.forEach(function(lane, i) { target.traffic.vehicle_counts[lane] = counts[i]; });
+        target.signals.signals = {};
+        schema.signals.forEach(function(signal, i) { target.signals.signals[signal] = SIGNAL_STATES[codes[i]] || null; });
+        target.signals.emergency_mode = emergency;
+
+        if (kind === 1) {
+            state = target;
+            accept({ version: messageVersion, timestamp: timestamp });
+        } else {
+            onDelta({
+                base: base,
+                version: messageVersion,
+                changed: target,
+                removed: tail.removed || [],
+                timestamp: timestamp
+            });
+        }
+    });
+}
+
 // Update dashboard with new data
 function updateDashboard(data) {
     // Update camera feed
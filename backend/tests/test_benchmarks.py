@@ -0,0 +1,84 @@
+"""
+Test file for the benchmark regression check.
+"""
+import json
+import os
+import numpy as np
+from benchmarks.run_benchmarks import BENCHMARKS, _metric, compare_to_baseline, detection_agreement, main, run_benchmarks
+
+BASELINE = {
+    'detect_vehicles_fps': {'value': 100.0, 'unit': 'fps', 'higher_is_better': True},
+    'process_frame_p95_ms': {'value': 10.0, 'unit': 'ms', 'higher_is_better': False}
+}
+
+def test_no_regression_within_threshold():
+    """Test that small changes pass."""
+    results = {
+        'detect_vehicles_fps': {'value': 95.0, 'unit': 'fps', 'higher_is_better': True},
+        'process_frame_p95_ms': {'value': 10.5, 'unit': 'ms', 'higher_is_better': False}
+    }
+    assert compare_to_baseline(results, BASELINE, 10.0) == []
+
+def test_regressions_are_reported():
+    """Test that regressions past the threshold are reported in both directions."""
+    results = {
+        'detect_vehicles_fps': {'value': 80.0, 'unit': 'fps', 'higher_is_better': True},
+        'process_frame_p95_ms': {'value': 12.0, 'unit': 'ms', 'higher_is_better': False}
+    }
+    regressions = compare_to_baseline(results, BASELINE, 10.0)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('detect_vehicles_fps')
+
+def test_improvements_and_new_metrics_pass():
+    """Test that improvements and metrics missing from the baseline pass."""
+    results = {
+        'detect_vehicles_fps': {'value': 200.0, 'unit': 'fps', 'higher_is_better': True},
+        'process_frame_p95_ms': {'value': 8.0, 'unit': 'ms', 'higher_is_better': False},
+        'mjpeg_encode_ms': {'value': 3.0, 'unit': 'ms', 'higher_is_better': False}
+    }
+    assert compare_to_baseline(results, BASELINE, 10.0) == []
+
+def test_missing_metrics_are_reported():
+    """Test that baseline metrics the run did not produce fail the check."""
+    results = {'detect_vehicles_fps': {'value': 100.0, 'unit': 'fps', 'higher_is_better': True}}
+    regressions = compare_to_baseline(results, BASELINE, 10.0)
+    assert len(regressions) == 1
+    assert regressions[0].startswith('process_frame_p95_ms: missing')
+
+def test_metric_tolerance():
+    """Test that a metric's own tolerance widens the allowed regression."""
+    baseline = {'tail_ms': _metric(10.0, 'ms', False, tolerance=50.0)}
+    assert compare_to_baseline({'tail_ms': _metric(14.0, 'ms', False)}, baseline, 10.0) == []
+    assert len(compare_to_baseline({'tail_ms': _metric(16.0, 'ms', False)}, baseline, 10.0)) == 1
+
+def test_metrics_needing_more_cores_are_skipped(monkeypatch):
+    """Test that a baseline from a bigger machine does not fail on missing multi-core metrics."""
+    monkeypatch.setattr(os, 'cpu_count', lambda: 2)
+    baseline = {
+        'tiled_detect_2_workers_ms': _metric(100.0, 'ms', False, min_cores=2),
+        'tiled_detect_4_workers_ms': _metric(60.0, 'ms', False, min_cores=4)
+    }
+    assert compare_to_baseline({}, baseline, 10.0) == ['tiled_detect_2_workers_ms: missing from this run, baseline 100.0 ms']
+
+def test_repeated_runs(monkeypatch):
+    """Test the median of repeated runs and the worst run for a baseline."""
+    values = iter([3.0, 1.0, 2.0, 3.0, 1.0, 2.0])
+    monkeypatch.setitem(BENCHMARKS, 'fake', lambda iterations: {'fake_ms': _metric(next(values), 'ms', False)})
+    assert run_benchmarks(1, ['fake'], repeat=3)['fake_ms']['value'] == 2.0
+    assert run_benchmarks(1, ['fake'], repeat=3, worst=True)['fake_ms']['value'] == 3.0
+
+def test_missing_baseline_fails(tmp_path, monkeypatch):
+    """Test that the check fails without a baseline unless it writes one."""
+    monkeypatch.setitem(BENCHMARKS, 'fake', lambda iterations: {'fake_ms': _metric(1.0, 'ms', False)})
+    baseline = tmp_path / 'baseline.json'
+    assert main(['--only', 'fake', '--baseline', str(baseline)]) == 1
+    assert main(['--only', 'fake', '--baseline', str(baseline), '--update-baseline']) == 0
+    assert json.loads(baseline.read_text())['fake_ms']['benchmark'] == 'fake'
+    assert main(['--only', 'fake', '--baseline', str(baseline)]) == 0
+
+def test_detection_agreement():
+    """Test recall and precision of candidate detections."""
+    reference = np.array([[0, 0, 10, 10], [50, 50, 10, 10]])
+    candidate = np.array([[1, 1, 10, 10], [100, 100, 10, 10]])
+    assert detection_agreement(reference, candidate) == {'recall': 0.5, 'precision': 0.5}
+    assert detection_agreement(reference, np.array([])) == {'recall': 0.0, 'precision': 1.0}
@@ -0,0 +1,248 @@
+"""
+Test file for the MJPEG frame broadcaster.
+"""
+import threading
+import cv2
+import pytest
+import numpy as np
+from src.streaming import FrameBroadcaster
+
+@pytest.fixture
+def frame():
+    """Create a frame for testing."""
+    return np.full((48, 64, 3), 128, dtype=np.uint8)
+
+def test_publish_without_clients_skips_encoding(frame):
+    """Test that frames are not encoded when nobody is watching."""
+    broadcaster = FrameBroadcaster()
+    assert broadcaster.publish(frame) is False
+    assert broadcaster.get_stats()['encoded_frames'] == 0
+
+def test_clients_share_encoded_frames(frame):
+    """Test that each frame is encoded once for all clients."""
+    broadcaster = FrameBroadcaster()
+    streams = [broadcaster.stream() for _ in range(3)]
+    received = []
+
+    def consume(stream):
+        received.append(next(stream))
+
+    threads = [threading.Thread(target=consume, args=(stream,)) for stream in streams]
+    for thread in threads:
+        thread.start()
+    while broadcaster.get_stats()['clients'] < 3:
+        threading.Event().wait(0.001)
+
+    assert broadcaster.publish(frame) is True
+    for thread in threads:
+        thread.join(timeout=2.0)
+
+    assert len(received) == 3
+    assert all(part is received[0] for part in received)
+    assert received[0].startswith(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n')
+    assert broadcaster.get_stats()['encoded_frames'] == 1
+
+    for stream in streams:
+        stream.close()
+    assert broadcaster.get_stats()['clients'] == 0
+
+def test_wait_for_frame_timeout():
+    """Test waiting when no new frame arrives."""
+    broadcaster = FrameBroadcaster()
+    assert broadcaster.wait_for_frame(0, timeout=0.01) is None
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_slow_client_skips_to_newest_frames():
+    """Test that a client that falls behind keeps only the newest frames."""
+    broadcaster = FrameBroadcaster(queue_depth=2)
+    stream = broadcaster.stream('slow')
+    frames = [np.full((8, 8, 3), value, dtype=np.uint8) for value in (0, 100, 200, 250)]
+
+    # Register the client, then publish while it reads nothing
+    result = []
+    thread = threading.Thread(target=lambda: result.append(next(stream)))
+    thread.start()
+    while broadcaster.get_stats()['clients'] < 1:
+        threading.Event().wait(0.001)
+    broadcaster.publish(frames[0])
+    thread.join(timeout=2.0)
+    for frame in frames[1:]:
+        broadcaster.publish(frame)
+
+    stats = broadcaster.get_client_stats()[0]
+    queued = list(broadcaster.clients[1].queue)
+    assert stats['queued_frames'] == 2
+    assert stats['dropped_frames'] == 1
+    assert stats['queued_bytes'] == sum(len(part) for part in queued)
+
+    # Reading resumes with the two newest frames
+    assert next(stream) is queued[0]
+    assert next(stream) is queued[1]
+    stream.close()
+
+def test_stalled_client_is_dropped(frame):
+    """Test that a client that takes no frames ends its stream."""
+    clock = FakeClock()
+    broadcaster = FrameBroadcaster(queue_depth=1, stall_timeout=5.0, clock=clock)
+    stream = broadcaster.stream()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(next(stream)))
+    thread.start()
+    while broadcaster.get_stats()['clients'] < 1:
+        threading.Event().wait(0.001)
+    broadcaster.publish(frame)
+    thread.join(timeout=2.0)
+
+    # The client is busy with its first frame while more arrive
+    broadcaster.publish(frame)
+    clock.now += 10.0
+    broadcaster.publish(frame)
+    assert broadcaster.get_client_stats()[0]['stalled'] is True
+    assert broadcaster.get_stats()['stalled_clients'] == 1
+    with pytest.raises(StopIteration):
+        next(stream)
+    assert broadcaster.get_stats()['clients'] == 0
+
+def test_idle_client_is_not_stalled_after_pause(frame):
+    """Test that a pause in publishing does not count against a waiting client."""
+    clock = FakeClock()
+    broadcaster = FrameBroadcaster(queue_depth=2, stall_timeout=5.0, clock=clock)
+    stream = broadcaster.stream()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(next(stream)))
+    thread.start()
+    while broadcaster.get_stats()['clients'] < 1:
+        threading.Event().wait(0.001)
+    broadcaster.publish(frame)
+    thread.join(timeout=2.0)
+
+    # Nothing is published for a while, then two frames arrive at once
+    clock.now += 60.0
+    broadcaster.publish(frame)
+    broadcaster.publish(frame)
+    assert broadcaster.get_client_stats()[0]['stalled'] is False
+    assert broadcaster.get_client_stats()[0]['queued_frames'] == 2
+    stream.close()
+
+def test_restart_after_close(frame):
+    """Test that streams end on close and new streams get frames after start."""
+    broadcaster = FrameBroadcaster()
+    old = broadcaster.stream()
+    ended = []
+
+    def consume():
+        ended.append(list(old) == [])
+
+    thread = threading.Thread(target=consume)
+    thread.start()
+    while broadcaster.get_stats()['clients'] < 1:
+        threading.Event().wait(0.001)
+
+    # Restarting right away still ends the streams of the stopped system
+    broadcaster.close()
+    broadcaster.start()
+    thread.join(timeout=2.0)
+    assert ended == [True]
+    assert broadcaster.sequence == 0
+
+    stream = broadcaster.stream()
+    received = []
+    thread = threading.Thread(target=lambda: received.append(next(stream)))
+    thread.start()
+    while broadcaster.get_stats()['clients'] < 1:
+        threading.Event().wait(0.001)
+    assert broadcaster.publish(frame) is True
+    thread.join(timeout=2.0)
+    assert len(received) == 1
+    assert broadcaster.wait_for_frame(0, timeout=0.01)[0] == 1
+    stream.close()
+
+def start_streams(broadcaster, *options):
+    """Start streams with the given options and wait until all registered."""
+    streams = [broadcaster.stream(**kwargs) for kwargs in options]
+    received = [[] for _ in streams]
+    threads = [
+        threading.Thread(target=lambda stream=stream, out=out: out.append(next(stream)))
+        for stream, out in zip(streams, received)
+    ]
+    for thread in threads:
+        thread.start()
+    while broadcaster.get_stats()['clients'] < len(streams):
+        threading.Event().wait(0.001)
+    return streams, received, threads
+
+def decode_part(part):
+    """Decode the JPEG of a multipart chunk."""
+    jpeg = part.split(b'\r\n\r\n', 1)[1][:-2]
+    return cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+def test_variants_are_encoded_once_per_frame():
+    """Test that clients with the same parameters share one encoding."""
+    broadcaster = FrameBroadcaster()
+    frame = np.random.default_rng(0).integers(0, 255, (240, 320, 3), dtype=np.uint8)
+    streams, received, threads = start_streams(
+        broadcaster,
+        {'width': 160, 'quality': 50},
+        {'width': 150, 'quality': 50},
+        {},
+    )
+    broadcaster.publish(frame)
+    for thread in threads:
+        thread.join(timeout=2.0)
+
+    # 150 rounds to the same 160 pixel width
+    assert received[0][0] is received[1][0]
+    assert decode_part(received[0][0]).shape == (120, 160, 3)
+    assert decode_part(received[2][0]).shape == (240, 320, 3)
+    assert len(received[0][0]) < len(received[2][0])
+    assert broadcaster.get_stats()['encoded_variants'] == 2
+    for stream in streams:
+        stream.close()
+
+def test_fps_limits_frames_per_client(frame):
+    """Test that a client limited to 5 fps only gets frames in new slots."""
+    clock = FakeClock()
+    broadcaster = FrameBroadcaster(queue_depth=10, clock=clock)
+    streams, received, threads = start_streams(broadcaster, {'fps': 5}, {})
+    for _ in range(10):
+        broadcaster.publish(frame)
+        clock.now += 1.0 / 30
+    for thread in threads:
+        thread.join(timeout=2.0)
+
+    # One frame each was taken by the reading thread, the rest is queued
+    slow, full = broadcaster.get_client_stats()
+    assert len(received[0]) + slow['queued_frames'] == 2
+    assert len(received[1]) + full['queued_frames'] == 10
+    for stream in streams:
+        stream.close()
+
+def test_adaptive_quality(frame):
+    """Test lowering quality for a client that falls behind and recovering it."""
+    clock = FakeClock()
+    broadcaster = FrameBroadcaster(queue_depth=1, stall_timeout=100.0, recover_frames=2, clock=clock)
+    streams, _, threads = start_streams(broadcaster, {'quality': 80})
+    broadcaster.publish(frame)
+    threads[0].join(timeout=2.0)
+
+    # The client reads nothing while frames keep coming
+    for _ in range(4):
+        clock.now += 1.0
+        broadcaster.publish(frame)
+    assert broadcaster.get_client_stats()[0]['quality'] == 50
+
+    # Once it keeps up the quality climbs back
+    for _ in range(4):
+        next(streams[0])
+        clock.now += 1.0
+        broadcaster.publish(frame)
+    assert broadcaster.get_client_stats()[0]['quality'] == 70
+    streams[0].close()
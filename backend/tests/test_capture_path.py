@@ -0,0 +1,110 @@
+"""
+Test file for native resolution capture and reused frame buffers.
+"""
+import cv2
+import pytest
+import numpy as np
+from config.settings import CAMERA_SETTINGS
+from src.camera.camera_manager import CameraManager
+from src.pipeline import Pipeline, Stage
+from src.traffic_monitor import TrafficMonitor
+from src.vehicle_detection.boxes import scale_regions
+
+@pytest.fixture
+def video_path(tmp_path):
+    """Write a test video at half the configured resolution."""
+    width, height = CAMERA_SETTINGS['width'] // 2, CAMERA_SETTINGS['height'] // 2
+    path = str(tmp_path / 'native.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (width, height))
+    for index in range(10):
+        writer.write(np.full((height, width, 3), index * 20, dtype=np.uint8))
+    writer.release()
+    return path
+
+def test_scale_regions():
+    """Test scaling regions to another frame size."""
+    regions = {'north': (100, 50, 300, 250)}
+    assert scale_regions(regions, 0.5, 2.0) == {'north': (50, 100, 150, 500)}
+
+def test_native_resolution_is_kept(video_path):
+    """Test that frames arrive at the source size without resizing."""
+    camera = CameraManager(video_path)
+    if not camera.start():
+        pytest.skip("Test video could not be opened")
+    try:
+        assert (camera.frame_width, camera.frame_height) == (CAMERA_SETTINGS['width'] // 2, CAMERA_SETTINGS['height'] // 2)
+        frame = camera.get_frame()
+        assert frame.shape == camera.frame_shape
+        assert camera.scale_regions({'lane': (100, 100, 200, 200)}) == {'lane': (50, 50, 100, 100)}
+    finally:
+        camera.stop()
+
+def test_resize_into_destination(video_path, monkeypatch):
+    """Test resizing into the caller's buffer when native resolution is off."""
+    monkeypatch.setitem(CAMERA_SETTINGS, 'native_resolution', False)
+    camera = CameraManager(video_path)
+    if not camera.start():
+        pytest.skip("Test video could not be opened")
+    try:
+        out = np.empty(camera.frame_shape, dtype=np.uint8)
+        frame, _ = camera.get_frame_with_timestamp(out)
+        assert frame is out
+        assert out.shape == (CAMERA_SETTINGS['height'], CAMERA_SETTINGS['width'], 3)
+    finally:
+        camera.stop()
+
+def test_direct_read_into_destination(video_path):
+    """Test that frames decode straight into the caller's buffer."""
+    camera = CameraManager(video_path)
+    if not camera.start():
+        pytest.skip("Test video could not be opened")
+    try:
+        out = np.empty(camera.frame_shape, dtype=np.uint8)
+        for _ in range(3):
+            frame, _ = camera.get_frame_with_timestamp(out)
+            assert frame is out
+        assert camera._direct
+        assert camera._raw_frame is None
+    finally:
+        camera.stop()
+
+def test_frame_buffers_are_reused():
+    """Test that frames rotate through a fixed set of buffers."""
+    camera = CameraManager('simulation')
+    camera.start()
+    try:
+        camera.set_frame_buffers(3)
+        frames = [camera.get_frame() for _ in range(6)]
+        assert len({id(frame) for frame in frames}) == 3
+        assert frames[0] is frames[3]
+    finally:
+        camera.stop()
+
+def test_monitor_captures_into_reused_buffers():
+    """Test that the default capture path does not allocate frames."""
+    monitor = TrafficMonitor(camera=CameraManager('simulation'))
+    assert monitor.start()
+    try:
+        frames = [monitor.capture_frame() for _ in range(4)]
+        assert len({id(frame) for frame in frames}) == 2
+        assert frames[0] is frames[2]
+    finally:
+        monitor.stop()
+
+def test_pipeline_max_in_flight():
+    """Test the bound on items alive in a pipeline."""
+    stages = [Stage('a', lambda item: item, queue_size=2), Stage('b', lambda item: item, queue_size=1)]
+    pipeline = Pipeline(lambda: None, stages)
+    assert pipeline.max_in_flight() == 1 + 3 + 2
+
+def test_monitor_scales_lanes(video_path):
+    """Test that lanes follow the camera's native resolution."""
+    lanes = {'north': (100, 0, 300, 200)}
+    monitor = TrafficMonitor(camera=CameraManager(video_path), lanes=lanes)
+    if not monitor.start():
+        pytest.skip("Test video could not be opened")
+    try:
+        assert monitor.lanes == {'north': (50, 0, 150, 100)}
+        assert monitor.configured_lanes == lanes
+    finally:
+        monitor.stop()
@@ -0,0 +1,82 @@
+"""
+Test file for the pluggable detection backends.
+"""
+import pytest
+import numpy as np
+from src.vehicle_detection.detector import CarDetector
+from src.vehicle_detection.backends import DetectorBackend, HaarCascadeBackend, OnnxDnnBackend
+from src.vehicle_detection.boxes import non_max_suppression
+
+class StaticBackend(DetectorBackend):
+    """Backend returning a fixed box and recording its inputs."""
+
+    grayscale = False
+
+    def __init__(self):
+        self.batches = []
+
+    def detect(self, image):
+        return np.array([[1, 2, 3, 4]], dtype=np.int32)
+
+    def detect_batch(self, images):
+        self.batches.append(len(images))
+        return [self.detect(image) for image in images]
+
+@pytest.fixture
+def onnx_backend():
+    """Create an ONNX backend without loading a network."""
+    backend = OnnxDnnBackend.__new__(OnnxDnnBackend)
+    backend.input_size = 640
+    backend.conf_threshold = 0.5
+    backend.nms_threshold = 0.45
+    backend.class_ids = np.array([2, 3, 5, 7])
+    return backend
+
+def test_default_backend_is_haar():
+    """Test that the default model uses the Haar cascade backend."""
+    detector = CarDetector()
+    assert isinstance(detector.backend, HaarCascadeBackend)
+    assert detector.car_cascade is not None
+
+def test_unknown_backend():
+    """Test handling of an unknown backend name."""
+    with pytest.raises(ValueError):
+        CarDetector(backend='tensorrt')
+
+def test_custom_backend_batch():
+    """Test that batches are passed to the backend in one call."""
+    backend = StaticBackend()
+    detector = CarDetector(backend=backend)
+    images = [np.zeros((100, 100, 3), dtype=np.uint8), np.zeros((50, 50), dtype=np.uint8)]
+
+    results = detector.detect_vehicles_batch(images)
+    assert backend.batches == [2]
+    assert [result.tolist() for result in results] == [[[1, 2, 3, 4]]] * 2
+    assert detector.car_cascade is None
+
+def test_non_max_suppression():
+    """Test vectorized non-maximum suppression."""
+    boxes = np.array([
+        [0, 0, 10, 10],
+        [1, 1, 10, 10],
+        [50, 50, 10, 10],
+        [0, 0, 10, 11],
+    ])
+    scores = np.array([0.6, 0.9, 0.8, 0.1])
+    assert non_max_suppression(boxes, scores, 0.5).tolist() == [1, 2]
+    assert non_max_suppression(np.empty((0, 4)), np.empty(0)).size == 0
+
+def test_onnx_output_parsing(onnx_backend):
+    """Test conversion of raw YOLOv8 output to vehicle boxes."""
+    output = np.zeros((84, 4), dtype=np.float32)
+    output[:4, 0] = [320, 320, 64, 64]   # car
+    output[4 + 2, 0] = 0.9
+    output[:4, 1] = [322, 322, 64, 64]   # duplicate car
+    output[4 + 2, 1] = 0.7
+    output[:4, 2] = [100, 100, 32, 32]   # person, not a vehicle
+    output[4 + 0, 2] = 0.95
+    output[:4, 3] = [500, 500, 40, 40]   # truck below threshold
+    output[4 + 7, 3] = 0.3
+
+    boxes = onnx_backend.parse_output(output, (720, 1280))
+    assert boxes.tolist() == [[576, 324, 128, 72]]
@@ -0,0 +1,82 @@
+"""
+Test file for threaded frame capture.
+"""
+import threading
+import cv2
+import pytest
+import numpy as np
+from src.camera.frame_grabber import FrameGrabber
+from src.camera.camera_manager import CameraManager
+
+class CountingSource:
+    """Source writing an increasing counter into every frame."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.count = 0
+        self.release = threading.Event()
+
+    def __call__(self, out):
+        if self.count >= self.limit:
+            self.release.wait(0.01)
+            return False
+        self.count += 1
+        out.fill(self.count)
+        return True
+
+def test_grabber_returns_newest_frame():
+    """Test that readers get the newest frame and skipped frames are counted."""
+    source = CountingSource(limit=5)
+    grabber = FrameGrabber(source, (4, 4, 3), buffer_size=3)
+    grabber.start()
+    try:
+        while grabber.captured < 5:
+            threading.Event().wait(0.005)
+        frame, timestamp = grabber.read(timeout=1.0)
+        assert frame[0, 0, 0] == 5
+        assert timestamp > 0
+        assert grabber.get_stats()['dropped'] == 4
+
+        # No new frame has been captured since the last read
+        assert grabber.read(timeout=0.05) is None
+    finally:
+        grabber.stop()
+
+def test_grabber_reads_into_buffer():
+    """Test copying the newest frame into a caller supplied buffer."""
+    source = CountingSource(limit=1)
+    grabber = FrameGrabber(source, (4, 4, 3))
+    grabber.start()
+    try:
+        out = np.zeros((4, 4, 3), dtype=np.uint8)
+        frame, _ = grabber.read(out=out, timeout=1.0)
+        assert frame is out
+        assert out[0, 0, 0] == 1
+    finally:
+        grabber.stop()
+
+@pytest.fixture
+def video_path(tmp_path):
+    """Write a short test video."""
+    path = str(tmp_path / 'traffic.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (320, 240))
+    for index in range(10):
+        writer.write(np.full((240, 320, 3), index * 20, dtype=np.uint8))
+    writer.release()
+    return path
+
+def test_threaded_camera_manager(video_path):
+    """Test threaded capture from a video file."""
+    camera = CameraManager(video_path, threaded=True)
+    if not camera.start():
+        pytest.skip("Test video could not be opened")
+    try:
+        result = camera.get_frame_with_timestamp()
+        assert result is not None
+        frame, timestamp = result
+        assert frame.shape == (camera.frame_height, camera.frame_width, 3)
+        # Files report media time, which starts at zero
+        assert 0 <= timestamp <= camera.replay.duration
+        assert camera.get_stats()['captured'] >= 1
+    finally:
+        camera.stop()
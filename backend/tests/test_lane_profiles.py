@@ -0,0 +1,121 @@
+"""
+Test file for per-lane detection profiles.
+"""
+import pytest
+import numpy as np
+from src.vehicle_detection.detector import CarDetector
+from src.vehicle_detection.boxes import filter_by_size
+from src.vehicle_detection.profiles import (
+    calibrate_lane_profiles,
+    derive_lane_profiles,
+    lane_profile,
+    scale_profile
+)
+
+LANES = {
+    'north': (580, 0, 700, 360),
+    'south': (580, 360, 700, 720),
+    'east': (700, 320, 1280, 400),
+    'west': (0, 320, 580, 400)
+}
+
+class RecordingCascade:
+    """Cascade stand-in recording the detectMultiScale arguments."""
+
+    def __init__(self, boxes=()):
+        self.calls = []
+        self.boxes = boxes
+
+    def detectMultiScale(self, image, **kwargs):
+        self.calls.append((image.shape, kwargs))
+        return np.array(self.boxes, dtype=np.int32).reshape(-1, 4)
+
+@pytest.fixture
+def detector():
+    """Create a CarDetector instance for testing."""
+    return CarDetector()
+
+def test_lane_profile_from_geometry():
+    """Test that the size range follows the lane's short side."""
+    profile = lane_profile(LANES['north'])
+    assert profile['min_size'] == (30, 30)
+    assert profile['max_size'] == (144, 144)
+    assert profile['scale_factor'] == 1.1
+    assert lane_profile(LANES['east'])['max_size'] == (96, 96)
+
+def test_derive_lane_profiles_overrides():
+    """Test that configured overrides replace derived values."""
+    profiles = derive_lane_profiles(LANES, overrides={'east': {'max_size': [70, 50], 'scale_factor': 1.2}})
+    assert profiles['east']['max_size'] == (70, 50)
+    assert profiles['east']['scale_factor'] == 1.2
+    assert profiles['west'] == lane_profile(LANES['west'])
+
+def test_calibrate_lane_profiles():
+    """Test that observed vehicle sizes become the search range."""
+    class FakeDetector:
+        def detect_vehicles_in_regions(self, frame, lanes):
+            return {
+                'north': np.array([[600, 100, 40, 50], [600, 200, 60, 70]]),
+                'south': np.empty((0, 4), dtype=np.int32),
+                'east': np.empty((0, 4), dtype=np.int32),
+                'west': np.empty((0, 4), dtype=np.int32)
+            }
+
+    profiles = calibrate_lane_profiles(FakeDetector(), [None, None], LANES, margin=0.5)
+    assert profiles['north']['min_size'] == (20, 25)
+    assert profiles['north']['max_size'] == (90, 105)
+    assert profiles['south'] == lane_profile(LANES['south'])
+
+def test_scale_profile():
+    """Test mapping a profile to a downscaled image."""
+    scaled = scale_profile({'min_size': (30, 30), 'max_size': (144, 96), 'scale_factor': 1.1}, 0.5)
+    assert scaled == {'min_size': (15, 15), 'max_size': (72, 48), 'scale_factor': 1.1}
+
+def test_filter_by_size():
+    """Test filtering boxes by a size range."""
+    boxes = np.array([[0, 0, 10, 10], [0, 0, 50, 50], [0, 0, 200, 40]])
+    assert filter_by_size(boxes, (20, 20), (100, 100)).tolist() == [[0, 0, 50, 50]]
+    assert len(filter_by_size(np.array([]), (20, 20))) == 0
+
+def test_cascade_searches_lane_range(detector):
+    """Test that each lane is searched with its own size range."""
+    cascade = RecordingCascade()
+    detector.backend.cascade = cascade
+    profiles = derive_lane_profiles(LANES)
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+    detector.detect_vehicles_in_lanes(frame, LANES, profiles)
+    assert len(cascade.calls) == len(LANES)
+    shape, kwargs = cascade.calls[0]
+    assert shape == (360, 120)
+    assert kwargs['minSize'] == (30, 30)
+    assert kwargs['maxSize'] == (144, 144)
+
+def test_lane_detections_are_merged(detector):
+    """Test offsets to frame coordinates and suppression of duplicates."""
+    regions = {'a': (0, 0, 100, 100), 'b': (50, 0, 150, 100)}
+    cascade = RecordingCascade()
+    detector.backend.cascade = cascade
+
+    # The same vehicle at x 60..90 seen from both lanes
+    answers = iter([[[60, 10, 30, 30]], [[10, 10, 30, 30]]])
+    cascade.detectMultiScale = lambda image, **kwargs: np.array(next(answers), dtype=np.int32)
+
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    detections = detector.detect_vehicles_in_lanes(frame, regions, derive_lane_profiles(regions, min_size=(20, 20)))
+    assert detections['a'].tolist() == [[60, 10, 30, 30]]
+    assert detections['b'].tolist() == []
+
+def test_monitor_counts_with_lane_profiles(monkeypatch):
+    """Test that the monitor updates its counts from per-lane detection."""
+    from src.traffic_monitor import TrafficMonitor
+    monitor = TrafficMonitor()
+    monitor.counter.lane_profiles = derive_lane_profiles(LANES)
+    monitor.frame_interval = 0.0
+    monkeypatch.setattr(
+        monitor.car_detector,
+        'detect_vehicles_in_lanes',
+        lambda frame, lanes, profiles, prepared: {lane: np.zeros((2, 4), dtype=np.int32) for lane in lanes}
+    )
+    monitor.update_counts(np.zeros((720, 1280, 3), dtype=np.uint8))
+    assert monitor.vehicle_counts == {lane: 2 for lane in LANES}
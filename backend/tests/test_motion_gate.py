@@ -0,0 +1,78 @@
+"""
+Test file for the motion gate module.
+"""
+import pytest
+import numpy as np
+from config.settings import DETECTION_SETTINGS
+from src.vehicle_detection.lane_counter import LaneCounter
+from src.vehicle_detection.motion import MotionGate
+
+REGIONS = {
+    'left': (0, 0, 200, 200),
+    'right': (200, 0, 400, 200)
+}
+
+@pytest.fixture
+def frame():
+    """Create a static frame for testing."""
+    return np.full((200, 400, 3), 60, dtype=np.uint8)
+
+def test_first_frame_detects_all_regions(frame):
+    """Test that every region is detected when there is no reference yet."""
+    gate = MotionGate()
+    assert gate.update(frame, REGIONS) == {'left', 'right'}
+
+def test_static_regions_are_skipped(frame):
+    """Test that unchanged regions are skipped and counted."""
+    gate = MotionGate()
+    gate.update(frame, REGIONS)
+    assert gate.update(frame, REGIONS) == set()
+
+    stats = gate.get_stats()
+    assert stats['checks'] == 2
+    assert stats['skipped'] == 2
+    assert stats['skip_ratio'] == 1.0
+    assert stats['region_skips'] == {'left': 1, 'right': 1}
+
+def test_moving_region_is_detected(frame):
+    """Test that only the region with movement is reported."""
+    gate = MotionGate()
+    gate.update(frame, REGIONS)
+
+    moved = frame.copy()
+    moved[50:120, 250:330] = 255
+    assert gate.update(moved, REGIONS) == {'right'}
+    assert gate.update(moved, REGIONS) == set()
+
+def test_slow_changes_accumulate(frame):
+    """Test that small changes add up against the last detected reference."""
+    gate = MotionGate(pixel_delta=25)
+    gate.update(frame, REGIONS)
+
+    step = frame.copy()
+    step[:, :200] += 15
+    assert gate.update(step, REGIONS) == set()
+
+    step[:, :200] += 15
+    assert gate.update(step, REGIONS) == {'left'}
+
+def test_invalid_method():
+    """Test handling of an unknown gating method."""
+    with pytest.raises(ValueError):
+        MotionGate(method='optical_flow')
+
+def test_static_frame_skips_preprocessing(frame):
+    """Test that the counter only blurs a frame once some lane moved."""
+    counter = LaneCounter(REGIONS, settings=dict(DETECTION_SETTINGS, motion_gate={'enabled': True}))
+    preprocessor = counter.detector.preprocessor
+    assert set(counter.detect(frame)) == {'left', 'right'}
+    assert preprocessor.frames == 1
+
+    assert counter.detect(frame) == {}
+    assert preprocessor.frames == 1
+
+    moved = frame.copy()
+    moved[50:120, 250:330] = 255
+    assert set(counter.detect(moved)) == {'right'}
+    assert preprocessor.frames == 2
+    counter.close()
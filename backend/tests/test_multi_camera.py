@@ -0,0 +1,103 @@
+"""
+Test file for the multi-source camera manager.
+"""
+import time
+import pytest
+import numpy as np
+from src.camera.multi_camera import MultiCameraManager
+from src.traffic_monitor import MultiSourceMonitor, TrafficMonitor
+
+@pytest.fixture
+def manager():
+    """Create a started manager with three simulated intersections."""
+    manager = MultiCameraManager({
+        'main_street': {'source': 'simulation', 'fps': 50},
+        'harbor_road': {'source': 'simulation', 'fps': 50},
+        'station_square': {'source': 'simulation', 'fps': 10}
+    }, decode_workers=2)
+    assert manager.start()
+    yield manager
+    manager.stop()
+
+def test_next_frame_serves_sources_round_robin(manager):
+    """Test that every source gets a turn before any source repeats."""
+    time.sleep(0.2)
+    served = []
+    for _ in range(3):
+        name, frame, timestamp = manager.next_frame(timeout=1.0)
+        served.append(name)
+        assert frame.shape == (720, 1280, 3)
+        assert timestamp > 0
+    assert sorted(served) == ['harbor_road', 'main_street', 'station_square']
+
+def test_per_source_stats(manager):
+    """Test that decode rates follow each source's fps and drops are counted."""
+    time.sleep(0.5)
+    stats = manager.get_stats()
+    assert set(stats) == {'main_street', 'harbor_road', 'station_square'}
+    assert stats['main_street']['decoded'] > stats['station_square']['decoded']
+    assert stats['station_square']['fps'] <= 12
+
+    assert manager.get_frame('main_street') is not None
+    stats = manager.get_stats()['main_street']
+    assert stats['delivered'] == 1
+    assert stats['dropped'] >= 1
+
+def test_get_frame_into_buffer(manager):
+    """Test reading one source into a caller supplied buffer."""
+    out = np.empty((720, 1280, 3), dtype=np.uint8)
+    frame, _ = manager.get_frame('harbor_road', out=out, timeout=1.0)
+    assert frame is out
+
+def test_monitors_share_manager(manager):
+    """Test that monitors run on source handles of one manager."""
+    monitors = {name: TrafficMonitor(camera=manager.camera(name)) for name in manager.names}
+    for monitor in monitors.values():
+        assert monitor.start()
+        frame, counts = monitor.process_frame()
+        assert frame is not None
+        assert set(counts) == set(monitor.lanes)
+        monitor.stop()
+    assert manager.running
+
+def test_multi_source_monitor_is_fair(manager):
+    """Test that detection through the scheduler keeps up with the slow source."""
+    monitors = MultiSourceMonitor(manager)
+    assert monitors.start()
+    for monitor in monitors.monitors.values():
+        monitor.frame_interval = 0.0
+        monitor.counter.count = lambda frame: {'north': 1}
+    try:
+        time.sleep(0.2)
+        served = [monitors.process_next()[0] for _ in range(3)]
+        assert sorted(served) == sorted(manager.names)
+        dropped = manager.get_stats()['station_square']['dropped']
+
+        deadline = time.time() + 1.0
+        while time.time() < deadline:
+            result = monitors.process_next()
+            assert result is not None
+            name, frame, counts = result
+            assert frame is monitors.buffers[name]
+            assert counts['north'] == 1
+    finally:
+        monitors.stop()
+
+    # Every new frame of the slow source was detected, the fast ones shared
+    # the rest of the detection time
+    assert manager.get_stats()['station_square']['dropped'] == dropped
+    fast = [monitors.processed['main_street'], monitors.processed['harbor_road']]
+    assert min(fast) >= 0.8 * max(fast)
+    assert manager.running
+
+def test_unknown_source(manager):
+    """Test that handles are only created for configured sources."""
+    with pytest.raises(KeyError):
+        manager.camera('nowhere')
+
+def test_failing_source_is_reported():
+    """Test that start fails when a source cannot be opened."""
+    manager = MultiCameraManager({'broken': '/nonexistent/video.mp4'})
+    assert not manager.start()
+    with pytest.raises(ValueError):
+        MultiCameraManager({})
@@ -0,0 +1,180 @@
+"""
+Test file for the offline video analysis CLI.
+"""
+import json
+from concurrent.futures import Future
+import cv2
+import pytest
+import numpy as np
+from config.settings import DETECTION_SETTINGS
+from src import offline_analysis
+from src.offline_analysis import (
+    analyze_video,
+    build_rows,
+    fit_lanes,
+    get_video_info,
+    main,
+    merge_buckets,
+    seek_frame,
+    split_frame_ranges
+)
+
+LANES = {
+    'left': (0, 0, 160, 120),
+    'right': (160, 0, 320, 120)
+}
+
+@pytest.fixture
+def video_path(tmp_path):
+    """Write a short test video at 10 fps."""
+    path = str(tmp_path / 'traffic.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (320, 120))
+    for index in range(40):
+        writer.write(np.full((120, 320, 3), index * 5, dtype=np.uint8))
+    writer.release()
+    return path
+
+class InlineExecutor:
+    """Process pool stand-in that runs tasks in the test process."""
+
+    def __init__(self, max_workers, initializer, initargs):
+        initializer(*initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+def test_split_frame_ranges():
+    """Test splitting a video into contiguous ranges."""
+    assert split_frame_ranges(10, 3) == [(0, 4), (4, 8), (8, 10)]
+    assert split_frame_ranges(2, 8) == [(0, 1), (1, 2)]
+    assert split_frame_ranges(0, 4) == []
+
+def test_merge_and_build_rows():
+    """Test merging bucket results from several ranges."""
+    first = {0: {'samples': 2, 'sum': {'left': 3, 'right': 0}, 'max': {'left': 2, 'right': 0}}}
+    second = {
+        0: {'samples': 1, 'sum': {'left': 3, 'right': 1}, 'max': {'left': 3, 'right': 1}},
+        1: {'samples': 1, 'sum': {'left': 0, 'right': 2}, 'max': {'left': 0, 'right': 2}}
+    }
+    rows = build_rows(merge_buckets([first, second]), LANES, 30.0)
+    assert rows == [
+        {'bucket_start': 0.0, 'samples': 3, 'left_mean': 2.0, 'left_max': 3, 'right_mean': 0.333, 'right_max': 1},
+        {'bucket_start': 30.0, 'samples': 1, 'left_mean': 0.0, 'left_max': 0, 'right_mean': 2.0, 'right_max': 2}
+    ]
+    # Inputs are left untouched
+    assert first[0]['samples'] == 2
+
+def test_analyze_range_samples_absolute_frames(video_path):
+    """Test that sampling does not depend on the range boundaries."""
+    offline_analysis._init_worker(None)
+    whole = offline_analysis.analyze_range(video_path, 0, 40, 10.0, LANES, 5, 2.0)
+    parts = [offline_analysis.analyze_range(video_path, start, end, 10.0, LANES, 5, 2.0)
+             for start, end in split_frame_ranges(40, 3)]
+    assert merge_buckets(parts) == whole
+    assert sum(bucket['samples'] for bucket in whole.values()) == 8
+
+class DriftingCapture:
+    """Capture over numbered frames whose seeks land two frames early."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.position = 0
+
+    def set(self, prop, value):
+        self.position = max(int(value) - 2, 0) if value else 0
+
+    def get(self, prop):
+        return self.position
+
+    def grab(self):
+        if self.position >= self.frames:
+            return False
+        self.position += 1
+        return True
+
+def test_seek_frame(video_path):
+    """Test that seeking lands exactly on the requested frame."""
+    capture = cv2.VideoCapture(video_path)
+    try:
+        for index in (0, 7, 23):
+            assert seek_frame(capture, index)
+            ret, frame = capture.read()
+            assert ret
+            assert abs(int(frame.mean()) - index * 5) <= 2
+    finally:
+        capture.release()
+
+def test_seek_frame_decodes_forward_when_off():
+    """Test the fallback when a seek does not land on the frame."""
+    capture = DriftingCapture(40)
+    assert seek_frame(capture, 10)
+    assert capture.position == 10
+    assert not seek_frame(DriftingCapture(5), 10)
+
+def test_worker_uses_detection_settings(video_path):
+    """Test that offline counting follows the live detection settings."""
+    settings = dict(DETECTION_SETTINGS, detection_scale=0.5, motion_gate={'enabled': True})
+    offline_analysis._init_worker(None, settings)
+    assert offline_analysis._detector.detection_scale == 0.5
+    buckets = offline_analysis.analyze_range(video_path, 0, 40, 10.0, LANES, 5, 2.0)
+    assert sum(bucket['samples'] for bucket in buckets.values()) == 8
+
+def test_analyze_video(video_path):
+    """Test the full multi-process analysis."""
+    rows = analyze_video(video_path, lanes=LANES, workers=2, sample_interval=0.5,
+                         bucket_seconds=2.0, lanes_size=(320, 120))
+    assert [row['bucket_start'] for row in rows] == [0.0, 2.0]
+    assert all(row['samples'] == 4 for row in rows)
+
+def test_fit_lanes():
+    """Test mapping lanes onto frames of another size."""
+    assert fit_lanes(LANES, (320, 120), (320, 120)) == LANES
+    assert fit_lanes(LANES, (320, 120), (640, 360)) == {'left': (0, 0, 320, 360), 'right': (320, 0, 640, 360)}
+
+def test_analyze_video_scales_lanes(tmp_path, monkeypatch):
+    """Test that lanes drawn for the camera size are scaled to the video size."""
+    path = str(tmp_path / 'small.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (640, 360))
+    for index in range(10):
+        writer.write(np.full((360, 640, 3), index * 5, dtype=np.uint8))
+    writer.release()
+    assert get_video_info(path)[2:] == (640, 360)
+
+    counted = []
+
+    class RecordingCounter(offline_analysis.LaneCounter):
+        def __init__(self, lanes, **kwargs):
+            counted.append(dict(lanes))
+            super().__init__(lanes, **kwargs)
+
+    monkeypatch.setattr(offline_analysis, 'ProcessPoolExecutor', InlineExecutor)
+    monkeypatch.setattr(offline_analysis, 'LaneCounter', RecordingCounter)
+    lanes = {'north': (580, 0, 700, 360), 'east': (700, 320, 1280, 400)}
+    rows = analyze_video(path, lanes=lanes, workers=1, sample_interval=0.5, bucket_seconds=1.0)
+    assert counted and all(lanes == {'north': (290, 0, 350, 180), 'east': (350, 160, 640, 200)}
+                               for lanes in counted)
+    assert set(rows[0]) == {'bucket_start', 'samples', 'north_mean', 'north_max', 'east_mean', 'east_max'}
+
+def test_main_writes_ndjson(video_path, tmp_path, monkeypatch):
+    """Test the command line entry point."""
+    monkeypatch.setattr(offline_analysis, 'LANES', LANES)
+    monkeypatch.setitem(offline_analysis.CAMERA_SETTINGS, 'width', 320)
+    monkeypatch.setitem(offline_analysis.CAMERA_SETTINGS, 'height', 120)
+    output = tmp_path / 'counts.ndjson'
+    assert main([video_path, '--format', 'ndjson', '--output', str(output),
+                 '--workers', '1', '--bucket-seconds', '1']) == 0
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(rows) == 4
+    assert set(rows[0]) == {'bucket_start', 'samples', 'left_mean', 'left_max', 'right_mean', 'right_max'}
+
+def test_main_missing_video(tmp_path):
+    """Test handling of a video that cannot be opened."""
+    assert main([str(tmp_path / 'missing.mp4')]) == 1
@@ -0,0 +1,51 @@
+"""
+Test file for the cached lane overlay.
+"""
+import cv2
+import numpy as np
+from src.overlay import LaneOverlay
+
+LANES = {
+    'north': (580, 0, 700, 360),
+    'south': (580, 360, 700, 720),
+    'east': (700, 320, 1280, 400),
+    'west': (0, 320, 580, 400)
+}
+
+def draw_directly(frame, lanes, counts):
+    """Draw the overlay the way it used to be drawn on every frame."""
+    for lane, (x1, y1, x2, y2) in lanes.items():
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(frame, lane, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        cv2.putText(frame, f"Count: {counts[lane]}", (x1, y2 + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+    return frame
+
+def test_overlay_matches_direct_drawing():
+    """Test that the composited overlay equals drawing on the frame."""
+    counts = {'north': 3, 'south': 0, 'east': 12, 'west': 1}
+    frame = np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    expected = draw_directly(frame.copy(), LANES, counts)
+    result = LaneOverlay().apply(frame, LANES, counts)
+    assert np.array_equal(result, expected)
+
+def test_overlay_rebuilds_only_on_change():
+    """Test that the overlay is cached until the counts change."""
+    overlay = LaneOverlay()
+    counts = {lane: 0 for lane in LANES}
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    for _ in range(5):
+        overlay.apply(frame, LANES, counts)
+    assert overlay.rebuilds == 1
+
+    counts['north'] = 4
+    overlay.apply(frame, LANES, counts)
+    assert overlay.rebuilds == 2
+
+def test_overlay_on_non_contiguous_frame():
+    """Test compositing onto a view of a larger frame."""
+    counts = {lane: 2 for lane in LANES}
+    base = np.zeros((720, 2560, 3), dtype=np.uint8)
+    view = base[:, ::2]
+    expected = draw_directly(np.zeros((720, 1280, 3), dtype=np.uint8), LANES, counts)
+    LaneOverlay().apply(view, LANES, counts)
+    assert np.array_equal(view, expected)
@@ -0,0 +1,82 @@
+"""
+Test file for the staged processing pipeline.
+"""
+import threading
+import time
+import pytest
+from src.pipeline import FramePacer, Pipeline, Stage
+
+def test_drop_oldest_keeps_newest_items():
+    """Test that a full queue discards its oldest item."""
+    stage = Stage('test', lambda item: item, queue_size=2, drop_policy='drop_oldest')
+    for item in range(4):
+        stage.put(item)
+    assert list(stage.queue) == [2, 3]
+    assert stage.get_stats()['dropped'] == 2
+    assert stage.get_stats()['queue_depth'] == 2
+
+def test_drop_newest_rejects_items():
+    """Test that a full queue rejects incoming items."""
+    stage = Stage('test', lambda item: item, queue_size=1, drop_policy='drop_newest')
+    assert stage.put(1) is True
+    assert stage.put(2) is False
+    assert list(stage.queue) == [1]
+
+def test_invalid_drop_policy():
+    """Test handling of an unknown drop policy."""
+    with pytest.raises(ValueError):
+        Stage('test', lambda item: item, drop_policy='drop_random')
+
+def test_pipeline_runs_stages_in_order():
+    """Test items flowing through all stages."""
+    results = []
+    done = threading.Event()
+    counter = iter(range(1000))
+
+    def sink(item):
+        results.append(item)
+        if len(results) >= 5:
+            done.set()
+
+    stages = [
+        Stage('double', lambda item: item * 2, drop_policy='block'),
+        Stage('increment', lambda item: item + 1, drop_policy='block'),
+        Stage('sink', sink, drop_policy='block')
+    ]
+    pipeline = Pipeline(lambda: next(counter), stages, fps=200)
+    pipeline.start()
+    try:
+        assert done.wait(timeout=5.0)
+    finally:
+        pipeline.stop()
+
+    assert results[:5] == [1, 3, 5, 7, 9]
+    stats = pipeline.get_stats()
+    assert stats['source']['produced'] >= 5
+    assert stats['stages']['sink']['processed'] >= 5
+    assert set(stats['stages']) == {'double', 'increment', 'sink'}
+
+def test_stage_errors_are_counted():
+    """Test that a failing item does not stop the stage."""
+    stage = Stage('fail', lambda item: 1 / item)
+    stage.start()
+    try:
+        stage.put(0)
+        stage.put(1)
+        deadline = time.monotonic() + 2.0
+        while stage.processed < 1 and time.monotonic() < deadline:
+            time.sleep(0.005)
+    finally:
+        stage.stop()
+    assert stage.errors == 1
+    assert stage.processed == 1
+
+def test_pacer_accounts_for_work_time():
+    """Test that the pacer targets a rate instead of a fixed sleep."""
+    pacer = FramePacer(100)
+    start = time.monotonic()
+    for _ in range(10):
+        pacer.wait()
+        time.sleep(0.005)
+    elapsed = time.monotonic() - start
+    assert elapsed < 0.2
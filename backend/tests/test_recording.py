@@ -0,0 +1,106 @@
+"""
+Test file for raw frame recording and replay.
+"""
+import json
+import os
+import pytest
+import numpy as np
+from src.camera.recording import FrameRecorder, RecordingSource, is_recording
+from src.camera.camera_manager import CameraManager
+from src.overlay import LaneOverlay
+
+def record(directory, count=7, grayscale=False, segment_frames=3):
+    """Record frames whose pixels encode their index."""
+    recorder = FrameRecorder(str(directory), (24, 32), segment_frames=segment_frames, grayscale=grayscale)
+    for index in range(count):
+        recorder.write(np.full((24, 32, 3), index, dtype=np.uint8), timestamp=100.0 + index * 0.5)
+    recorder.close()
+    return str(directory)
+
+def test_recording_layout(tmp_path):
+    """Test that frames are split into segments listed in the index."""
+    directory = record(tmp_path / 'incident')
+    assert is_recording(directory)
+    with open(os.path.join(directory, 'index.json')) as f:
+        index = json.load(f)
+    assert [segment['frames'] for segment in index['segments']] == [3, 3, 1]
+    assert index['frame_shape'] == [24, 32, 3]
+
+def test_finished_segments_survive_without_close(tmp_path):
+    """Test that a recorder that never closes leaves its full segments readable."""
+    recorder = FrameRecorder(str(tmp_path / 'incident'), (24, 32), segment_frames=3)
+    for index in range(7):
+        recorder.write(np.full((24, 32, 3), index, dtype=np.uint8), timestamp=100.0 + index)
+
+    source = RecordingSource(str(tmp_path / 'incident'))
+    assert source.frame_count == 6
+    assert [int(source.read()[0][0, 0, 0]) for _ in range(6)] == list(range(6))
+    assert source.read() is None
+
+def test_replay_returns_views(tmp_path):
+    """Test replaying all frames as memory-mapped views with relative times."""
+    source = RecordingSource(record(tmp_path / 'incident'))
+    frames = []
+    while True:
+        result = source.read()
+        if result is None:
+            break
+        frames.append(result)
+    assert [int(frame[0, 0, 0]) for frame, _ in frames] == list(range(7))
+    assert [timestamp for _, timestamp in frames] == [index * 0.5 for index in range(7)]
+    assert isinstance(frames[0][0].base, np.memmap) or not frames[0][0].flags.owndata
+
+def test_seek_and_loop(tmp_path):
+    """Test seeking by time and looping at the end."""
+    source = RecordingSource(record(tmp_path / 'incident'), loop=True)
+    source.seek(2.6)
+    assert source.read()[0][0, 0, 0] == 6
+    assert source.read()[0][0, 0, 0] == 0
+
+def test_grayscale_recording(tmp_path):
+    """Test recording BGR frames as grayscale."""
+    source = RecordingSource(record(tmp_path / 'incident', count=2, grayscale=True))
+    frame, _ = source.read()
+    assert frame.shape == (24, 32)
+    assert source.grayscale
+
+def test_recorder_rejects_other_sizes(tmp_path):
+    """Test that frames must match the recording size."""
+    recorder = FrameRecorder(str(tmp_path / 'incident'), (24, 32))
+    with pytest.raises(ValueError):
+        recorder.write(np.zeros((10, 10, 3), dtype=np.uint8))
+
+def test_camera_records_and_replays(tmp_path, monkeypatch):
+    """Test recording camera frames and replaying them through the camera manager."""
+    from config.settings import CAMERA_SETTINGS
+    monkeypatch.setitem(CAMERA_SETTINGS, 'replay', {'speed': 0})
+    directory = str(tmp_path / 'incident')
+
+    camera = CameraManager('simulation')
+    camera.start()
+    camera.start_recording(directory, grayscale=True)
+    recorded = [camera.get_frame() for _ in range(4)]
+    camera.stop()
+
+    replay = CameraManager(directory)
+    assert replay.start()
+    try:
+        assert replay.frame_shape == (camera.frame_height, camera.frame_width)
+        frame, timestamp = replay.get_frame_with_timestamp()
+        assert frame.shape == replay.frame_shape
+        assert frame.flags.writeable
+        assert timestamp == 0.0
+        assert replay.get_stats()['frames_read'] == 1
+        assert frame.mean() > 0 and recorded[0].mean() > 0
+    finally:
+        replay.stop()
+
+def test_overlay_on_grayscale_frame():
+    """Test that the lane overlay draws on grayscale frames."""
+    overlay = LaneOverlay()
+    frame = np.zeros((120, 160), dtype=np.uint8)
+    overlay.apply(frame, {'a': (10, 20, 100, 80)}, {'a': 1})
+    assert frame[20, 50] == 150
+    view = np.zeros((120, 320), dtype=np.uint8)[:, ::2]
+    overlay.apply(view, {'a': (10, 20, 100, 80)}, {'a': 1})
+    assert view[20, 50] == 150
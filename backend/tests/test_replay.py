@@ -0,0 +1,90 @@
+"""
+Test file for the video file replay source.
+"""
+import time
+import cv2
+import pytest
+import numpy as np
+from src.camera.replay import ReplaySource
+from src.camera.camera_manager import CameraManager
+
+@pytest.fixture
+def video_path(tmp_path):
+    """Write a 20 frame test video at 10 fps whose frames encode their index."""
+    path = str(tmp_path / 'replay.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+    for index in range(20):
+        writer.write(np.full((48, 64, 3), index * 10, dtype=np.uint8))
+    writer.release()
+    return path
+
+def frame_index(frame):
+    """Recover the frame index encoded in the pixel values."""
+    return int(round(frame.mean() / 10))
+
+def test_replay_timestamps_and_frame_step(video_path):
+    """Test media timestamps with decode level frame skipping."""
+    source = ReplaySource(video_path, speed=0, frame_step=3)
+    results = []
+    while True:
+        result = source.read()
+        if result is None:
+            break
+        results.append(result)
+    assert [round(timestamp, 3) for _, timestamp in results] == [0.2, 0.5, 0.8, 1.1, 1.4, 1.7]
+    assert [frame_index(frame) for frame, _ in results] == [2, 5, 8, 11, 14, 17]
+    assert source.frames_skipped == 14
+
+def test_replay_seek_and_loop(video_path):
+    """Test seeking to a media time and restarting at the end."""
+    source = ReplaySource(video_path, speed=0, loop=True, start=1.5)
+    frame, timestamp = source.read()
+    assert timestamp == pytest.approx(1.5)
+    assert frame_index(frame) == 15
+
+    for _ in range(4):
+        source.read()
+    frame, timestamp = source.read()
+    assert timestamp == 0.0
+    assert frame_index(frame) == 0
+
+def test_replay_is_deterministic(video_path):
+    """Test that two runs produce the same frames and timestamps."""
+    runs = []
+    for _ in range(2):
+        source = ReplaySource(video_path, speed=0, frame_step=2)
+        runs.append([(frame.tobytes(), timestamp) for frame, timestamp in iter(source.read, None)])
+    assert runs[0] == runs[1]
+
+def test_replay_pacing(video_path):
+    """Test real time and faster than real time pacing."""
+    source = ReplaySource(video_path, speed=1.0)
+    start = time.monotonic()
+    for _ in range(4):
+        source.read()
+    assert time.monotonic() - start >= 0.28
+
+    source = ReplaySource(video_path, speed=4.0)
+    start = time.monotonic()
+    for _ in range(5):
+        source.read()
+    assert 0.09 <= time.monotonic() - start < 0.3
+
+def test_replay_invalid_file(tmp_path):
+    """Test that unreadable files are rejected."""
+    with pytest.raises(ValueError):
+        ReplaySource(str(tmp_path / 'missing.avi'))
+
+def test_camera_manager_replays_files(video_path, monkeypatch):
+    """Test that file sources are replayed with media timestamps."""
+    from config.settings import CAMERA_SETTINGS
+    monkeypatch.setitem(CAMERA_SETTINGS, 'replay', {'speed': 0, 'frame_step': 2})
+    camera = CameraManager(video_path)
+    assert camera.start()
+    try:
+        frame, timestamp = camera.get_frame_with_timestamp()
+        assert frame.shape == (camera.frame_height, camera.frame_width, 3)
+        assert timestamp == pytest.approx(0.1)
+        assert camera.get_stats()['frames_skipped'] == 1
+    finally:
+        camera.stop()
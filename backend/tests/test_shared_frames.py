@@ -0,0 +1,152 @@
+"""
+Test file for shared memory frame transport.
+"""
+import queue
+import time
+import pytest
+import numpy as np
+from src.camera.shared_frames import SharedFrameRing
+from src.camera.camera_manager import CameraManager
+from src.vehicle_detection import workers
+from src.vehicle_detection.workers import DetectionWorkerPool
+
+@pytest.fixture
+def ring():
+    """Create a small shared frame ring."""
+    ring = SharedFrameRing((4, 6, 3), slots=3)
+    yield ring
+    ring.close()
+
+def test_attached_ring_sees_frames(ring):
+    """Test that another handle reads the written frame without copying."""
+    frame = np.full((4, 6, 3), 7, dtype=np.uint8)
+    slot, seq = ring.write(frame)
+
+    other = SharedFrameRing.attach(ring.spec)
+    try:
+        view = other.view(slot)
+        assert np.array_equal(view, frame)
+        assert not view.flags.writeable
+        assert other.is_current(slot, seq)
+    finally:
+        other.close()
+
+def test_overwritten_slot_is_detected(ring):
+    """Test that readers notice when their slot was reused."""
+    slot, seq = ring.write(np.zeros((4, 6, 3), dtype=np.uint8))
+    for value in range(1, ring.slots + 1):
+        ring.write(np.full((4, 6, 3), value, dtype=np.uint8))
+    assert not ring.is_current(slot, seq)
+    assert ring.read(slot, seq) is None
+
+def test_slot_invalid_while_writing(ring):
+    """Test that a slot being written is not current for any sequence."""
+    slot, seq, view = ring.begin_write()
+    assert not ring.is_current(slot, seq)
+    view[:] = 3
+    ring.commit(slot, seq)
+    assert ring.read(slot, seq)[0, 0, 0] == 3
+
+def test_pinned_slot_is_not_overwritten(ring):
+    """Test that the writer skips a slot pinned by a reader."""
+    slot, seq = ring.write(np.full((4, 6, 3), 9, dtype=np.uint8))
+    assert ring.pin(slot, seq)
+    for value in range(3 * ring.slots):
+        ring.write(np.full((4, 6, 3), value, dtype=np.uint8))
+    assert ring.is_current(slot, seq)
+    assert ring.view(slot)[0, 0, 0] == 9
+
+    ring.release(slot)
+    for value in range(ring.slots):
+        ring.write(np.zeros((4, 6, 3), dtype=np.uint8))
+    assert not ring.is_current(slot, seq)
+
+def test_pin_fails_for_overwritten_frame(ring):
+    """Test that a frame that is already gone cannot be pinned."""
+    slot, seq = ring.write(np.zeros((4, 6, 3), dtype=np.uint8))
+    for _ in range(ring.slots):
+        ring.write(np.zeros((4, 6, 3), dtype=np.uint8))
+    assert not ring.pin(slot, seq)
+    assert not ring.is_pinned(slot)
+
+def test_fully_pinned_ring_overwrites(ring):
+    """Test that the writer still makes progress when every slot is pinned."""
+    pinned = [ring.write(np.zeros((4, 6, 3), dtype=np.uint8)) for _ in range(ring.slots)]
+    assert all(ring.pin(slot, seq) for slot, seq in pinned)
+    ring.write(np.ones((4, 6, 3), dtype=np.uint8))
+    assert ring.overwritten_pins == 1
+    assert sum(not ring.is_current(slot, seq) for slot, seq in pinned) == 1
+
+def test_worker_keeps_frame_during_slow_detection(ring, monkeypatch):
+    """Test that frames written while a worker detects do not tear its frame."""
+    used = {}
+
+    class SlowCounter:
+        def __init__(self, lanes, settings=None, detector=None):
+            used['settings'] = settings
+
+        def count(self, frame):
+            # The camera keeps writing far more frames than the ring holds
+            for value in range(3 * ring.slots):
+                ring.write(np.full((4, 6, 3), value, dtype=np.uint8))
+            return {'lane': int(frame[0, 0, 0])}
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(workers, 'LaneCounter', SlowCounter)
+    monkeypatch.setattr(workers, 'create_detector', lambda settings, model_path: None)
+    settings = {'tiling': {'enabled': True}}
+
+    slot, seq = ring.write(np.full((4, 6, 3), 200, dtype=np.uint8))
+    assert ring.pin(slot, seq)
+    tasks, results = queue.Queue(), queue.Queue()
+    tasks.put((slot, seq, 1.0))
+    tasks.put(None)
+    workers._worker_main(ring.spec, {'lane': (0, 0, 6, 4)}, tasks, results, settings, None)
+
+    assert results.get_nowait() == (seq, 1.0, {'lane': 200})
+    assert used['settings'] == settings
+    assert not ring.is_pinned(slot)
+
+def test_camera_publishes_into_ring():
+    """Test that the camera decodes straight into the shared ring."""
+    camera = CameraManager('simulation', shared_memory_slots=4)
+    assert camera.start()
+    try:
+        slot, seq, timestamp = camera.publish_frame()
+        assert seq == 1
+        assert timestamp > 0
+        assert camera.shared_ring.view(slot).any()
+    finally:
+        camera.stop()
+    assert camera.shared_ring is None
+
+def test_publish_requires_shared_memory():
+    """Test that publishing without a ring is an error."""
+    camera = CameraManager('simulation')
+    camera.start()
+    with pytest.raises(RuntimeError):
+        camera.publish_frame()
+
+def test_worker_pool_counts_lanes():
+    """Test that worker processes detect frames referenced over the queue."""
+    lanes = {'left': (0, 0, 160, 120), 'right': (160, 0, 320, 120)}
+    ring = SharedFrameRing((120, 320, 3), slots=4)
+    pool = DetectionWorkerPool(ring.spec, lanes, processes=1)
+    pool.start()
+    try:
+        slot, seq = ring.write(np.zeros((120, 320, 3), dtype=np.uint8))
+        assert pool.submit(slot, seq, time.time())
+
+        results = []
+        deadline = time.time() + 60
+        while not results and time.time() < deadline:
+            results = pool.poll(timeout=1.0)
+        assert results[0][0] == seq
+        assert results[0][2] == {'left': 0, 'right': 0}
+        assert pool.get_stats()['completed'] == 1
+        assert not ring.is_pinned(slot)
+    finally:
+        pool.close()
+        ring.close()
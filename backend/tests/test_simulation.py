@@ -0,0 +1,54 @@
+"""
+Test file for the simulated camera source.
+"""
+import numpy as np
+from src.camera.simulation import SimulatedSource
+from src.camera.camera_manager import CameraManager
+
+def vehicle_mask(source):
+    """Build a mask of the pixels covered by vehicles in the last frame."""
+    mask = np.zeros((source.height, source.width), dtype=bool)
+    for y1, y2, x1, x2 in source._dirty:
+        mask[y1:y2, x1:x2] = True
+    return mask
+
+def test_frames_only_differ_at_vehicles():
+    """Test that old vehicle positions are restored to the background."""
+    source = SimulatedSource(320, 240, num_vehicles=6, num_lanes=4)
+    for _ in range(25):
+        frame = source.read()
+    mask = vehicle_mask(source)
+    assert mask.any()
+    assert np.array_equal(frame[~mask], source.background[~mask])
+
+def test_buffer_is_reused():
+    """Test that rendering reuses the internal buffer."""
+    source = SimulatedSource(320, 240)
+    first = source.read()
+    second = source.read()
+    assert first is second
+
+def test_read_into_out_buffer():
+    """Test rendering into a caller supplied buffer."""
+    source = SimulatedSource(320, 240, num_vehicles=2)
+    out = np.empty((240, 320, 3), dtype=np.uint8)
+    frame = source.read(out)
+    assert frame is out
+    assert np.array_equal(out, source.buffer)
+
+def test_vehicles_move():
+    """Test that consecutive frames differ."""
+    source = SimulatedSource(320, 240, num_vehicles=3)
+    first = source.read().copy()
+    second = source.read()
+    assert not np.array_equal(first, second)
+
+def test_camera_manager_simulation_frames_are_owned():
+    """Test that simulated frames from the camera manager can be modified."""
+    camera = CameraManager('simulation')
+    assert camera.start()
+    first = camera.get_frame()
+    first[:] = 255
+    second = camera.get_frame()
+    assert second.shape == (camera.frame_height, camera.frame_width, 3)
+    assert not np.array_equal(first, second)
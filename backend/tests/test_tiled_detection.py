@@ -0,0 +1,130 @@
+"""
+Test file for tiled parallel detection.
+"""
+import threading
+import pytest
+import numpy as np
+from src.vehicle_detection.detector import CarDetector
+from src.vehicle_detection.backends import DetectorBackend, HaarCascadeBackend
+from src.vehicle_detection.boxes import tile_regions
+from config.settings import DETECTION_SETTINGS
+
+class PatternBackend(DetectorBackend):
+    """Backend reporting a box around every 255 valued square of the input."""
+
+    def __init__(self, size=40):
+        self.size = size
+        self.threads = set()
+
+    def detect(self, image, profile=None):
+        self.threads.add(threading.current_thread().name)
+        ys, xs = np.nonzero(image[:-self.size + 1, :-self.size + 1] == 255)
+        boxes = [
+            [x, y, self.size, self.size] for y, x in zip(ys, xs)
+            if (image[y:y + self.size, x:x + self.size] == 255).all()
+            and (x == 0 or image[y, x - 1] != 255) and (y == 0 or image[y - 1, x] != 255)
+        ]
+        return np.array(boxes, dtype=np.int32).reshape(-1, 4)
+
+def test_tile_regions_cover_image():
+    """Test that tiles cover the image with the requested overlap."""
+    tiles = tile_regions(1280, 720, 640, 128)
+    assert tiles[0] == (0, 0, 640, 640)
+    assert tiles[-1] == (640, 80, 1280, 720)
+    assert len(tiles) == 6
+    covered = np.zeros((720, 1280), dtype=bool)
+    for x1, y1, x2, y2 in tiles:
+        covered[y1:y2, x1:x2] = True
+    assert covered.all()
+
+def test_tile_regions_small_image():
+    """Test that an image smaller than a tile is one tile."""
+    assert tile_regions(300, 200, 640, 128) == [(0, 0, 300, 200)]
+
+def test_tile_regions_invalid_overlap():
+    """Test that the overlap must be smaller than the tile."""
+    with pytest.raises(ValueError):
+        tile_regions(1280, 720, 256, 256)
+
+def test_tiled_detection_merges_overlap():
+    """Test that vehicles in tile overlaps are reported once in image coordinates."""
+    backend = PatternBackend()
+    detector = CarDetector(backend=backend, tile_workers=2)
+    image = np.zeros((400, 600), dtype=np.uint8)
+    image[100:140, 230:270] = 255  # inside the overlap of the first two tiles
+    image[300:340, 500:540] = 255
+
+    detections = detector.detect_vehicles_tiled(image, tile_size=256, overlap=64, prepared=image)
+    detector.close()
+    assert sorted(detections.tolist()) == [[230, 100, 40, 40], [500, 300, 40, 40]]
+    assert all(name.startswith('tile-detect') for name in backend.threads)
+
+def test_tiled_detection_matches_full_image():
+    """Test that tiling finds the same vehicles as a single pass."""
+    detector = CarDetector(backend=PatternBackend(), tile_workers=2)
+    image = np.zeros((500, 700), dtype=np.uint8)
+    for x, y in [(10, 10), (300, 200), (600, 450), (250, 240)]:
+        image[y:y + 40, x:x + 40] = 255
+
+    full = detector.detect_preprocessed(image)
+    tiled = detector.detect_vehicles_tiled(image, tile_size=256, overlap=64, prepared=image)
+    detector.close()
+    assert sorted(tiled.tolist()) == sorted(full.tolist())
+
+def test_tiled_detection_only_covers_regions():
+    """Test that only the lane crops are tiled."""
+    backend = PatternBackend()
+    shapes = []
+    detect = backend.detect
+    backend.detect = lambda image, profile=None: shapes.append(image.shape) or detect(image)
+    detector = CarDetector(backend=backend, tile_workers=2)
+    image = np.zeros((1000, 1000), dtype=np.uint8)
+    image[100:140, 100:140] = 255  # in the lane
+    image[800:840, 800:840] = 255  # outside every lane
+
+    regions = {'a': (50, 50, 450, 250)}
+    detections = detector.detect_vehicles_tiled(image, tile_size=256, overlap=64, prepared=image, regions=regions)
+    detector.close()
+    assert detections.tolist() == [[100, 100, 40, 40]]
+    assert sum(height * width for height, width in shapes) < 2 * 400 * 200
+
+def test_tiling_defaults_from_settings(monkeypatch):
+    """Test that tile size and overlap default to DETECTION_SETTINGS."""
+    monkeypatch.setitem(DETECTION_SETTINGS, 'tiling', dict(DETECTION_SETTINGS['tiling'], tile_size=256, overlap=64))
+    backend = PatternBackend()
+    shapes = []
+    backend.detect = lambda image, profile=None: shapes.append(image.shape) or np.empty((0, 4), dtype=np.int32)
+    detector = CarDetector(backend=backend, tile_workers=1)
+    image = np.zeros((400, 600), dtype=np.uint8)
+    detector.detect_vehicles_tiled(image, prepared=image)
+    detector.close()
+    assert len(shapes) == len(tile_regions(600, 400, 256, 64))
+
+def test_tiled_detection_empty():
+    """Test tiled detection on a blank frame."""
+    detector = CarDetector()
+    assert len(detector.detect_vehicles_tiled(np.zeros((720, 1280, 3), dtype=np.uint8))) == 0
+    detector.close()
+
+def test_haar_backend_clone():
+    """Test that cascade copies are independent."""
+    backend = CarDetector().backend
+    assert isinstance(backend, HaarCascadeBackend)
+    clone = backend.clone()
+    assert clone is not backend
+    assert clone.cascade is not backend.cascade
+    assert clone.min_size == backend.min_size
+
+def test_monitor_counts_with_tiling(monkeypatch):
+    """Test that the monitor assigns tiled detections to its lanes."""
+    from src.traffic_monitor import TrafficMonitor
+    monitor = TrafficMonitor(lanes={'a': (0, 0, 100, 100), 'b': (100, 0, 200, 100)})
+    monitor.counter.tiling = {'tile_size': 64, 'overlap': 16}
+    monitor.frame_interval = 0.0
+    monkeypatch.setattr(
+        monitor.car_detector,
+        'detect_vehicles_tiled',
+        lambda frame, **kwargs: np.array([[10, 10, 20, 20], [150, 10, 20, 20], [120, 50, 20, 20]])
+    )
+    monitor.update_counts(np.zeros((100, 200, 3), dtype=np.uint8))
+    assert monitor.vehicle_counts == {'a': 1, 'b': 2}
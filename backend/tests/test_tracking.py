@@ -0,0 +1,120 @@
+"""
+Test file for the vehicle tracking module.
+"""
+import pytest
+import numpy as np
+from src.vehicle_detection.boxes import iou_matrix
+from src.vehicle_detection.tracking import VehicleTracker, DetectionTracker
+
+REGIONS = {
+    'left': (0, 0, 200, 200),
+    'right': (200, 0, 400, 200)
+}
+
+class FakeCounter:
+    """Lane counter finding a car that moves 10 pixels right per frame."""
+
+    def __init__(self):
+        self.calls = 0
+        self.frame = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        box = np.array([[50 + 10 * self.frame, 50, 40, 40]])
+        return {'left': box, 'right': np.empty((0, 4))}
+
+def test_iou_matrix():
+    """Test pairwise IoU computation."""
+    a = np.array([[0, 0, 10, 10], [20, 20, 10, 10]])
+    b = np.array([[0, 0, 10, 10], [5, 0, 10, 10], [100, 100, 5, 5]])
+    iou = iou_matrix(a, b)
+    assert iou.shape == (2, 3)
+    assert iou[0, 0] == pytest.approx(1.0)
+    assert iou[0, 1] == pytest.approx(50 / 150)
+    assert iou[1, 2] == 0.0
+    assert iou_matrix(np.empty((0, 4)), b).shape == (0, 3)
+
+def test_tracks_keep_ids():
+    """Test that a moving box keeps its track ID."""
+    tracker = VehicleTracker(min_hits=2)
+    tracker.predict()
+    tracker.update(np.array([[0, 0, 40, 40], [200, 200, 40, 40]]))
+    first_ids = tracker.ids.copy()
+    assert tracker.confirmed()[0].size == 0
+
+    tracker.predict()
+    tracker.update(np.array([[205, 200, 40, 40], [5, 0, 40, 40]]))
+    assert sorted(tracker.ids.tolist()) == sorted(first_ids.tolist())
+    assert len(tracker.confirmed()[0]) == 2
+
+def test_tracks_predict_between_detections():
+    """Test that tracks are carried forward using their velocity."""
+    tracker = VehicleTracker()
+    tracker.predict()
+    tracker.update(np.array([[0, 0, 40, 40]]))
+    for _ in range(3):
+        tracker.predict()
+    tracker.update(np.array([[30, 0, 40, 40]]))
+    assert tracker.velocities[0][0] == pytest.approx(5.0)
+
+    tracker.predict()
+    assert tracker.boxes[0][0] == pytest.approx(35.0)
+
+def test_unmatched_tracks_are_dropped():
+    """Test removal of tracks that stay unmatched."""
+    tracker = VehicleTracker(max_misses=1)
+    tracker.predict()
+    tracker.update(np.array([[0, 0, 40, 40]]))
+    tracker.predict()
+    tracker.update(np.empty((0, 4)))
+    assert len(tracker) == 1
+    tracker.predict()
+    tracker.update(np.empty((0, 4)))
+    assert len(tracker) == 0
+
+def test_detection_tracker_runs_detector_every_n_frames():
+    """Test the detect-then-track pipeline."""
+    counter = FakeCounter()
+    pipeline = DetectionTracker(counter, detect_every=3)
+    frame = np.zeros((200, 400, 3), dtype=np.uint8)
+
+    for index in range(7):
+        counter.frame = index
+        tracks = pipeline.process(frame, REGIONS)
+
+    assert counter.calls == 3
+    assert len(tracks['left']) == 1
+    assert len(tracks['right']) == 0
+
+def test_detection_tracker_keeps_static_lanes():
+    """Test that lanes left out by the motion gate keep their tracks."""
+    counter = FakeCounter()
+    pipeline = DetectionTracker(counter, detect_every=1, tracker=VehicleTracker(max_misses=1))
+    frame = np.zeros((200, 400, 3), dtype=np.uint8)
+    pipeline.process(frame, REGIONS)
+    tracks = pipeline.process(frame, REGIONS)
+    assert len(tracks['left']) == 1
+
+    # Nothing moves any more, the gate leaves every lane out
+    counter.detect = lambda frame: {}
+    for _ in range(5):
+        assert pipeline.process(frame, REGIONS)['left'].tolist() == tracks['left'].tolist()
+
+def test_monitor_tracks_with_lane_counter(monkeypatch):
+    """Test that tracking mode detects with the counter's lane profiles."""
+    from config.settings import DETECTION_SETTINGS, LANES
+    from src.traffic_monitor import TrafficMonitor
+    from src.vehicle_detection.profiles import derive_lane_profiles
+    monkeypatch.setitem(DETECTION_SETTINGS, 'mode', 'tracking')
+    monitor = TrafficMonitor()
+    monitor.counter.lane_profiles = derive_lane_profiles(LANES)
+    calls = []
+
+    def detect_in_lanes(frame, lanes, profiles, prepared):
+        calls.append(profiles)
+        return {lane: np.empty((0, 4), dtype=np.int32) for lane in lanes}
+
+    monkeypatch.setattr(monitor.car_detector, 'detect_vehicles_in_lanes', detect_in_lanes)
+    monitor.update_counts(np.zeros((720, 1280, 3), dtype=np.uint8))
+    assert calls == [monitor.counter.lane_profiles]
+    assert monitor.vehicle_counts == {lane: 0 for lane in LANES}
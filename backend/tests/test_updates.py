@@ -0,0 +1,237 @@
+"""
+Test file for change-driven state updates.
+"""
+import pytest
+from src.streaming import UpdatePublisher, apply_delta, diff_state
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    """Create a manually advanced clock."""
+    return FakeClock()
+
+@pytest.fixture
+def sent():
+    """Collect sent messages as (event, data, client ids) tuples."""
+    return []
+
+@pytest.fixture
+def publisher(clock, sent):
+    """Create a publisher limited to 2 messages per second."""
+    return UpdatePublisher(lambda event, data, sids: sent.append((event, data, sids)), max_rate=2.0, clock=clock)
+
+def state(north=0, south=0, signal='red'):
+    """Build a system state."""
+    return {
+        'traffic': {
+            'vehicle_counts': {'north': north, 'south': south},
+            'lanes': {'north': (0, 0, 10, 10)},
+            'timestamp': 'ignored'
+        },
+        'signals': {'signals': {'north': signal}},
+        'timestamp': 'ignored'
+    }
+
+def test_diff_and_apply_round_trip():
+    """Test that applying a diff reproduces the new state."""
+    old = {'a': {'b': 1, 'c': 2}, 'd': [1, 2], 'e': 5}
+    new = {'a': {'b': 1, 'c': 3}, 'd': [1, 2, 3], 'f': None}
+    changed, removed = diff_state(old, new)
+    assert changed == {'a': {'c': 3}, 'd': [1, 2, 3], 'f': None}
+    assert removed == [['e']]
+    assert apply_delta({'a': {'b': 1, 'c': 2}, 'd': [1, 2], 'e': 5}, changed, removed) == new
+
+def test_full_state_on_connect(publisher, sent):
+    """Test that a new client gets the full state without timestamps."""
+    publisher.update(state(north=2))
+    publisher.add_client('a')
+    event, data, sids = sent[-1]
+    assert (event, sids) == ('state_sync', ['a'])
+    assert data['version'] == 1
+    assert data['state']['traffic']['vehicle_counts'] == {'north': 2, 'south': 0}
+    assert 'timestamp' not in data['state']['traffic']
+
+def test_unchanged_state_sends_nothing(publisher, clock, sent):
+    """Test that repeated identical states do not create messages."""
+    publisher.add_client('a')
+    publisher.acknowledge('a', 0)
+    publisher.update(state())
+    publisher.acknowledge('a', 1)
+    sent.clear()
+    for _ in range(30):
+        clock.now += 1.0
+        current = state()
+        current['timestamp'] = str(clock.now)
+        assert publisher.update(current) == 0
+    assert sent == []
+    assert publisher.version == 1
+
+def test_deltas_against_acknowledged_version(publisher, clock, sent):
+    """Test that deltas only carry changes since the acknowledged version."""
+    publisher.update(state())
+    publisher.add_client('a')
+    publisher.acknowledge('a', 1)
+
+    clock.now += 1.0
+    publisher.update(state(north=3))
+    event, data, _ = sent[-1]
+    assert event == 'state_delta'
+    assert (data['base'], data['version']) == (1, 2)
+    assert data['changed'] == {'traffic': {'vehicle_counts': {'north': 3}}}
+    assert data['removed'] == []
+
+def test_unacknowledged_client_gets_coalesced_delta(publisher, clock, sent):
+    """Test that a client waits for its ack and then gets one combined delta."""
+    publisher.update(state())
+    publisher.add_client('a')
+    publisher.acknowledge('a', 1)
+    clock.now += 1.0
+    publisher.update(state(north=1))
+
+    # No ack for version 2 yet, so further changes are held back
+    for north in (2, 3):
+        clock.now += 1.0
+        assert publisher.update(state(north=north, signal='green')) == 0
+    publisher.acknowledge('a', 2)
+    clock.now += 1.0
+    publisher.update(state(north=3, signal='green'))
+    _, data, _ = sent[-1]
+    assert (data['base'], data['version']) == (2, 4)
+    assert data['changed'] == {
+        'traffic': {'vehicle_counts': {'north': 3}},
+        'signals': {'signals': {'north': 'green'}}
+    }
+
+def test_bursts_are_rate_limited(publisher, clock, sent):
+    """Test coalescing of changes arriving faster than max_rate."""
+    publisher.add_client('a')
+    publisher.acknowledge('a', 0)
+    publisher.update(state(north=1))
+    publisher.acknowledge('a', 1)
+    sent.clear()
+
+    for north in range(2, 6):
+        clock.now += 0.1
+        publisher.update(state(north=north))
+    assert sent == []
+
+    clock.now += 0.5
+    publisher.update(state(north=5))
+    assert len(sent) == 1
+    assert sent[0][1]['changed'] == {'traffic': {'vehicle_counts': {'north': 5}}}
+
+def test_missing_ack_triggers_resync(publisher, clock, sent):
+    """Test that a client that lost a delta gets the full state again."""
+    publisher.add_client('a')
+    publisher.acknowledge('a', 0)
+    clock.now += 1.0
+    publisher.update(state(north=1))
+    assert sent[-1][0] == 'state_delta'
+
+    clock.now += 10.0
+    publisher.update(state(north=1))
+    event, data, _ = sent[-1]
+    assert event == 'state_sync'
+    assert data['version'] == 1
+    assert publisher.get_stats()['full_sent'] == 2
+
+    # The full state is not sent again while the client works through it
+    clock.now += 10.0
+    publisher.update(state(north=2))
+    assert publisher.get_stats()['full_sent'] == 2
+
+def test_stalled_client_is_disconnected(clock, sent):
+    """Test that a client acknowledging nothing is disconnected."""
+    disconnected = []
+    publisher = UpdatePublisher(
+        lambda event, data, sids: sent.append((event, data, sids)),
+        stall_timeout=30.0,
+        disconnect=disconnected.append,
+        clock=clock
+    )
+    publisher.add_client('a')
+    publisher.add_client('b')
+    publisher.acknowledge('b', 0)
+    for north in range(1, 5):
+        clock.now += 10.0
+        publisher.update(state(north=north))
+        publisher.acknowledge('b', publisher.version)
+    assert disconnected == ['a']
+    assert list(publisher.get_client_stats()) == ['b']
+    assert publisher.get_stats()['stalled_clients'] == 1
+
+def test_client_stats(publisher, clock, sent):
+    """Test queued bytes and skipped versions per client."""
+    publisher.add_client('a')
+    publisher.acknowledge('a', 0)
+    publisher.update(state(north=1))
+    for north in (2, 3):
+        clock.now += 0.1
+        publisher.update(state(north=north))
+    publisher.acknowledge('a', 1)
+    clock.now += 1.0
+    publisher.update(state(north=3))
+
+    # Version 2 was coalesced into the delta from 1 to 3
+    stats = publisher.get_client_stats()['a']
+    assert stats['lag'] == 2
+    assert stats['queued_bytes'] > 0
+    assert stats['skipped_versions'] == 1
+    publisher.acknowledge('a', 3)
+    stats = publisher.get_client_stats()['a']
+    assert (stats['lag'], stats['queued_bytes'], stats['waiting_seconds']) == (0, 0, 0.0)
+
+def test_snapshots_are_pruned(publisher, clock):
+    """Test that only snapshots clients may still need are kept."""
+    publisher.add_client('a')
+    publisher.acknowledge('a', 0)
+    for north in range(1, 10):
+        clock.now += 1.0
+        publisher.update(state(north=north))
+        publisher.acknowledge('a', publisher.version)
+    assert set(publisher.snapshots) == {publisher.version}
+    publisher.remove_client('a')
+    assert publisher.get_stats()['clients'] == 0
+
+def test_clients_at_same_version_share_one_emit(publisher, clock, sent):
+    """Test that a group of clients gets one message in one emit."""
+    publisher.update(state())
+    for sid in ('a', 'b', 'c'):
+        publisher.add_client(sid)
+        publisher.acknowledge(sid, 1)
+    sent.clear()
+
+    clock.now += 1.0
+    publisher.update(state(north=1))
+    assert len(sent) == 1
+    assert sorted(sent[0][2]) == ['a', 'b', 'c']
+    assert publisher.get_stats()['deltas_sent'] == 3
+
+def test_lane_subscription(publisher, clock, sent):
+    """Test that clients only get the lanes they subscribed to."""
+    publisher.update(state())
+    publisher.add_client('a', lanes=['south'])
+    assert sent[-1][1]['state']['traffic']['vehicle_counts'] == {'south': 0}
+    assert sent[-1][1]['state']['traffic']['lanes'] == {}
+    publisher.acknowledge('a', 1)
+    sent.clear()
+
+    # Changes to other lanes are not sent
+    clock.now += 1.0
+    publisher.update(state(north=4))
+    assert sent == []
+
+    clock.now += 1.0
+    publisher.update(state(north=4, south=2))
+    _, data, sids = sent[-1]
+    assert sids == ['a']
+    assert (data['base'], data['version']) == (1, 3)
+    assert data['changed'] == {'traffic': {'vehicle_counts': {'south': 2}}}
@@ -0,0 +1,169 @@
+"""
+Test file for the multi-region vehicle detection helpers.
+"""
+import pytest
+import cv2
+import numpy as np
+from pathlib import Path
+from src.vehicle_detection.detector import CarDetector
+from src.vehicle_detection.boxes import assign_to_regions, merge_regions, regions_bounding_box
+from src.vehicle_detection.preprocessing import FramePreprocessor
+
+LANES = {
+    'north': (580, 0, 700, 360),
+    'south': (580, 360, 700, 720),
+    'east': (700, 320, 1280, 400),
+    'west': (0, 320, 580, 400)
+}
+
+@pytest.fixture
+def detector():
+    """Create a CarDetector instance for testing."""
+    return CarDetector()
+
+def test_regions_bounding_box():
+    """Test the union bounding box of the lane regions."""
+    assert regions_bounding_box(LANES) == (0, 0, 1280, 720)
+    assert regions_bounding_box({'a': (10, 20, 30, 40), 'b': (5, 25, 15, 50)}) == (5, 20, 30, 50)
+
+def test_merge_regions():
+    """Test that only lanes searched more cheaply together are merged."""
+    # North and south share a column, east and west would add the gap
+    assert merge_regions(LANES) == [(580, 0, 700, 720), (700, 320, 1280, 400), (0, 320, 580, 400)]
+    assert merge_regions({'a': (0, 0, 100, 100), 'b': (10, 10, 90, 120)}) == [(0, 0, 100, 120)]
+    assert merge_regions({'a': (0, 0, 100, 100), 'b': (200, 200, 300, 300)}) == [(0, 0, 100, 100), (200, 200, 300, 300)]
+
+def test_assign_to_regions():
+    """Test centroid based assignment of detections to lanes."""
+    detections = np.array([
+        [600, 100, 40, 40],   # north
+        [600, 500, 40, 40],   # south
+        [900, 340, 40, 40],   # east
+        [100, 340, 40, 40],   # west
+        [100, 600, 40, 40],   # outside every lane
+        [560, 100, 60, 40],   # straddles west edge of north, centroid in north
+    ])
+    assigned = assign_to_regions(detections, LANES)
+    assert len(assigned['north']) == 2
+    assert len(assigned['south']) == 1
+    assert len(assigned['east']) == 1
+    assert len(assigned['west']) == 1
+    assert sum(len(boxes) for boxes in assigned.values()) == 5
+
+def test_assign_empty_detections():
+    """Test assignment with no detections."""
+    assigned = assign_to_regions(np.array([]), LANES)
+    assert set(assigned) == set(LANES)
+    assert all(boxes.shape == (0, 4) for boxes in assigned.values())
+
+def test_detect_vehicles_in_regions_single_pass(detector, monkeypatch):
+    """Test that adjacent lanes share one pass and boxes map back to frame coordinates."""
+    calls = []
+
+    def fake_detect(image, profile=None):
+        calls.append(image.shape)
+        return np.array([[15, 15, 10, 10]], dtype=np.int32)
+
+    monkeypatch.setattr(detector, 'detect_preprocessed', fake_detect)
+    regions = {'a': (100, 100, 150, 150), 'b': (150, 100, 200, 150)}
+    frame = np.zeros((300, 400, 3), dtype=np.uint8)
+
+    detections = detector.detect_vehicles_in_regions(frame, regions)
+    assert calls == [(50, 100)]
+    assert detections['a'].tolist() == [[115, 115, 10, 10]]
+    assert len(detections['b']) == 0
+
+def test_detect_vehicles_in_regions_straddling_vehicle(detector, monkeypatch):
+    """Test that a vehicle found by two overlapping crops is counted once."""
+    def fake_detect(image, profile=None):
+        # Both lane crops see the same vehicle at frame position (140, 40)
+        offset = 140 if image.shape[1] == 200 else 40
+        return np.array([[offset, 40, 40, 20]], dtype=np.int32)
+
+    monkeypatch.setattr(detector, 'detect_preprocessed', fake_detect)
+    regions = {'a': (0, 0, 200, 100), 'b': (100, 0, 200, 300)}
+    frame = np.zeros((300, 300, 3), dtype=np.uint8)
+    assert merge_regions(regions) == [(0, 0, 200, 100), (100, 0, 200, 300)]
+
+    detections = detector.detect_vehicles_in_regions(frame, regions)
+    assert detections['a'].tolist() == [[140, 40, 40, 20]]
+    assert len(detections['b']) == 0
+
+def test_detect_vehicles_in_regions_blank_frame(detector):
+    """Test multi-region detection on a frame without vehicles."""
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    detections = detector.detect_vehicles_in_regions(frame, LANES)
+    assert {lane: len(boxes) for lane, boxes in detections.items()} == {lane: 0 for lane in LANES}
+
+def test_detect_vehicles_in_regions_invalid_input(detector):
+    """Test handling of invalid input."""
+    with pytest.raises(ValueError):
+        detector.detect_vehicles_in_regions(None, LANES)
+
+def test_preprocessor_matches_preprocess_image(detector):
+    """Test that the shared preprocessing equals per-image preprocessing."""
+    frame = np.random.default_rng(0).integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    preprocessor = FramePreprocessor()
+    assert np.array_equal(preprocessor.process(frame), detector.preprocess_image(frame))
+
+def test_preprocessor_reuses_buffers():
+    """Test that frames of the same size are written into the same buffers."""
+    rng = np.random.default_rng(1)
+    preprocessor = FramePreprocessor()
+    first = preprocessor.process(rng.integers(0, 256, (120, 160, 3), dtype=np.uint8))
+    second = preprocessor.process(rng.integers(0, 256, (120, 160, 3), dtype=np.uint8))
+    assert first is second
+    assert preprocessor.process(np.zeros((60, 80, 3), dtype=np.uint8)).shape == (60, 80)
+
+def test_preprocessor_accepts_grayscale(detector):
+    """Test that grayscale input skips the color conversion."""
+    gray = np.random.default_rng(2).integers(0, 256, (120, 160), dtype=np.uint8)
+    preprocessor = FramePreprocessor()
+    assert np.array_equal(preprocessor.process(gray), detector.preprocess_image(gray))
+    assert preprocessor.grayscale(gray) is gray
+
+def test_detect_vehicles_in_regions_uses_views(detector, monkeypatch):
+    """Test that lane detections run on views of the preprocessed frame."""
+    views = []
+
+    def fake_detect(image, profile=None):
+        views.append(image)
+        return np.array([])
+
+    monkeypatch.setattr(detector, 'detect_preprocessed', fake_detect)
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    prepared = detector.preprocess_frame(frame)
+    detector.detect_vehicles_in_regions(frame, LANES, prepared)
+    assert [view.shape for view in views] == [(720, 120), (80, 580), (80, 580)]
+    assert all(np.shares_memory(view, prepared) for view in views)
+    assert detector.preprocessor.frames == 1
+
+def test_detection_scale_remaps_boxes(detector, monkeypatch):
+    """Test that downscaled detections are mapped back to input coordinates."""
+    scaled = CarDetector(detection_scale=0.5)
+    shapes = []
+
+    def fake_detect(image):
+        shapes.append(image.shape)
+        return np.array([[10, 20, 30, 15]], dtype=np.int32)
+
+    monkeypatch.setattr(scaled.backend, 'detect', fake_detect)
+    detections = scaled.detect_vehicles(np.zeros((720, 1280, 3), dtype=np.uint8))
+    assert shapes == [(360, 640)]
+    assert detections.tolist() == [[20, 40, 60, 30]]
+
+def test_detection_scale_matches_full_resolution(detector):
+    """Test that half scale finds the vehicles of the sample image."""
+    image = cv2.imread(str(Path(__file__).parent.parent / 'examples' / 'images' / 'test_cars.jpg'))
+    if image is None:
+        pytest.skip("Sample image not available")
+    full = detector.detect_vehicles(image)
+    half = CarDetector(detection_scale=0.5).detect_vehicles(image)
+    assert abs(len(full) - len(half)) <= max(1, len(full) // 2)
+
+def test_detection_scale_invalid():
+    """Test that scales outside (0, 1] are rejected."""
+    with pytest.raises(ValueError):
+        CarDetector(detection_scale=0)
+    with pytest.raises(ValueError):
+        CarDetector(detection_scale=2.0)
@@ -0,0 +1,116 @@
+"""
+Test file for subscription rooms of the web interface.
+"""
+import threading
+import pytest
+from src.streaming.wire import decode_traffic_update
+from src.web_interface import app, socketio
+from src.web_interface.app import broadcast_traffic_data, client_rooms
+from src.web_interface.app import rooms as subscription_rooms
+
+@pytest.fixture
+def connect():
+    """Connect Socket.IO test clients, disconnecting them afterwards."""
+    clients = []
+
+    def make(**auth):
+        client = socketio.test_client(app, auth=auth)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        if client.is_connected():
+            client.disconnect()
+
+def test_lane_subscription_gets_filtered_update(connect):
+    """Test that a client subscribed to one lane only receives that lane."""
+    client = connect(lanes=['lane2'])
+    received = client.get_received()
+    assert [message['name'] for message in received] == ['traffic_update']
+    assert list(received[0]['args'][0]['lanes']) == ['lane2']
+
+def test_same_subscription_shares_a_room(connect):
+    """Test that clients with equal subscriptions share one room."""
+    first = connect(lanes=['lane1', 'lane3'])
+    second = connect(lanes=['lane3', 'lane1'])
+    everything = connect()
+    rooms = set(client_rooms.values())
+    assert rooms == {'json:lane1,lane3', 'json:*'}
+
+    for client in (first, second, everything):
+        client.get_received()
+    broadcast_traffic_data()
+    assert len(first.get_received()) == 1
+    assert list(second.get_received()[0]['args'][0]['lanes']) == ['lane1', 'lane3']
+    assert len(everything.get_received()[0]['args'][0]['lanes']) == 4
+
+def test_binary_subscription(connect):
+    """Test the binary traffic update for a binary subscription."""
+    client = connect(format='binary', lanes=['lane4'])
+    message = client.get_received()[0]
+    assert message['name'] == 'traffic_update_binary'
+    assert list(decode_traffic_update(message['args'][0])['lanes']) == ['lane4']
+
+def test_resubscribe_moves_rooms(connect):
+    """Test changing the lanes of a connected client."""
+    client = connect(lanes=['lane1'])
+    client.get_received()
+    client.emit('subscribe', {'lanes': ['lane2']})
+    assert list(client.get_received()[0]['args'][0]['lanes']) == ['lane2']
+    broadcast_traffic_data()
+    assert list(client.get_received()[0]['args'][0]['lanes']) == ['lane2']
+
+@pytest.mark.parametrize('lanes', [[1], 'lane1', ['lane9'], {'lane1': True}])
+def test_invalid_lanes_are_rejected(connect, lanes):
+    """Test that connecting with anything but a list of known lanes fails."""
+    before = dict(subscription_rooms)
+    client = connect(lanes=lanes)
+    assert not client.is_connected()
+    assert subscription_rooms == before
+
+def test_invalid_resubscribe_keeps_room(connect):
+    """Test that a bad subscribe event reports an error and changes nothing."""
+    client = connect(lanes=['lane1'])
+    client.get_received()
+    client.emit('subscribe', {'lanes': 'lane2'})
+    received = client.get_received()
+    assert [message['name'] for message in received] == ['subscription_error']
+    broadcast_traffic_data()
+    assert list(client.get_received()[0]['args'][0]['lanes']) == ['lane1']
+
+def test_empty_rooms_are_dropped(connect):
+    """Test that a room is forgotten once its last client leaves it."""
+    first = connect(lanes=['lane2', 'lane4'])
+    second = connect(lanes=['lane4', 'lane2'])
+    assert 'json:lane2,lane4' in subscription_rooms
+    first.disconnect()
+    assert 'json:lane2,lane4' in subscription_rooms
+    second.emit('subscribe', {'lanes': ['lane3']})
+    assert 'json:lane2,lane4' not in subscription_rooms
+    second.disconnect()
+    assert 'json:lane3' not in subscription_rooms
+
+def test_broadcast_while_clients_come_and_go(connect):
+    """Test that broadcasting survives concurrent connects and disconnects."""
+    errors = []
+    done = threading.Event()
+
+    def broadcast():
+        while not done.is_set():
+            try:
+                broadcast_traffic_data()
+            except Exception as e:
+                errors.append(e)
+                return
+
+    thread = threading.Thread(target=broadcast)
+    thread.start()
+    try:
+        for index in range(50):
+            client = connect(lanes=[f'lane{index % 4 + 1}', f'lane{(index + 1) % 4 + 1}'])
+            client.disconnect()
+    finally:
+        done.set()
+        thread.join(timeout=5.0)
+    assert errors == []
@@ -0,0 +1,90 @@
+"""
+Test file for the compact binary update format.
+"""
+import json
+from src.streaming import UpdatePublisher, apply_delta, decode_state_message
+from src.streaming.wire import decode_traffic_update, encode_traffic_update
+
+def state(north=0, south=0, signal='red', emergency=False):
+    """Build a system state as the dashboard sees it."""
+    return {
+        'traffic': {
+            'vehicle_counts': {'north': north, 'south': south},
+            'lanes': {'north': [0, 0, 10, 10], 'south': [0, 10, 10, 20]}
+        },
+        'signals': {
+            'signals': {'north': signal, 'south': 'red'},
+            'emergency_mode': emergency,
+            'emergency_vehicle': 'ambulance' if emergency else None
+        }
+    }
+
+class BinaryClient:
+    """Client decoding binary messages into its copy of the state."""
+
+    def __init__(self):
+        self.state = None
+        self.schema = None
+        self.version = None
+        self.sizes = []
+
+    def receive(self, event, data, sid):
+        assert event == 'state_binary'
+        self.sizes.append(len(data))
+        event, message, self.schema = decode_state_message(data, self.schema)
+        if event == 'state_sync':
+            self.state = message['state']
+        else:
+            assert message['base'] == self.version
+            apply_delta(self.state, message['changed'], message['removed'])
+        self.version = message['version']
+
+def test_binary_client_tracks_state():
+    """Test that decoded syncs and deltas reproduce every state."""
+    client = BinaryClient()
+    publisher = UpdatePublisher(client.receive, max_rate=0)
+    publisher.update(state())
+    publisher.add_client('a', 'binary')
+    assert client.state == state()
+
+    for current in (state(north=4), state(north=4, signal='green'), state(north=5, emergency=True)):
+        publisher.acknowledge('a', client.version)
+        publisher.update(current)
+        assert client.state == current
+
+def test_count_deltas_skip_json():
+    """Test that count changes are sent as a small fixed layout."""
+    client = BinaryClient()
+    publisher = UpdatePublisher(client.receive, max_rate=0)
+    publisher.update(state())
+    publisher.add_client('a', 'binary')
+    publisher.acknowledge('a', client.version)
+    publisher.update(state(north=7, south=2))
+
+    changed = {'traffic': {'vehicle_counts': {'north': 7, 'south': 2}}}
+    json_size = len(json.dumps({'base': 1, 'version': 2, 'changed': changed, 'removed': []}))
+    # Header, two counts, two signal codes and flags, no JSON tail
+    assert client.sizes[-1] == 17 + 2 + 4 + 2 + 2 + 1
+    assert client.sizes[-1] < json_size / 2
+
+def test_removed_lane_is_applied():
+    """Test that lanes disappearing from the schema are removed."""
+    client = BinaryClient()
+    publisher = UpdatePublisher(client.receive, max_rate=0)
+    publisher.update(state())
+    publisher.add_client('a', 'binary')
+    publisher.acknowledge('a', client.version)
+    current = state()
+    del current['traffic']['vehicle_counts']['south']
+    publisher.update(current)
+    assert client.state['traffic']['vehicle_counts'] == {'north': 0}
+
+def test_traffic_update_round_trip():
+    """Test encoding the web interface traffic update."""
+    data = {
+        'lanes': {'lane1': {'cars': 5, 'wait_time': 30}, 'lane2': {'cars': 0, 'wait_time': 0}},
+        'signal_state': {'state': 'green', 'elapsed_time': 12.5, 'total_duration': 30},
+        'recommendations': [{'type': 'info', 'message': 'Traffic flow is normal', 'severity': 'low'}],
+        'timestamp': '2024-01-01T12:00:00.250000'
+    }
+    assert decode_traffic_update(encode_traffic_update(data)) == data